@@ -11,7 +11,11 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
 
 from app.db.base import Base  # noqa
 from app.models.user import User  # noqa
-from app.models.patient import Patient, Medication, Dose, Note  # noqa
+from app.models.patient import Patient, Medication, Dose, DoseHistory, Note  # noqa
+from app.models.change_log import ChangeLog  # noqa
+from app.models.idempotency import IdempotencyKey  # noqa
+from app.models.medication_catalog import MedicationCatalogEntry  # noqa
+from app.models.daily_stats import DoseDailyStats  # noqa
 
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
@@ -28,6 +32,14 @@ if config.config_file_name is not None:
 # target_metadata = mymodel.Base.metadata
 target_metadata = Base.metadata
 
+
+def include_object(object, name, type_, reflected, compare_to):
+    # Las tablas FTS5 (y sus tablas internas) se crean a mano en su migración
+    if type_ == "table" and "_fts" in name:
+        return False
+    return True
+
+
 # other values from the config, defined by the needs of env.py,
 # can be acquired:
 # my_important_option = config.get_main_option("my_important_option")
@@ -52,6 +64,7 @@ def run_migrations_offline() -> None:
         target_metadata=target_metadata,
         literal_binds=True,
         dialect_opts={"paramstyle": "named"},
+        include_object=include_object,
     )
 
     with context.begin_transaction():
@@ -72,7 +85,11 @@ def run_migrations_online() -> None:
     )
 
     with connectable.connect() as connection:
-        context.configure(connection=connection, target_metadata=target_metadata)
+        context.configure(
+            connection=connection,
+            target_metadata=target_metadata,
+            include_object=include_object,
+        )
 
         with context.begin_transaction():
             context.run_migrations()
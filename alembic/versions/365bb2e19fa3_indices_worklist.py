@@ -0,0 +1,30 @@
+"""indices_worklist
+
+Revision ID: 365bb2e19fa3
+Revises: a4970e1231d0
+Create Date: 2026-10-19 02:40:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '365bb2e19fa3'
+down_revision: Union[str, None] = 'a4970e1231d0'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_doses_status_scheduled_time', 'doses', ['status', 'scheduled_time'], unique=False)
+    op.create_index(op.f('ix_patients_assistant_id'), 'patients', ['assistant_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_patients_assistant_id'), table_name='patients')
+    op.drop_index('ix_doses_status_scheduled_time', table_name='doses')
@@ -0,0 +1,59 @@
+"""busqueda_texto_completo
+
+Revision ID: 4b6d0e8a9c21
+Revises: 9c3e5a1f2b7d
+Create Date: 2026-10-19 04:40:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4b6d0e8a9c21'
+down_revision: Union[str, None] = '9c3e5a1f2b7d'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (tabla FTS, tabla original, columna indexada)
+SEARCH_INDEXES = [
+    ('patients_fts', 'patients', 'name'),
+    ('medications_fts', 'medications', 'name'),
+    ('notes_fts', 'notes', 'content'),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for fts, table, column in SEARCH_INDEXES:
+        op.execute(
+            f"CREATE VIRTUAL TABLE {fts} USING fts5({column}, content='{table}', "
+            f"content_rowid='id', tokenize='unicode61 remove_diacritics 2')"
+        )
+        op.execute(
+            f"CREATE TRIGGER {fts}_ai AFTER INSERT ON {table} BEGIN "
+            f"INSERT INTO {fts}(rowid, {column}) VALUES (new.id, new.{column}); END"
+        )
+        op.execute(
+            f"CREATE TRIGGER {fts}_ad AFTER DELETE ON {table} BEGIN "
+            f"INSERT INTO {fts}({fts}, rowid, {column}) "
+            f"VALUES ('delete', old.id, old.{column}); END"
+        )
+        op.execute(
+            f"CREATE TRIGGER {fts}_au AFTER UPDATE OF {column} ON {table} BEGIN "
+            f"INSERT INTO {fts}({fts}, rowid, {column}) "
+            f"VALUES ('delete', old.id, old.{column}); "
+            f"INSERT INTO {fts}(rowid, {column}) VALUES (new.id, new.{column}); END"
+        )
+        # Indexar las filas que ya existen
+        op.execute(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for fts, table, column in SEARCH_INDEXES:
+        for suffix in ('au', 'ad', 'ai'):
+            op.execute(f"DROP TRIGGER {fts}_{suffix}")
+        op.execute(f"DROP TABLE {fts}")
@@ -0,0 +1,32 @@
+"""indices_claves_foraneas
+
+Revision ID: 6b94f465bd00
+Revises: 078758d58a20
+Create Date: 2026-10-19 01:25:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '6b94f465bd00'
+down_revision: Union[str, None] = '078758d58a20'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(op.f('ix_medications_patient_id'), 'medications', ['patient_id'], unique=False)
+    op.create_index(op.f('ix_doses_medication_id'), 'doses', ['medication_id'], unique=False)
+    op.create_index(op.f('ix_notes_patient_id'), 'notes', ['patient_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_notes_patient_id'), table_name='notes')
+    op.drop_index(op.f('ix_doses_medication_id'), table_name='doses')
+    op.drop_index(op.f('ix_medications_patient_id'), table_name='medications')
@@ -0,0 +1,51 @@
+"""borrado_en_cascada
+
+Revision ID: 9c3e5a1f2b7d
+Revises: f77a0a27e9e6
+Create Date: 2026-10-19 04:10:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9c3e5a1f2b7d'
+down_revision: Union[str, None] = 'f77a0a27e9e6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# SQLite no permite alterar claves foráneas: las tablas se recrean en modo
+# batch. Las claves originales no tienen nombre; la convención se lo da al
+# reflejarlas para poder borrarlas.
+naming_convention = {
+    "fk": "fk_%(table_name)s_%(column_0_name)s_%(referred_table_name)s",
+}
+
+# (tabla, columna, tabla referida)
+CASCADES = [
+    ('medications', 'patient_id', 'patients'),
+    ('notes', 'patient_id', 'patients'),
+    ('doses', 'medication_id', 'medications'),
+    ('dose_history', 'medication_id', 'medications'),
+]
+
+
+def _replace_foreign_keys(ondelete) -> None:
+    for table, column, referred in CASCADES:
+        name = f'fk_{table}_{column}_{referred}'
+        with op.batch_alter_table(table, naming_convention=naming_convention) as batch_op:
+            batch_op.drop_constraint(name, type_='foreignkey')
+            batch_op.create_foreign_key(name, referred, [column], ['id'], ondelete=ondelete)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    _replace_foreign_keys('CASCADE')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    _replace_foreign_keys(None)
@@ -0,0 +1,57 @@
+"""registro_de_cambios_sync
+
+Revision ID: a4970e1231d0
+Revises: 6b94f465bd00
+Create Date: 2026-10-19 02:10:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a4970e1231d0'
+down_revision: Union[str, None] = '6b94f465bd00'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('change_log',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('entity', sa.String(), nullable=False),
+    sa.Column('entity_id', sa.Integer(), nullable=False),
+    sa.Column('patient_id', sa.Integer(), nullable=True),
+    sa.Column('assistant_id', sa.Integer(), nullable=True),
+    sa.Column('deleted', sa.Boolean(), nullable=False),
+    sa.Column('changed_at', sa.DateTime(timezone=True), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sqlite_autoincrement=True
+    )
+    op.create_index(op.f('ix_change_log_assistant_id'), 'change_log', ['assistant_id'], unique=False)
+
+    # Los datos existentes entran como altas para que since=0 sea una
+    # sincronización completa
+    op.execute(
+        "INSERT INTO change_log (entity, entity_id, patient_id, assistant_id, deleted) "
+        "SELECT 'patient', id, id, assistant_id, 0 FROM patients ORDER BY id"
+    )
+    op.execute(
+        "INSERT INTO change_log (entity, entity_id, patient_id, assistant_id, deleted) "
+        "SELECT 'medication', m.id, m.patient_id, p.assistant_id, 0 "
+        "FROM medications m JOIN patients p ON p.id = m.patient_id ORDER BY m.id"
+    )
+    op.execute(
+        "INSERT INTO change_log (entity, entity_id, patient_id, assistant_id, deleted) "
+        "SELECT 'note', n.id, n.patient_id, p.assistant_id, 0 "
+        "FROM notes n JOIN patients p ON p.id = n.patient_id ORDER BY n.id"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_change_log_assistant_id'), table_name='change_log')
+    op.drop_table('change_log')
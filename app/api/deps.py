@@ -10,15 +10,19 @@ from app.crud.crud_user import get_user_by_username
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
 
 
-def get_current_user(
-    token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)
-):
-    credentials_exception = HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="Could not validate credentials",
-        headers={"WWW-Authenticate": "Bearer"},
-    )
-
+credentials_exception = HTTPException(
+    status_code=status.HTTP_401_UNAUTHORIZED,
+    detail="Could not validate credentials",
+    headers={"WWW-Authenticate": "Bearer"},
+)
+
+
+def get_token_subject(token: str = Depends(oauth2_scheme)) -> str:
+    """
+    Usuario del token sin consultar la base de datos, para rutas que no
+    necesitan el usuario completo (ej. autocompletado). No comprueba que
+    el usuario exista ni que siga activo.
+    """
     payload = decode_access_token(token)
     if payload is None:
         raise credentials_exception
@@ -26,7 +30,12 @@ def get_current_user(
     username: str = payload.get("sub")
     if username is None:
         raise credentials_exception
+    return username
 
+
+def get_current_user(
+    username: str = Depends(get_token_subject), db: Session = Depends(get_db)
+):
     user = get_user_by_username(db, username=username)
     if user is None:
         raise credentials_exception
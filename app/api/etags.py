@@ -0,0 +1,28 @@
+import hashlib
+from uuid import uuid4
+
+from fastapi import Request, Response
+
+# Las versiones de patient_cache viven en memoria y vuelven a empezar con cada
+# arranque: el epoch evita que un ETag de la ejecución anterior coincida
+EPOCH = uuid4().hex
+
+
+def make_etag(*parts) -> str:
+    """ETag fuerte a partir de las versiones y parámetros que definen el cuerpo"""
+    digest = hashlib.blake2b(repr((EPOCH,) + parts).encode(), digest_size=12)
+    return f'"{digest.hexdigest()}"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """If-None-Match usa comparación débil: se ignora el prefijo W/"""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    return etag in (tag.strip().removeprefix("W/") for tag in header.split(","))
+
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=304, headers={"ETag": etag})
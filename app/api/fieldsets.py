@@ -0,0 +1,106 @@
+from functools import lru_cache
+from typing import List, Optional
+
+from fastapi import HTTPException
+from pydantic import ConfigDict, create_model
+from sqlalchemy.orm import load_only, selectinload
+
+from app.api.responses import dump_json
+from app.models.patient import Medication, Patient
+from app.schemas.patient import (
+    MedicationRead,
+    MedicationSummary,
+    NoteRead,
+    PatientRead,
+)
+
+# Relaciones de PatientRead que se pueden expandir con ?expand=
+EXPANDABLE = ("medications", "medications.doses", "notes")
+RELATIONSHIP_FIELDS = {"medications", "notes"}
+SCALAR_FIELDS = tuple(
+    name for name in PatientRead.model_fields if name not in RELATIONSHIP_FIELDS
+)
+
+
+def _split(value: Optional[str]) -> List[str]:
+    return [item.strip() for item in (value or "").split(",") if item.strip()]
+
+
+def parse_fieldset(fields: Optional[str], expand: Optional[str]):
+    """
+    Valida ?fields=id,name&expand=medications y devuelve (campos, expansiones)
+    como frozensets. El id siempre se incluye. None si no se pidió nada.
+    """
+    if fields is None and expand is None:
+        return None
+
+    requested_fields = _split(fields)
+    unknown = [f for f in requested_fields if f not in SCALAR_FIELDS]
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown fields: {', '.join(unknown)}. "
+            f"Valid fields: {', '.join(SCALAR_FIELDS)}",
+        )
+
+    requested_expand = _split(expand)
+    unknown = [e for e in requested_expand if e not in EXPANDABLE]
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown expand: {', '.join(unknown)}. "
+            f"Valid values: {', '.join(EXPANDABLE)}",
+        )
+    if "medications.doses" in requested_expand:
+        requested_expand.append("medications")
+
+    selected = frozenset(requested_fields or SCALAR_FIELDS) | {"id"}
+    return selected, frozenset(requested_expand)
+
+
+@lru_cache(maxsize=64)
+def build_patient_model(fields: frozenset, expand: frozenset):
+    """Modelo pydantic derivado de PatientRead con solo la selección pedida"""
+    definitions = {
+        name: (
+            PatientRead.model_fields[name].annotation,
+            PatientRead.model_fields[name],
+        )
+        for name in SCALAR_FIELDS
+        if name in fields
+    }
+    if "medications" in expand:
+        medication_model = (
+            MedicationRead if "medications.doses" in expand else MedicationSummary
+        )
+        definitions["medications"] = (List[medication_model], [])
+    if "notes" in expand:
+        definitions["notes"] = (List[NoteRead], [])
+
+    return create_model(
+        "PatientSparse",
+        __config__=ConfigDict(from_attributes=True),
+        **definitions,
+    )
+
+
+def patient_loader_options(fields: frozenset, expand: frozenset) -> list:
+    """Opciones de carga: solo las columnas pedidas y solo los joins expandidos"""
+    # assistant_id se carga siempre porque se usa para los permisos
+    columns = {"assistant_id"} | (fields & set(SCALAR_FIELDS))
+    options = [load_only(*(getattr(Patient, name) for name in sorted(columns)))]
+    if "medications.doses" in expand:
+        options.append(selectinload(Patient.medications).selectinload(Medication.doses))
+    elif "medications" in expand:
+        options.append(selectinload(Patient.medications))
+    if "notes" in expand:
+        options.append(selectinload(Patient.notes))
+    return options
+
+
+def serialize_patients(patients, fields: frozenset, expand: frozenset) -> bytes:
+    return dump_json(List[build_patient_model(fields, expand)], patients)
+
+
+def serialize_patient(patient, fields: frozenset, expand: frozenset) -> bytes:
+    return dump_json(build_patient_model(fields, expand), patient)
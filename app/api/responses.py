@@ -0,0 +1,35 @@
+from functools import lru_cache
+from typing import Any
+
+from fastapi import Response
+from pydantic import TypeAdapter
+
+
+@lru_cache(maxsize=None)
+def get_adapter(type_: Any) -> TypeAdapter:
+    """TypeAdapter por tipo de respuesta; construirlo es caro, se reutiliza"""
+    return TypeAdapter(type_)
+
+
+def dump_json(type_: Any, content: Any) -> bytes:
+    """
+    Valida objetos ORM contra el esquema y los serializa a JSON en un solo
+    paso dentro de pydantic-core, sin pasar por jsonable_encoder ni json.dumps.
+    """
+    adapter = get_adapter(type_)
+    return adapter.dump_json(adapter.validate_python(content, from_attributes=True))
+
+
+class RawJSONResponse(Response):
+    """Respuesta con un cuerpo JSON ya serializado"""
+
+    media_type = "application/json"
+
+
+def model_response(type_: Any, content: Any, **kwargs) -> RawJSONResponse:
+    """
+    Respuesta rápida para un response_model: devolverla desde el endpoint
+    evita la validación y codificación por defecto de FastAPI. Mantener el
+    response_model en el decorador para la documentación OpenAPI.
+    """
+    return RawJSONResponse(content=dump_json(type_, content), **kwargs)
@@ -0,0 +1,34 @@
+from fastapi import APIRouter, Depends, HTTPException
+
+from app.api.deps import get_current_user_with_role
+from app.core.profiling import ProfilerBusy, get_profile, get_profiles, profile_call
+from app.services.notifications import run_dose_notification_check
+
+router = APIRouter()
+
+
+@router.get("/profiles")
+def list_profiles(current_user=Depends(get_current_user_with_role(["admin"]))):
+    """Perfiles guardados en memoria, del más reciente al más antiguo"""
+    return get_profiles()
+
+
+@router.get("/profiles/{profile_id}")
+def read_profile(
+    profile_id: str,
+    current_user=Depends(get_current_user_with_role(["admin"])),
+):
+    profile = get_profile(profile_id)
+    if profile is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return profile
+
+
+@router.post("/profiles/dose-check")
+def profile_dose_check(current_user=Depends(get_current_user_with_role(["admin"]))):
+    """Ejecuta un tick del verificador de dosis perfilado y devuelve el perfil"""
+    try:
+        _, profile = profile_call("scheduler: check_doses", run_dose_notification_check)
+    except ProfilerBusy:
+        raise HTTPException(status_code=409, detail="Profiler busy, retry later")
+    return profile
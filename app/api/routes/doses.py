@@ -0,0 +1,97 @@
+from datetime import datetime, timedelta
+from typing import List, Optional
+
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+
+from app.api.deps import get_current_active_user
+from app.api.responses import model_response
+from app.core import clock
+from app.crud.crud_patient import administer_doses, get_dose_worklist
+from app.db.base import get_db
+from app.models.user import User
+from app.schemas.patient import (
+    DoseAdministrationBatch,
+    DoseAdministrationResult,
+    WorklistItem,
+)
+from app.services.dose_export import EXPORT_FORMAT_PATTERN, dose_export_response
+from app.services.notifications import run_dose_notification_check
+
+router = APIRouter()
+
+# Sin ?to= la lista cubre las próximas horas de turno
+WORKLIST_DEFAULT_HOURS = 12
+
+
+@router.get("/worklist", response_model=List[WorklistItem])
+def read_worklist(
+    start: Optional[datetime] = Query(None, alias="from"),
+    end: Optional[datetime] = Query(None, alias="to"),
+    limit: int = Query(500, ge=1, le=1000),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user),
+):
+    """
+    Dosis pendientes de todos los pacientes visibles, ordenadas por hora
+    programada: los del asistente, o todos para admin y doctores. Sin ?from=
+    se incluyen las atrasadas; sin ?to=, las próximas 12 horas.
+    """
+    start, end = clock.to_local_naive(start), clock.to_local_naive(end)
+    if end is None:
+        end = clock.now() + timedelta(hours=WORKLIST_DEFAULT_HOURS)
+    if start is not None and start > end:
+        raise HTTPException(status_code=400, detail="'from' must be before 'to'")
+
+    assistant_id = current_user.id if current_user.role == "assistant" else None
+    return model_response(
+        List[WorklistItem], get_dose_worklist(db, start, end, assistant_id, limit)
+    )
+
+
+@router.post("/administer", response_model=List[DoseAdministrationResult])
+def administer_dose_batch(
+    batch: DoseAdministrationBatch,
+    background_tasks: BackgroundTasks,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user),
+):
+    """
+    Administra varias dosis de una vez (rondas). Todo se aplica en una sola
+    transacción y se devuelve un resultado por dosis: administered,
+    not_found, not_pending o duplicate. Las fallidas no afectan a las demás.
+    """
+    results = administer_doses(db, batch.items, current_user.id)
+    if any(result["status"] == "administered" for result in results):
+        background_tasks.add_task(run_dose_notification_check)
+    return model_response(List[DoseAdministrationResult], results)
+
+
+@router.get("/export")
+def export_doses(
+    format: str = Query("csv", pattern=EXPORT_FORMAT_PATTERN),
+    start: Optional[datetime] = Query(None, alias="from"),
+    end: Optional[datetime] = Query(None, alias="to"),
+    assistant_id: Optional[int] = None,
+    current_user: User = Depends(get_current_active_user),
+):
+    """
+    Exportación para auditoría de las dosis de la clínica (también las
+    archivadas) con quién las administró y cuándo, en CSV o NDJSON,
+    transmitida fila a fila. ?from= y ?to= filtran por hora programada y
+    ?assistant_id= por asistente del paciente; un asistente solo exporta
+    las de sus pacientes.
+    """
+    start, end = clock.to_local_naive(start), clock.to_local_naive(end)
+    if start is not None and end is not None and start > end:
+        raise HTTPException(status_code=400, detail="'from' must be before 'to'")
+    if current_user.role == "assistant":
+        assistant_id = current_user.id
+
+    return dose_export_response(
+        format,
+        f"doses-{clock.now():%Y%m%d-%H%M%S}",
+        start=start,
+        end=end,
+        assistant_id=assistant_id,
+    )
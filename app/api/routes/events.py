@@ -0,0 +1,98 @@
+import asyncio
+from typing import Optional
+
+from fastapi import APIRouter, Header, HTTPException, Request
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
+
+from app.api.deps import get_current_active_user, get_current_user, get_token_subject
+from app.db.base import session_scope
+from app.services.events import event_broker, format_resync, format_sse
+
+router = APIRouter()
+
+# Comentario periódico para que proxies y tablets no cierren la conexión
+KEEPALIVE_SECONDS = 15
+
+
+def _authenticate(authorization: Optional[str], token: Optional[str]):
+    """
+    EventSource no permite cabeceras propias: el token puede llegar como
+    ?token= además de Authorization: Bearer. La sesión se cierra antes de
+    empezar a transmitir para no retener una conexión del pool.
+    """
+    if not token:
+        scheme, _, token = (authorization or "").partition(" ")
+        if scheme.lower() != "bearer":
+            token = None
+    if not token:
+        raise HTTPException(
+            status_code=401,
+            detail="Not authenticated",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    with session_scope() as db:
+        user = get_current_active_user(
+            current_user=get_current_user(username=get_token_subject(token), db=db)
+        )
+        return user.id, user.role
+
+
+async def _event_stream(
+    request: Request, assistant_id, last_event_id: int, resync: bool
+):
+    # Suscribirse antes de leer el historial para no perder eventos entre ambos
+    subscription = event_broker.subscribe(assistant_id)
+    last_sent = last_event_id
+    try:
+        yield "retry: 3000\n\n"
+        if resync:
+            yield format_resync(last_event_id)
+        for event in event_broker.replay(subscription, last_event_id):
+            last_sent = event["id"]
+            yield format_sse(event)
+
+        while not subscription.overflowed:
+            try:
+                event = await asyncio.wait_for(
+                    subscription.queue.get(), timeout=KEEPALIVE_SECONDS
+                )
+            except asyncio.TimeoutError:
+                if await request.is_disconnected():
+                    break
+                yield ": keepalive\n\n"
+                continue
+            # Lo ya enviado desde el historial puede llegar también por la cola
+            if event["id"] <= last_sent:
+                continue
+            last_sent = event["id"]
+            yield format_sse(event)
+    finally:
+        event_broker.unsubscribe(subscription)
+
+
+@router.get("/stream")
+async def stream_events(
+    request: Request,
+    token: Optional[str] = None,
+    last_event_id: Optional[str] = Header(None),
+):
+    """
+    Flujo server-sent events con dose-due, dose-administered,
+    medication-cancelled y note-added. Un asistente solo recibe eventos de
+    sus pacientes; admin y doctores, de todos. Al reconectar con
+    Last-Event-ID se reenvían los eventos recientes que se perdieron; si el
+    id es de un arranque anterior o esos eventos ya no están, se envía un
+    evento resync para que el cliente recargue su estado.
+    """
+    user_id, role = await run_in_threadpool(
+        _authenticate, request.headers.get("Authorization"), token
+    )
+    assistant_id = user_id if role == "assistant" else None
+    since, resync = event_broker.resume_point(last_event_id)
+
+    return StreamingResponse(
+        _event_stream(request, assistant_id, since, resync),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
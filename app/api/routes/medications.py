@@ -0,0 +1,52 @@
+from typing import List
+
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import Session
+
+from app.api.deps import get_current_user_with_role, get_token_subject
+from app.api.responses import model_response
+from app.crud.crud_medication_catalog import import_catalog_entries
+from app.db.base import get_db
+from app.models.user import User
+from app.schemas.medication_catalog import (
+    CatalogImport,
+    CatalogImportResult,
+    CatalogSuggestion,
+)
+from app.services.medication_catalog import medication_catalog
+
+router = APIRouter()
+
+
+@router.get("/catalog/suggest", response_model=List[CatalogSuggestion])
+def suggest_medications(
+    prefix: str = Query(..., min_length=1, max_length=100),
+    limit: int = Query(10, ge=1, le=50),
+    username: str = Depends(get_token_subject),
+):
+    """
+    Autocompletado de nombres de medicación, con sus dosificaciones
+    habituales, ordenado por uso. Se responde desde el índice en memoria,
+    sin consultar la base de datos, para poder llamarlo en cada tecla: por
+    eso solo se valida el token y un usuario desactivado con un token aún
+    vigente no se rechaza (solo ve nombres de medicación del catálogo).
+    """
+    return model_response(
+        List[CatalogSuggestion], medication_catalog.suggest(prefix, limit)
+    )
+
+
+@router.post("/catalog/import", response_model=CatalogImportResult)
+def import_medication_catalog(
+    catalog: CatalogImport,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user_with_role(["admin", "doctor"])),
+):
+    """Añade al catálogo una lista de nombres (y dosificaciones) de medicación"""
+    added = import_catalog_entries(
+        db, [(item.name, item.dosage) for item in catalog.items]
+    )
+    medication_catalog.add(added, usage_count=0)
+    return model_response(
+        CatalogImportResult, {"received": len(catalog.items), "added": len(added)}
+    )
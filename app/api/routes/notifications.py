@@ -1,9 +1,7 @@
 from fastapi import APIRouter, Depends, BackgroundTasks
-from sqlalchemy.orm import Session
 
-from app.db.base import get_db
 from app.services.notifications import (
-    check_and_send_medication_notifications,
+    run_dose_notification_check,
     get_notification_check_history,
 )
 from app.api.deps import get_current_user_with_role, get_current_active_user
@@ -14,11 +12,10 @@ router = APIRouter()
 @router.post("/check-medications")
 async def check_medications(
     background_tasks: BackgroundTasks,
-    db: Session = Depends(get_db),
     # Solo administrador y doctores pueden forzar la revisión
     current_user=Depends(get_current_user_with_role(["admin", "doctor"])),
 ):
-    background_tasks.add_task(check_and_send_medication_notifications, db)
+    background_tasks.add_task(run_dose_notification_check)
     return {"message": "Medication check scheduled in background task"}
 
 
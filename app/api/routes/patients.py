@@ -1,65 +1,184 @@
-from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks, Body
+from fastapi import (
+    APIRouter,
+    Depends,
+    HTTPException,
+    BackgroundTasks,
+    Body,
+    Query,
+    Request,
+)
+from datetime import datetime
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+import io
+import tempfile
 from typing import List, Optional
 
+from app.api.fieldsets import (
+    parse_fieldset,
+    patient_loader_options,
+    serialize_patient,
+    serialize_patients,
+)
+from app.api.etags import etag_matches, make_etag, not_modified
+from app.api.responses import RawJSONResponse, dump_json, model_response
+from app.core import clock
 from app.db.base import get_db
 from app.models.user import User
 from app.models.patient import Medication
 from app.schemas.patient import (
     PatientCreate,
     PatientRead,
+    PatientSummary,
     PatientUpdate,
     MedicationCreate,
     MedicationRead,
+    MedicationSummary,
     MedicationUpdate,
     NoteCreate,
     NoteRead,
+    NoteBatch,
+    NoteBatchResult,
     DoseRead,
+    ProtocolApplication,
+    ProtocolApplicationResult,
+    PatientImportResult,
 )
+from app.crud.crud_sync import MEDICATION, latest_change_id, record_change
 from app.crud.crud_patient import (
     get_patients,
     get_patient,
+    get_patient_detail,
     create_patient,
     update_patient,
     delete_patient,
     add_medication,
+    apply_protocol,
     update_medication,
     delete_medication,
     complete_medication,
     add_note,
     get_patients_by_assistant,
     administer_dose,
+    add_notes,
     cancel_medication,
     get_pending_doses,
+    get_patient_summaries,
+    get_medication,
+    get_patient_medications,
+    get_medication_doses,
+    get_patient_notes,
 )
 from app.api.deps import get_current_active_user, get_current_user_with_role
-from app.services.notifications import (
-    check_and_send_medication_notifications,
-    check_and_send_dose_notifications,
-)
+from app.services.dose_export import EXPORT_FORMAT_PATTERN, dose_export_response
+from app.services.notifications import run_dose_notification_check
+from app.services.patient_import import IMPORT_FORMAT_PATTERN, import_patients
+from app.services.patient_cache import patient_cache
 
 router = APIRouter()
 
+# Bytes del archivo importado que se guardan en memoria antes de pasar a disco
+IMPORT_SPOOL_BYTES = 1024 * 1024
+
+
+def _check_patient_access(assistant_id: int, current_user: User):
+    """Un asistente solo puede ver sus propios pacientes asignados"""
+    if current_user.role == "assistant" and assistant_id != current_user.id:
+        raise HTTPException(
+            status_code=403, detail="Not authorized to view this patient"
+        )
+
+
+def _fieldset_key(fieldset):
+    if fieldset is None:
+        return None
+    return tuple(tuple(sorted(names)) for names in fieldset)
+
+
+def _patient_etag(patient_id: int, version: int, fieldset) -> str:
+    return make_etag("patient", patient_id, version, _fieldset_key(fieldset))
+
+
+def _get_accessible_patient(db: Session, patient_id: int, current_user: User):
+    """Paciente visible para el usuario: un asistente solo ve los suyos"""
+    db_patient = get_patient(db, patient_id)
+    if db_patient is None:
+        raise HTTPException(status_code=404, detail="Patient not found")
+    _check_patient_access(db_patient.assistant_id, current_user)
+    return db_patient
+
 
 # Patients endpoints
 @router.get("/", response_model=List[PatientRead])
 def read_patients(
+    request: Request,
     skip: int = 0,
     limit: int = 100,
     species: Optional[str] = None,
+    fields: Optional[str] = None,
+    expand: Optional[str] = None,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_active_user),
 ):
+    """
+    Lista de pacientes. Con ?fields=id,name,species&expand=medications solo se
+    cargan y serializan los campos y relaciones pedidos (expand admite
+    medications, medications.doses y notes).
+    """
+    fieldset = parse_fieldset(fields, expand)
+
+    # Cualquier escritura sobre cualquier paciente cambia last_version (en este
+    # proceso) o el último id de change_log (también desde scripts como
+    # import_patients), así que si ambos coinciden el listado no cambió y se
+    # responde 304 con una sola consulta
+    scope = current_user.id if current_user.role == "assistant" else "all"
+    etag = make_etag(
+        "patients",
+        patient_cache.last_version,
+        latest_change_id(db),
+        scope,
+        skip,
+        limit,
+        species,
+        _fieldset_key(fieldset),
+    )
+    if etag_matches(request, etag):
+        return not_modified(etag)
+
+    options = patient_loader_options(*fieldset) if fieldset else None
+
     # Filtro según rol:
     # - Admin y Doctor ven todos los pacientes
     # - Asistente solo ve sus propios pacientes asignados
+    kwargs = {"options": options} if options else {}
     if current_user.role == "assistant":
-        patients = get_patients_by_assistant(db, current_user.id, skip, limit)
-        if species:
-            patients = [p for p in patients if p.species == species]
-        return patients
+        patients = get_patients_by_assistant(
+            db, current_user.id, skip, limit, species, **kwargs
+        )
     else:
-        return get_patients(db, skip, limit, species)
+        patients = get_patients(db, skip, limit, species, **kwargs)
+
+    if fieldset:
+        return RawJSONResponse(
+            content=serialize_patients(patients, *fieldset), headers={"ETag": etag}
+        )
+    return model_response(List[PatientRead], patients, headers={"ETag": etag})
+
+
+@router.get("/summary", response_model=List[PatientSummary])
+def read_patient_summaries(
+    skip: int = 0,
+    limit: int = 100,
+    species: Optional[str] = None,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user),
+):
+    """Listado ligero de pacientes: contadores, próxima dosis y última nota"""
+    assistant_id = current_user.id if current_user.role == "assistant" else None
+    return model_response(
+        List[PatientSummary],
+        get_patient_summaries(db, skip, limit, species, assistant_id),
+    )
 
 
 @router.post("/", response_model=PatientRead)
@@ -73,28 +192,92 @@ def create_new_patient(
     db_patient = create_patient(db=db, patient=patient, user_id=current_user.id)
 
     # Verificar si hay medicaciones que deben programarse pronto
-    background_tasks.add_task(check_and_send_medication_notifications, db)
+    background_tasks.add_task(run_dose_notification_check)
 
-    return db_patient
+    return model_response(PatientRead, db_patient)
+
+
+@router.post("/import", response_model=PatientImportResult)
+async def import_patient_file(
+    request: Request,
+    background_tasks: BackgroundTasks,
+    format: str = Query(..., pattern=IMPORT_FORMAT_PATTERN),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user_with_role(["admin", "doctor"])),
+):
+    """
+    Alta masiva de pacientes con sus medicaciones (y dosis) y notas desde
+    un CSV o NDJSON enviado como cuerpo de la petición (formato en
+    app/services/patient_import.py). Los pacientes inválidos se informan por
+    línea sin abortar el resto del archivo.
+    """
+    # El cuerpo se recibe por fragmentos a un archivo temporal y se procesa
+    # línea a línea desde ahí, sin cargarlo entero en memoria
+    with tempfile.SpooledTemporaryFile(max_size=IMPORT_SPOOL_BYTES) as spool:
+        async for chunk in request.stream():
+            spool.write(chunk)
+        spool.seek(0)
+        lines = io.TextIOWrapper(
+            spool, encoding="utf-8-sig", errors="replace", newline=""
+        )
+        summary = await run_in_threadpool(
+            import_patients, db, lines, format, current_user.id
+        )
+        lines.detach()
+
+    if summary["doses_created"]:
+        background_tasks.add_task(run_dose_notification_check)
+    return model_response(PatientImportResult, summary)
 
 
 @router.get("/{patient_id}", response_model=PatientRead)
 def read_patient(
+    request: Request,
     patient_id: int,
+    fields: Optional[str] = None,
+    expand: Optional[str] = None,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_active_user),
 ):
-    db_patient = get_patient(db, patient_id=patient_id)
+    """
+    Paciente completo, o solo la selección de ?fields= y ?expand=.
+    El documento completo se sirve desde patient_cache mientras no cambie;
+    con If-None-Match y el ETag vigente se responde 304 sin cuerpo.
+    """
+    fieldset = parse_fieldset(fields, expand)
+    cached = None if fieldset else patient_cache.get(patient_id)
+    if cached:
+        _check_patient_access(cached.assistant_id, current_user)
+        etag = _patient_etag(patient_id, cached.version, fieldset)
+        if etag_matches(request, etag):
+            return not_modified(etag)
+        return RawJSONResponse(
+            content=cached.body, headers={"ETag": etag, "X-Cache": "HIT"}
+        )
+
+    # La versión se toma antes de consultar: si una escritura llega en medio,
+    # el documento guardado ya nace invalidado
+    version = patient_cache.version(patient_id)
+    etag = _patient_etag(patient_id, version, fieldset)
+    if fieldset:
+        db_patient = get_patient_detail(
+            db, patient_id, options=patient_loader_options(*fieldset)
+        )
+    else:
+        db_patient = get_patient_detail(db, patient_id=patient_id)
     if db_patient is None:
         raise HTTPException(status_code=404, detail="Patient not found")
+    _check_patient_access(db_patient.assistant_id, current_user)
+    if etag_matches(request, etag):
+        return not_modified(etag)
 
-    # Un asistente solo puede ver sus propios pacientes asignados
-    if current_user.role == "assistant" and db_patient.assistant_id != current_user.id:
-        raise HTTPException(
-            status_code=403, detail="Not authorized to view this patient"
+    if fieldset:
+        return RawJSONResponse(
+            content=serialize_patient(db_patient, *fieldset), headers={"ETag": etag}
         )
-
-    return db_patient
+    body = dump_json(PatientRead, db_patient)
+    patient_cache.put(patient_id, version, db_patient.assistant_id, body)
+    return RawJSONResponse(content=body, headers={"ETag": etag, "X-Cache": "MISS"})
 
 
 @router.put("/{patient_id}", response_model=PatientRead)
@@ -105,7 +288,9 @@ def update_patient_info(
     # Solo admin y doctores pueden actualizar pacientes
     current_user: User = Depends(get_current_user_with_role(["admin", "doctor"])),
 ):
-    return update_patient(db, patient_id=patient_id, patient=patient)
+    return model_response(
+        PatientRead, update_patient(db, patient_id=patient_id, patient=patient)
+    )
 
 
 @router.delete("/{patient_id}")
@@ -120,6 +305,75 @@ def delete_patient_record(
 
 
 # Medication endpoints
+@router.get("/{patient_id}/medications", response_model=List[MedicationSummary])
+def read_patient_medications(
+    patient_id: int,
+    skip: int = 0,
+    limit: int = 100,
+    status: Optional[str] = None,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user),
+):
+    """Medicaciones del paciente sin sus dosis, paginadas"""
+    _get_accessible_patient(db, patient_id, current_user)
+    return model_response(
+        List[MedicationSummary],
+        get_patient_medications(db, patient_id, skip, limit, status),
+    )
+
+
+@router.get("/medications/{medication_id}/doses", response_model=List[DoseRead])
+def read_medication_doses(
+    medication_id: int,
+    skip: int = 0,
+    limit: int = 100,
+    status: Optional[str] = None,
+    include_history: bool = False,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user),
+):
+    """
+    Dosis de una medicación, paginadas por hora programada. Con
+    ?include_history=true se incluyen las archivadas de tratamientos antiguos.
+    """
+    db_medication = get_medication(db, medication_id)
+    if db_medication is None:
+        raise HTTPException(status_code=404, detail="Medication not found")
+    _get_accessible_patient(db, db_medication.patient_id, current_user)
+    return model_response(
+        List[DoseRead],
+        get_medication_doses(db, medication_id, skip, limit, status, include_history),
+    )
+
+
+@router.get("/{patient_id}/doses/export")
+def export_patient_doses(
+    patient_id: int,
+    format: str = Query("csv", pattern=EXPORT_FORMAT_PATTERN),
+    start: Optional[datetime] = Query(None, alias="from"),
+    end: Optional[datetime] = Query(None, alias="to"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user),
+):
+    """
+    Historial de tratamiento del paciente para auditoría: todas sus dosis,
+    también las archivadas, con quién las administró y cuándo, en CSV o
+    NDJSON transmitido fila a fila. ?from= y ?to= filtran por hora programada.
+    """
+    _get_accessible_patient(db, patient_id, current_user)
+    start, end = clock.to_local_naive(start), clock.to_local_naive(end)
+    if start is not None and end is not None and start > end:
+        raise HTTPException(status_code=400, detail="'from' must be before 'to'")
+
+    return dose_export_response(
+        format,
+        f"patient-{patient_id}-doses-{clock.now():%Y%m%d-%H%M%S}",
+        start=start,
+        end=end,
+        patient_id=patient_id,
+    )
+
+
 @router.post("/{patient_id}/medications", response_model=MedicationRead)
 def create_patient_medication(
     patient_id: int,
@@ -132,9 +386,28 @@ def create_patient_medication(
     db_medication = add_medication(db, patient_id=patient_id, medication=medication)
 
     # Programar notificación si es necesario
-    background_tasks.add_task(check_and_send_medication_notifications, db)
+    background_tasks.add_task(run_dose_notification_check)
+
+    return model_response(MedicationRead, db_medication)
 
-    return db_medication
+
+@router.post("/protocols/apply", response_model=List[ProtocolApplicationResult])
+def apply_treatment_protocol(
+    protocol: ProtocolApplication,
+    background_tasks: BackgroundTasks,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user_with_role(["admin", "doctor"])),
+):
+    """
+    Aplica un protocolo (varias medicaciones) a varios pacientes de una vez,
+    con todas sus dosis programadas. Equivale a un POST /{id}/medications por
+    cada paciente y medicación, en una sola transacción.
+    """
+    results = apply_protocol(
+        db, protocol.patient_ids, protocol.medications, protocol.start_time
+    )
+    background_tasks.add_task(run_dose_notification_check)
+    return model_response(List[ProtocolApplicationResult], results)
 
 
 @router.put("/medications/{medication_id}", response_model=MedicationRead)
@@ -150,11 +423,11 @@ def update_medication_info(
         db, medication_id=medication_id, medication=medication
     )
 
-    # Verificar notificaciones si hay cambios en la frecuencia
-    if "frequency" in medication.model_dump(exclude_unset=True):
-        background_tasks.add_task(check_and_send_medication_notifications, db)
+    # Verificar notificaciones si se reprogramaron las dosis
+    if {"frequency", "duration_days"} & medication.model_fields_set:
+        background_tasks.add_task(run_dose_notification_check)
 
-    return db_medication
+    return model_response(MedicationRead, db_medication)
 
 
 @router.delete("/medications/{medication_id}")
@@ -178,10 +451,25 @@ def mark_medication_completed(
     db_medication = complete_medication(
         db, medication_id=medication_id, user_id=current_user.id
     )
-    return db_medication
+    return model_response(MedicationRead, db_medication)
 
 
 # Notes endpoints
+@router.get("/{patient_id}/notes", response_model=List[NoteRead])
+def read_patient_notes(
+    patient_id: int,
+    skip: int = 0,
+    limit: int = 100,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user),
+):
+    """Notas del paciente, de la más reciente a la más antigua"""
+    _get_accessible_patient(db, patient_id, current_user)
+    return model_response(
+        List[NoteRead], get_patient_notes(db, patient_id, skip, limit)
+    )
+
+
 @router.post("/{patient_id}/notes", response_model=NoteRead)
 def create_patient_note(
     patient_id: int,
@@ -200,7 +488,24 @@ def create_patient_note(
             status_code=403, detail="Not authorized to add notes to this patient"
         )
 
-    return add_note(db, patient_id=patient_id, note=note, user_id=current_user.id)
+    db_note = add_note(db, patient_id=patient_id, note=note, user_id=current_user.id)
+    return model_response(NoteRead, db_note)
+
+
+@router.post("/notes/batch", response_model=List[NoteBatchResult])
+def create_note_batch(
+    batch: NoteBatch,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user),
+):
+    """
+    Crea notas en varios pacientes en una sola transacción, con un resultado
+    por elemento: created, not_found o forbidden (asistente con un paciente
+    que no es suyo).
+    """
+    assistant_id = current_user.id if current_user.role == "assistant" else None
+    results = add_notes(db, batch.items, current_user.id, assistant_id)
+    return model_response(List[NoteBatchResult], results)
 
 
 @router.post("/medications/{medication_id}/reset", response_model=MedicationRead)
@@ -210,7 +515,7 @@ def reset_medication_time(
     current_user: User = Depends(get_current_active_user),
 ):
     """Reinicia el tiempo programado para una medicación y marca como no notificada"""
-    from datetime import datetime, timedelta
+    from datetime import timedelta
 
     # Obtener la medicación
     medication = db.query(Medication).filter(Medication.id == medication_id).first()
@@ -218,19 +523,21 @@ def reset_medication_time(
         raise HTTPException(status_code=404, detail="Medication not found")
 
     # Reiniciar tiempo y estado
-    medication.next_dose_time = datetime.now() - timedelta(
+    medication.next_dose_time = clock.now() - timedelta(
         minutes=10
     )  # 10 minutos en el pasado para forzar notificación
     medication.notification_sent = False
     medication.completed = False
     medication.completed_at = None
     medication.completed_by = None
+    record_change(db, MEDICATION, medication.id, medication.patient_id)
 
     db.add(medication)
     db.commit()
+    patient_cache.invalidate(medication.patient_id)
     db.refresh(medication)
 
-    return medication
+    return model_response(MedicationRead, medication)
 
 
 @router.post("/doses/{dose_id}/administer", response_model=DoseRead)
@@ -250,9 +557,9 @@ def administer_patient_dose(
 
         # Verificar próximas notificaciones
         # Nota: Ahora que tenemos un solo sistema, usamos solo check_dose
-        background_tasks.add_task(check_and_send_dose_notifications, db)
+        background_tasks.add_task(run_dose_notification_check)
 
-        return db_dose
+        return model_response(DoseRead, db_dose)
     except HTTPException:
         raise
     except Exception as e:
@@ -271,7 +578,9 @@ def cancel_patient_medication(
 ):
     """Cancelar un tratamiento en curso"""
     try:
-        return cancel_medication(db, medication_id, current_user.id)
+        return model_response(
+            MedicationRead, cancel_medication(db, medication_id, current_user.id)
+        )
     except HTTPException:
         raise
     except Exception as e:
@@ -283,6 +592,7 @@ def cancel_patient_medication(
 # Nuevo endpoint para obtener dosis pendientes de un paciente
 @router.get("/{patient_id}/pending-doses/", response_model=List[DoseRead])
 def read_patient_pending_doses(
+    request: Request,
     patient_id: int,
     skip: int = 0,
     limit: int = 100,
@@ -301,8 +611,17 @@ def read_patient_pending_doses(
             status_code=403, detail="Not authorized to view this patient's doses"
         )
 
+    etag = make_etag(
+        "pending-doses", patient_id, patient_cache.version(patient_id), skip, limit
+    )
+    if etag_matches(request, etag):
+        return not_modified(etag)
+
     try:
-        return get_pending_doses(db, patient_id, skip, limit)
+        pending_doses = get_pending_doses(
+            db, patient_id, current_user=current_user, skip=skip, limit=limit
+        )
+        return model_response(List[DoseRead], pending_doses, headers={"ETag": etag})
     except HTTPException:
         raise
     except Exception as e:
@@ -0,0 +1,27 @@
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import Session
+
+from app.api.deps import get_current_active_user
+from app.api.responses import model_response
+from app.crud.crud_search import search
+from app.db.base import get_db
+from app.models.user import User
+from app.schemas.search import SearchResults
+
+router = APIRouter()
+
+
+@router.get("", response_model=SearchResults)
+def search_records(
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: int = Query(20, ge=1, le=100),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user),
+):
+    """
+    Búsqueda de texto completo en pacientes, medicaciones y notas. Cada
+    palabra vale como prefijo y deben aparecer todas; no distingue
+    mayúsculas ni tildes. Un asistente solo ve resultados de sus pacientes.
+    """
+    assistant_id = current_user.id if current_user.role == "assistant" else None
+    return model_response(SearchResults, search(db, q, assistant_id, limit))
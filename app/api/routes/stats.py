@@ -0,0 +1,60 @@
+from datetime import date, timedelta
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+
+from app.api.deps import get_current_user_with_role
+from app.api.responses import model_response
+from app.core import clock
+from app.crud.crud_stats import get_adherence, get_overview
+from app.db.base import get_db
+from app.models.user import User
+from app.schemas.stats import AdherenceReport, StatsOverview
+
+router = APIRouter()
+
+# Sin ?from= el informe cubre los últimos 30 días
+ADHERENCE_DEFAULT_DAYS = 30
+# Rango máximo de un informe
+ADHERENCE_MAX_DAYS = 3660
+
+
+@router.get("/overview", response_model=StatsOverview)
+def read_overview(
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user_with_role(["admin", "doctor"])),
+):
+    """
+    Estado actual por asistente: pacientes, tratamientos activos, dosis
+    pendientes y atrasadas, y cómo va el día (administradas a tiempo o
+    tarde, omitidas).
+    """
+    return model_response(StatsOverview, get_overview(db))
+
+
+@router.get("/adherence", response_model=AdherenceReport)
+def read_adherence(
+    start: Optional[date] = Query(None, alias="from"),
+    end: Optional[date] = Query(None, alias="to"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user_with_role(["admin", "doctor"])),
+):
+    """
+    Adherencia de las dosis programadas entre ?from= y ?to= (días, ambos
+    incluidos): estados por asistente, administraciones a tiempo o tarde y
+    tasa de omisión por medicación. Sin ?to= hasta hoy; sin ?from=, los 30
+    días anteriores.
+    """
+    if end is None:
+        end = clock.now().date()
+    if start is None:
+        start = end - timedelta(days=ADHERENCE_DEFAULT_DAYS - 1)
+    if start > end:
+        raise HTTPException(status_code=400, detail="'from' must be before 'to'")
+    if (end - start).days >= ADHERENCE_MAX_DAYS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Range cannot exceed {ADHERENCE_MAX_DAYS} days",
+        )
+    return model_response(AdherenceReport, get_adherence(db, start, end))
@@ -0,0 +1,32 @@
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import Session
+
+from app.api.deps import get_current_active_user
+from app.api.responses import model_response
+from app.crud.crud_sync import SYNC_PAGE_SIZE, build_sync_payload, get_changes_since
+from app.db.base import get_db
+from app.models.user import User
+from app.schemas.sync import SyncResponse
+
+router = APIRouter()
+
+
+@router.get("", response_model=SyncResponse)
+def sync_changes(
+    since: int = Query(0, ge=0),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user),
+):
+    """
+    Sincronización incremental: pacientes, medicaciones, dosis y notas
+    creados, modificados o eliminados después de ?since=. Guardar el cursor
+    devuelto y repetir mientras has_more sea true. Un asistente solo recibe
+    sus pacientes, igual que en GET /patients/.
+    """
+    assistant_id = current_user.id if current_user.role == "assistant" else None
+    changes = get_changes_since(db, since, assistant_id, limit=SYNC_PAGE_SIZE + 1)
+    has_more = len(changes) > SYNC_PAGE_SIZE
+    payload = build_sync_payload(
+        db, since, changes[:SYNC_PAGE_SIZE], has_more, assistant_id
+    )
+    return model_response(SyncResponse, payload)
@@ -2,6 +2,7 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 from typing import List
 
+from app.api.responses import model_response
 from app.db.base import get_db
 from app.models.user import User
 from app.schemas.user import UserCreate, UserRead, UserUpdate
@@ -26,7 +27,7 @@ def read_users(
     current_user: User = Depends(get_current_user_with_role(["admin"])),
 ):
     users = get_users(db, skip=skip, limit=limit)
-    return users
+    return model_response(List[UserRead], users)
 
 
 # List users with the role "asistant" without the need of being an admin
@@ -39,7 +40,7 @@ def read_assistants(
     current_user: User = Depends(get_current_active_user),
 ):
     users = get_users_by_role(db, role="assistant", skip=skip, limit=limit)
-    return users
+    return model_response(List[UserRead], users)
 
 
 @router.post("/", response_model=UserRead)
@@ -48,12 +49,12 @@ def create_new_user(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user_with_role(["admin"])),
 ):
-    return create_user(db=db, user=user)
+    return model_response(UserRead, create_user(db=db, user=user))
 
 
 @router.get("/me", response_model=UserRead)
 def read_user_me(current_user: User = Depends(get_current_active_user)):
-    return current_user
+    return model_response(UserRead, current_user)
 
 
 @router.get("/{user_id}", response_model=UserRead)
@@ -71,7 +72,7 @@ def read_user(
     db_user = get_user(db, user_id=user_id)
     if db_user is None:
         raise HTTPException(status_code=404, detail="User not found")
-    return db_user
+    return model_response(UserRead, db_user)
 
 
 @router.put("/{user_id}", response_model=UserRead)
@@ -97,7 +98,7 @@ def update_user_info(
             detail="Only administrators can change roles",
         )
 
-    return update_user(db, user_id=user_id, user=user_data)
+    return model_response(UserRead, update_user(db, user_id=user_id, user=user_data))
 
 
 @router.delete("/{user_id}", response_model=UserRead)
@@ -106,4 +107,4 @@ def delete_user_info(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user_with_role(["admin"])),
 ):
-    return delete_user(db, user_id=user_id)
+    return model_response(UserRead, delete_user(db, user_id=user_id))
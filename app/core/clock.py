@@ -0,0 +1,59 @@
+from datetime import datetime, timedelta
+from typing import Optional
+import threading
+
+
+class SystemClock:
+    """Reloj real: hora local sin zona horaria, igual que datetime.now()"""
+
+    def now(self) -> datetime:
+        return datetime.now()
+
+
+class VirtualClock:
+    """
+    Reloj controlado manualmente, para simular días de clínica en segundos.
+    Solo avanza cuando se llama a advance() o set().
+    """
+
+    def __init__(self, start: datetime):
+        self._now = start
+        self._lock = threading.Lock()
+
+    def now(self) -> datetime:
+        with self._lock:
+            return self._now
+
+    def advance(self, **kwargs) -> datetime:
+        with self._lock:
+            self._now += timedelta(**kwargs)
+            return self._now
+
+    def set(self, value: datetime):
+        with self._lock:
+            self._now = value
+
+
+_clock = SystemClock()
+
+
+def now() -> datetime:
+    """Hora actual según el reloj activo. Usar en lugar de datetime.now()"""
+    return _clock.now()
+
+
+def to_local_naive(value: Optional[datetime]) -> Optional[datetime]:
+    """Las horas se guardan locales y sin zona: convertir si llega con zona"""
+    if value is None or value.tzinfo is None:
+        return value
+    return value.astimezone().replace(tzinfo=None)
+
+
+def get_clock():
+    return _clock
+
+
+def set_clock(clock=None):
+    """Instala un reloj (por ejemplo VirtualClock); sin argumento vuelve al real"""
+    global _clock
+    _clock = clock or SystemClock()
@@ -11,6 +11,33 @@ class Settings(BaseSettings):
     SECRET_KEY: str = os.getenv("SECRET_KEY")
 
     DATABASE_URL: str = "sqlite:///./app.db"
+    DEBUG: bool = False
+    # Segundos que una conexión puede estar fuera del pool antes de considerarse fugada
+    POOL_LEAK_THRESHOLD_SECONDS: int = 60
+    # Consultas SQL por petición a partir de las cuales se registra un aviso
+    QUERY_BUDGET_DEFAULT: int = 20
+    # Pacientes serializados que se mantienen en memoria (0 desactiva la caché)
+    PATIENT_CACHE_MAX_ENTRIES: int = 1024
+    # Horas durante las que se guarda la respuesta de una Idempotency-Key
+    IDEMPOTENCY_TTL_HOURS: int = 24
+    # Segundos tras los que una petición con Idempotency-Key que no terminó
+    # (p. ej. porque el proceso murió) deja de bloquear sus reintentos
+    IDEMPOTENCY_LEASE_SECONDS: int = 60
+    # Horas tras la hora programada a partir de las cuales una dosis pendiente
+    # se marca como omitida, y cada cuántos minutos se revisa
+    OVERDUE_GRACE_HOURS: float = 12
+    OVERDUE_SWEEP_MINUTES: int = 15
+    # Días tras los que las dosis de tratamientos terminados pasan a dose_history
+    DOSE_ARCHIVE_AFTER_DAYS: int = 90
+    DOSE_ARCHIVE_BATCH_SIZE: int = 500
+    # Minutos de retraso sobre la hora programada que aún cuentan como a tiempo
+    DOSE_ON_TIME_MINUTES: int = 60
+    # Días que se resumen por transacción al rellenar dose_daily_stats
+    DAILY_STATS_BATCH_DAYS: int = 31
+    # Últimos días cerrados que se vuelven a resumir en cada actualización, por
+    # si sus dosis cambiaron después (administraciones registradas tarde,
+    # medicaciones borradas)
+    DAILY_STATS_RESUMMARIZE_DAYS: int = 7
 
     TWILIO_ACCOUNT_SID: str = os.getenv("TWILIO_ACCOUNT_SID")
     TWILIO_AUTH_TOKEN: str = os.getenv("TWILIO_AUTH_TOKEN")
@@ -0,0 +1,177 @@
+from collections import Counter, deque
+from contextlib import contextmanager
+import os
+import sys
+import threading
+import time
+import uuid
+
+from app.core import clock
+from app.db.query_counter import QueryCounter
+
+# Intervalo entre muestras del perfilador
+SAMPLE_INTERVAL_SECONDS = 0.001
+# Perfiles guardados en memoria (los más recientes)
+MAX_STORED_PROFILES = 20
+# Líneas de pila colapsada y funciones que se incluyen en cada perfil
+MAX_FLAME_LINES = 200
+MAX_TOP_FUNCTIONS = 30
+
+_PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
+
+# Funciones donde un hilo está simplemente esperando: no cuentan como trabajo
+_IDLE_FUNCTIONS = {
+    ("threading.py", "wait"),
+    ("threading.py", "_wait_for_tstate_lock"),
+    ("queue.py", "get"),
+    ("selectors.py", "select"),
+}
+
+_profiles = deque(maxlen=MAX_STORED_PROFILES)
+_profiler_lock = threading.Lock()
+
+
+class ProfilerBusy(Exception):
+    """Ya hay un perfilado en curso; solo se permite uno a la vez"""
+
+
+def _frame_label(code) -> str:
+    filename = code.co_filename
+    if filename.startswith(_PROJECT_ROOT):
+        filename = os.path.relpath(filename, _PROJECT_ROOT)
+    elif "site-packages" in filename:
+        filename = filename.split("site-packages" + os.sep, 1)[1]
+    else:
+        filename = os.path.basename(filename)
+    return f"{code.co_name} ({filename}:{code.co_firstlineno})"
+
+
+def _is_idle(code) -> bool:
+    return (os.path.basename(code.co_filename), code.co_name) in _IDLE_FUNCTIONS
+
+
+class SamplingProfiler:
+    """
+    Perfilador por muestreo: un hilo aparte toma cada pocos milisegundos la
+    pila de todos los hilos ocupados y acumula pilas colapsadas
+    ("a;b;c" -> muestras), el formato que usan flamegraph.pl y speedscope.
+
+    Muestrea todos los hilos porque los endpoints síncronos corren en el
+    pool de hilos de FastAPI; peticiones concurrentes también aparecerán.
+    """
+
+    def __init__(self, interval: float = SAMPLE_INTERVAL_SECONDS):
+        self.interval = interval
+        self.stacks = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def __enter__(self):
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._stop.set()
+        self._thread.join()
+        return False
+
+    def _run(self):
+        own_id = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id or _is_idle(frame.f_code):
+                    continue
+                labels = []
+                while frame is not None:
+                    labels.append(_frame_label(frame.f_code))
+                    frame = frame.f_back
+                self.stacks[";".join(reversed(labels))] += 1
+                self.samples += 1
+
+    def top_functions(self, limit: int = MAX_TOP_FUNCTIONS) -> list:
+        self_samples = Counter()
+        total_samples = Counter()
+        for stack, count in self.stacks.items():
+            labels = stack.split(";")
+            self_samples[labels[-1]] += count
+            for label in set(labels):
+                total_samples[label] += count
+        return [
+            {
+                "function": label,
+                "self_samples": self_samples[label],
+                "total_samples": total,
+            }
+            for label, total in total_samples.most_common(limit)
+        ]
+
+    def flame(self, limit: int = MAX_FLAME_LINES) -> list:
+        return [f"{stack} {count}" for stack, count in self.stacks.most_common(limit)]
+
+
+@contextmanager
+def profiling(label: str):
+    """
+    Perfila el bloque: muestreo de pilas más las sentencias SQL ejecutadas
+    con su duración. Al salir guarda el perfil y lo deja en el dict devuelto.
+    """
+    if not _profiler_lock.acquire(blocking=False):
+        raise ProfilerBusy()
+
+    profile = {
+        "id": uuid.uuid4().hex[:12],
+        "label": label,
+        "started_at": clock.now().strftime("%Y-%m-%d %H:%M:%S"),
+    }
+    try:
+        start = time.perf_counter()
+        with QueryCounter(capture_statements=True) as queries:
+            with SamplingProfiler() as profiler:
+                yield profile
+        profile.update(
+            {
+                "duration_ms": round((time.perf_counter() - start) * 1000, 3),
+                "interval_ms": profiler.interval * 1000,
+                "samples": profiler.samples,
+                "top_functions": profiler.top_functions(),
+                "flame": profiler.flame(),
+                "sql": {
+                    "count": queries.count,
+                    "total_ms": round(queries.total_seconds * 1000, 3),
+                    "statements": queries.statements,
+                },
+            }
+        )
+        _profiles.append(profile)
+    finally:
+        _profiler_lock.release()
+
+
+def profile_call(label: str, fn, *args, **kwargs):
+    """Ejecuta fn perfilada; devuelve (resultado, perfil)"""
+    with profiling(label) as profile:
+        result = fn(*args, **kwargs)
+    return result, profile
+
+
+def get_profiles() -> list:
+    """Resumen de los perfiles guardados, del más reciente al más antiguo"""
+    return [
+        {
+            "id": p["id"],
+            "label": p["label"],
+            "started_at": p["started_at"],
+            "duration_ms": p["duration_ms"],
+            "sql_count": p["sql"]["count"],
+        }
+        for p in reversed(_profiles)
+    ]
+
+
+def get_profile(profile_id: str):
+    for profile in _profiles:
+        if profile["id"] == profile_id:
+            return profile
+    return None
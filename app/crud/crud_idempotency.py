@@ -0,0 +1,122 @@
+from datetime import timedelta
+from typing import List, Optional
+
+from sqlalchemy import or_
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.core import clock
+from app.core.config import settings
+from app.models.idempotency import IdempotencyKey
+
+
+def get_idempotency_record(
+    db: Session, principal: str, key: str
+) -> Optional[IdempotencyKey]:
+    """Registro vigente para la clave; los vencidos se tratan como inexistentes"""
+    record = (
+        db.query(IdempotencyKey)
+        .filter(IdempotencyKey.principal == principal, IdempotencyKey.key == key)
+        .first()
+    )
+    if record is not None and record.expires_at <= clock.now():
+        db.delete(record)
+        db.commit()
+        return None
+    return record
+
+
+def start_idempotent_request(
+    db: Session, principal: str, key: str, fingerprint: str
+) -> bool:
+    """
+    Reserva la clave antes de ejecutar la petición. Devuelve False si otra
+    petición con la misma clave la reservó primero.
+    """
+    now = clock.now()
+    db.add(
+        IdempotencyKey(
+            principal=principal,
+            key=key,
+            fingerprint=fingerprint,
+            expires_at=now + timedelta(hours=settings.IDEMPOTENCY_TTL_HOURS),
+            lease_expires_at=now
+            + timedelta(seconds=settings.IDEMPOTENCY_LEASE_SECONDS),
+        )
+    )
+    try:
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        return False
+    return True
+
+
+def take_over_idempotent_request(db: Session, principal: str, key: str) -> bool:
+    """
+    Reserva de nuevo una clave cuya petición sigue sin respuesta después de
+    IDEMPOTENCY_LEASE_SECONDS, para que un reintento no reciba 409 hasta que
+    venza. Devuelve False si no había vencido o si otro reintento se adelantó.
+    """
+    now = clock.now()
+    taken = (
+        db.query(IdempotencyKey)
+        .filter(
+            IdempotencyKey.principal == principal,
+            IdempotencyKey.key == key,
+            IdempotencyKey.status_code.is_(None),
+            or_(
+                IdempotencyKey.lease_expires_at.is_(None),
+                IdempotencyKey.lease_expires_at <= now,
+            ),
+        )
+        .update(
+            {
+                "lease_expires_at": now
+                + timedelta(seconds=settings.IDEMPOTENCY_LEASE_SECONDS)
+            },
+            synchronize_session=False,
+        )
+    )
+    db.commit()
+    return bool(taken)
+
+
+def complete_idempotent_request(
+    db: Session,
+    principal: str,
+    key: str,
+    status_code: int,
+    content_type: Optional[str],
+    headers: List[List[str]],
+    body: bytes,
+):
+    db.query(IdempotencyKey).filter(
+        IdempotencyKey.principal == principal, IdempotencyKey.key == key
+    ).update(
+        {
+            "status_code": status_code,
+            "content_type": content_type,
+            "headers": headers,
+            "body": body,
+        }
+    )
+    db.commit()
+
+
+def release_idempotency_key(db: Session, principal: str, key: str):
+    """Libera la clave tras un error del servidor para que el reintento se ejecute"""
+    db.query(IdempotencyKey).filter(
+        IdempotencyKey.principal == principal, IdempotencyKey.key == key
+    ).delete()
+    db.commit()
+
+
+def purge_expired_idempotency_keys(db: Session) -> int:
+    deleted = (
+        db.query(IdempotencyKey)
+        .filter(IdempotencyKey.expires_at <= clock.now())
+        .delete()
+    )
+    db.commit()
+    return deleted
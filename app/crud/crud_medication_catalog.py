@@ -0,0 +1,93 @@
+from typing import Iterable, List, Tuple
+
+from sqlalchemy import func, literal, select
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.orm import Session
+
+from app.models.medication_catalog import MedicationCatalogEntry
+from app.models.patient import Medication
+
+
+def clean_catalog_pair(name, dosage) -> Tuple[str, str]:
+    return (name or "").strip(), (dosage or "").strip()
+
+
+def get_catalog_entries(db: Session) -> List[MedicationCatalogEntry]:
+    return db.query(MedicationCatalogEntry).all()
+
+
+def sync_catalog_from_history(db: Session):
+    """
+    Añade al catálogo los pares nombre/dosificación de las medicaciones ya
+    creadas, con cuántas veces se usó cada uno. Idempotente.
+    """
+    name = func.trim(Medication.name)
+    dosage = func.coalesce(func.trim(Medication.dosage), "")
+    history = (
+        select(name, dosage, func.count(), literal("history"))
+        .where(name != "")
+        .group_by(name, dosage)
+    )
+    statement = insert(MedicationCatalogEntry).from_select(
+        ["name", "dosage", "usage_count", "source"], history
+    )
+    db.execute(
+        statement.on_conflict_do_update(
+            index_elements=["name", "dosage"],
+            set_={
+                "usage_count": func.max(
+                    MedicationCatalogEntry.usage_count, statement.excluded.usage_count
+                )
+            },
+        )
+    )
+    db.commit()
+
+
+def record_catalog_usage(db: Session, pairs: Iterable[Tuple[str, str]]):
+    """
+    Suma un uso a cada par (nombre, dosificación), creándolo si es nuevo.
+    No hace commit; va en la transacción de la medicación.
+    """
+    values = [
+        {"name": name, "dosage": dosage, "usage_count": 1, "source": "history"}
+        for name, dosage in (clean_catalog_pair(*pair) for pair in pairs)
+        if name
+    ]
+    if not values:
+        return
+    statement = insert(MedicationCatalogEntry)
+    db.execute(
+        statement.on_conflict_do_update(
+            index_elements=["name", "dosage"],
+            set_={"usage_count": MedicationCatalogEntry.usage_count + 1},
+        ),
+        values,
+    )
+
+
+def import_catalog_entries(db: Session, pairs: Iterable[Tuple[str, str]]) -> list:
+    """Importa pares (nombre, dosificación); devuelve los que no existían"""
+    pairs = list(
+        dict.fromkeys(
+            pair for pair in (clean_catalog_pair(*pair) for pair in pairs) if pair[0]
+        )
+    )
+    if not pairs:
+        return []
+    existing = set(
+        db.query(MedicationCatalogEntry.name, MedicationCatalogEntry.dosage)
+        .filter(MedicationCatalogEntry.name.in_({name for name, _ in pairs}))
+        .all()
+    )
+    added = [pair for pair in pairs if pair not in existing]
+    if added:
+        db.execute(
+            insert(MedicationCatalogEntry).on_conflict_do_nothing(),
+            [
+                {"name": name, "dosage": dosage, "usage_count": 0, "source": "import"}
+                for name, dosage in added
+            ],
+        )
+    db.commit()
+    return added
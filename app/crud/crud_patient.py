@@ -1,9 +1,11 @@
-from sqlalchemy.orm import Session
+from sqlalchemy import bindparam, case, func, insert, select, union_all, update
+from sqlalchemy.orm import Session, joinedload, selectinload
+from collections import defaultdict
 from datetime import datetime, timedelta
 from typing import Optional
 from fastapi import HTTPException
 
-from app.models.patient import Patient, Medication, Note, Dose
+from app.models.patient import Patient, Medication, Note, Dose, DoseHistory
 from app.models.user import User
 from app.schemas.patient import (
     PatientCreate,
@@ -11,21 +13,60 @@ from app.schemas.patient import (
     MedicationCreate,
     MedicationUpdate,
     NoteCreate,
+    PROTOCOL_MAX_DOSES,
 )
 from app.crud.crud_user import get_user
+from app.core import clock
+from app.crud.crud_sync import (
+    MEDICATION,
+    NOTE,
+    PATIENT,
+    record_change,
+    record_changes,
+    record_medication_changes,
+    record_patient_reassignment,
+)
+from app.services.events import (
+    DOSE_ADMINISTERED,
+    MEDICATION_CANCELLED,
+    NOTE_ADDED,
+    event_broker,
+)
+from app.crud.crud_medication_catalog import record_catalog_usage
+from app.services.archiver import ARCHIVED_COLUMNS
+from app.services.medication_catalog import medication_catalog
+from app.services.patient_cache import patient_cache
+from app.services.schedule import compute_dose_times
 import logging
 
 Logger = logging.getLogger(__name__)
 
 
+# Carga en lote de todo lo que serializa PatientRead, evitando N+1 por
+# medicación, dosis y nota
+PATIENT_READ_OPTIONS = (
+    selectinload(Patient.medications).selectinload(Medication.doses),
+    selectinload(Patient.notes),
+)
+
+
 def get_patient(db: Session, patient_id: int):
-    return db.query(Patient).filter(Patient.id == patient_id).first()
+    return db.get(Patient, patient_id)
+
+
+def get_patient_detail(db: Session, patient_id: int, options=PATIENT_READ_OPTIONS):
+    """Paciente con medicaciones, dosis y notas cargadas para PatientRead"""
+    return db.query(Patient).options(*options).filter(Patient.id == patient_id).first()
 
 
 def get_patients(
-    db: Session, skip: int = 0, limit: int = 100, species: Optional[str] = None
+    db: Session,
+    skip: int = 0,
+    limit: int = 100,
+    species: Optional[str] = None,
+    options=PATIENT_READ_OPTIONS,
 ):
-    query = db.query(Patient)
+    query = db.query(Patient).options(*options)
     if species:
         query = query.filter(Patient.species == species)
     return query.order_by(Patient.created_at.desc()).offset(skip).limit(limit).all()
@@ -43,12 +84,146 @@ def get_patients_by_user(db: Session, user_id: int, skip: int = 0, limit: int =
 
 
 def get_patients_by_assistant(
-    db: Session, assistant_id: int, skip: int = 0, limit: int = 100
+    db: Session,
+    assistant_id: int,
+    skip: int = 0,
+    limit: int = 100,
+    species: Optional[str] = None,
+    options=PATIENT_READ_OPTIONS,
+):
+    query = (
+        db.query(Patient).options(*options).filter(Patient.assistant_id == assistant_id)
+    )
+    if species:
+        query = query.filter(Patient.species == species)
+    return query.order_by(Patient.created_at.desc()).offset(skip).limit(limit).all()
+
+
+def get_patient_summaries(
+    db: Session,
+    skip: int = 0,
+    limit: int = 100,
+    species: Optional[str] = None,
+    assistant_id: Optional[int] = None,
+):
+    """
+    Resumen de pacientes calculado en SQL, sin cargar medicaciones, dosis ni
+    notas: medicaciones activas, dosis pendientes, próxima dosis y última nota.
+    """
+    active_medications = (
+        select(func.count(Medication.id))
+        .where(Medication.patient_id == Patient.id, Medication.status == "active")
+        .scalar_subquery()
+    )
+    pending_count = (
+        select(func.count(Dose.id))
+        .join(Medication, Dose.medication_id == Medication.id)
+        .where(
+            Medication.patient_id == Patient.id,
+            Medication.status == "active",
+            Dose.status == "pending",
+        )
+        .scalar_subquery()
+    )
+    next_dose_time = (
+        select(func.min(Dose.scheduled_time))
+        .join(Medication, Dose.medication_id == Medication.id)
+        .where(
+            Medication.patient_id == Patient.id,
+            Medication.status == "active",
+            Dose.status == "pending",
+        )
+        .scalar_subquery()
+    )
+    latest_note = (
+        select(Note)
+        .where(Note.patient_id == Patient.id)
+        .order_by(Note.id.desc())
+        .limit(1)
+    )
+
+    query = db.query(
+        Patient.id,
+        Patient.name,
+        Patient.species,
+        Patient.assistant_id,
+        Patient.assistant_name,
+        Patient.created_by,
+        Patient.created_at,
+        Patient.updated_at,
+        active_medications.label("active_medications"),
+        pending_count.label("pending_doses"),
+        next_dose_time.label("next_dose_time"),
+        latest_note.with_only_columns(Note.content)
+        .scalar_subquery()
+        .label("latest_note"),
+        latest_note.with_only_columns(Note.created_at)
+        .scalar_subquery()
+        .label("latest_note_at"),
+    )
+    if assistant_id is not None:
+        query = query.filter(Patient.assistant_id == assistant_id)
+    if species:
+        query = query.filter(Patient.species == species)
+    return query.order_by(Patient.created_at.desc()).offset(skip).limit(limit).all()
+
+
+def get_medication(db: Session, medication_id: int):
+    return db.get(Medication, medication_id)
+
+
+def get_patient_medications(
+    db: Session,
+    patient_id: int,
+    skip: int = 0,
+    limit: int = 100,
+    status: Optional[str] = None,
 ):
+    """Medicaciones de un paciente sin sus dosis"""
+    query = db.query(Medication).filter(Medication.patient_id == patient_id)
+    if status:
+        query = query.filter(Medication.status == status)
+    return query.order_by(Medication.id.desc()).offset(skip).limit(limit).all()
+
+
+def get_medication_doses(
+    db: Session,
+    medication_id: int,
+    skip: int = 0,
+    limit: int = 100,
+    status: Optional[str] = None,
+    include_history: bool = False,
+):
+    """Con include_history se incluyen las dosis ya movidas a dose_history"""
+    if include_history:
+        selects = []
+        for model in (Dose, DoseHistory):
+            query = select(*[getattr(model, name) for name in ARCHIVED_COLUMNS]).where(
+                model.medication_id == medication_id
+            )
+            if status:
+                query = query.where(model.status == status)
+            selects.append(query)
+        doses = union_all(*selects).subquery()
+        return db.execute(
+            select(doses)
+            .order_by(doses.c.scheduled_time.asc())
+            .offset(skip)
+            .limit(limit)
+        ).all()
+
+    query = db.query(Dose).filter(Dose.medication_id == medication_id)
+    if status:
+        query = query.filter(Dose.status == status)
+    return query.order_by(Dose.scheduled_time.asc()).offset(skip).limit(limit).all()
+
+
+def get_patient_notes(db: Session, patient_id: int, skip: int = 0, limit: int = 100):
+    """Notas de un paciente, de la más reciente a la más antigua"""
     return (
-        db.query(Patient)
-        .filter(Patient.assistant_id == assistant_id)
-        .order_by(Patient.created_at.desc())
+        db.query(Note)
+        .filter(Note.patient_id == patient_id)
+        .order_by(Note.id.desc())
         .offset(skip)
         .limit(limit)
         .all()
@@ -71,13 +246,16 @@ def create_patient(db: Session, patient: PatientCreate, user_id: int):
         assistant_name=patient.assistant_name,
     )
     db.add(db_patient)
+    db.flush()
+    record_change(db, PATIENT, db_patient.id, db_patient.id, db_patient.assistant_id)
     db.commit()
     db.refresh(db_patient)
 
     # Add medications if provided
+    created = []
     if patient.medications:
         for med in patient.medications:
-            next_dose_time = datetime.now() + timedelta(hours=float(med.frequency))
+            next_dose_time = clock.now() + timedelta(hours=float(med.frequency))
             db_medication = Medication(
                 patient_id=db_patient.id,
                 name=med.name,
@@ -87,6 +265,7 @@ def create_patient(db: Session, patient: PatientCreate, user_id: int):
                 created_by=user_id,
             )
             db.add(db_medication)
+            created.append((MEDICATION, db_medication))
 
     # Add notes if provided
     if patient.notes:
@@ -95,8 +274,14 @@ def create_patient(db: Session, patient: PatientCreate, user_id: int):
                 patient_id=db_patient.id, content=note.content, created_by=user_id
             )
             db.add(db_note)
+            created.append((NOTE, db_note))
 
+    if created:
+        db.flush()
+        for entity, obj in created:
+            record_change(db, entity, obj.id, db_patient.id, patient.assistant_id)
     db.commit()
+    patient_cache.invalidate(db_patient.id)
     db.refresh(db_patient)
     return db_patient
 
@@ -118,11 +303,16 @@ def update_patient(db: Session, patient_id: int, patient: PatientUpdate):
                 status_code=400, detail="Selected user is not an assistant"
             )
 
+    old_assistant_id = db_patient.assistant_id
     for key, value in update_data.items():
         setattr(db_patient, key, value)
 
+    if db_patient.assistant_id != old_assistant_id:
+        record_patient_reassignment(db, db_patient, old_assistant_id)
+    record_change(db, PATIENT, patient_id, patient_id, db_patient.assistant_id)
     db.add(db_patient)
     db.commit()
+    patient_cache.invalidate(patient_id)
     db.refresh(db_patient)
     return db_patient
 
@@ -132,12 +322,94 @@ def delete_patient(db: Session, patient_id: int):
     if not db_patient:
         raise HTTPException(status_code=404, detail="Patient not found")
 
+    record_change(
+        db, PATIENT, patient_id, patient_id, db_patient.assistant_id, deleted=True
+    )
     db.delete(db_patient)
     db.commit()
+    patient_cache.invalidate(patient_id)
     return db_patient
 
 
 # Medication operations
+def _dose_schedule(start_time: datetime, frequency: float, duration_days: float):
+    """Horas programadas de un tratamiento: una dosis cada `frequency` horas"""
+    total_doses = max(int((duration_days * 24) / frequency), 1)  # Al menos una dosis
+    return [start_time + timedelta(hours=frequency * i) for i in range(total_doses)]
+
+
+def reschedule_medication_doses(
+    db: Session, db_medication: Medication, frequency: float, duration_days: float
+) -> dict:
+    """
+    Ajusta las dosis pendientes al nuevo calendario sin recrearlas. Solo se
+    toca el tramo futuro: las dosis administradas, omitidas o ya vencidas se
+    conservan; las pendientes que no están en el nuevo calendario se borran y
+    las horas nuevas sin dosis se insertan, cada cosa en una sola sentencia.
+    Si no queda ninguna pendiente la medicación se da por completada. No hace
+    commit; corre dentro de la transacción de quien la llama.
+    """
+    now = clock.now()
+    existing = (
+        db.query(Dose.id, Dose.scheduled_time, Dose.status)
+        .filter(Dose.medication_id == db_medication.id)
+        .all()
+    )
+    start_time = db_medication.start_time or min(
+        (scheduled for _, scheduled, _ in existing), default=now
+    )
+    schedule = {
+        dose_time
+        for dose_time in _dose_schedule(start_time, frequency, duration_days)
+        if dose_time >= now
+    }
+    stale = [
+        dose_id
+        for dose_id, scheduled, status in existing
+        if status == "pending" and scheduled >= now and scheduled not in schedule
+    ]
+    missing = sorted(schedule - {scheduled for _, scheduled, _ in existing})
+
+    if stale:
+        db.query(Dose).filter(Dose.id.in_(stale)).delete(synchronize_session=False)
+    if missing:
+        db.execute(
+            insert(Dose.__table__),
+            [
+                {
+                    "medication_id": db_medication.id,
+                    "scheduled_time": dose_time,
+                    "status": "pending",
+                    "notification_sent": False,
+                }
+                for dose_time in missing
+            ],
+        )
+    if stale or missing:
+        db.expire(db_medication, ["doses"])
+
+    next_dose_time = (
+        db.query(func.min(Dose.scheduled_time))
+        .filter(Dose.medication_id == db_medication.id, Dose.status == "pending")
+        .scalar()
+    )
+    if next_dose_time is not None:
+        db_medication.next_dose_time = next_dose_time
+        db_medication.notification_sent = False
+    else:
+        # El nuevo calendario ya no deja dosis pendientes: el tratamiento
+        # terminó, como al administrar la última o en el barrido de atrasadas
+        db_medication.status = "completed"
+        db_medication.completed = True
+        db_medication.completed_at = now
+        db_medication.updated_at = now
+    return {
+        "removed": len(stale),
+        "added": len(missing),
+        "completed": next_dose_time is None,
+    }
+
+
 def add_medication(db: Session, patient_id: int, medication: MedicationCreate):
     try:
         db_patient = get_patient(db, patient_id)
@@ -169,9 +441,9 @@ def add_medication(db: Session, patient_id: int, medication: MedicationCreate):
                         start_time = datetime.strptime(start_time, "%Y-%m-%d %H:%M:%S")
                 except Exception as e:
                     print(f"Error parsing start_time: {e}. Using current time.")
-                    start_time = datetime.now()
+                    start_time = clock.now()
         else:
-            start_time = datetime.now()
+            start_time = clock.now()
 
         # La primera dosis es a la hora de inicio
         next_dose_time = start_time
@@ -206,15 +478,8 @@ def add_medication(db: Session, patient_id: int, medication: MedicationCreate):
 
         # Si tenemos duración y frecuencia, crear dosis programadas
         try:
-            # Calcular el número total de dosis
-            total_doses = int((duration_days * 24) / frequency)
-
-            if total_doses <= 0:
-                total_doses = 1  # Al menos una dosis
-
             # Crear cada dosis individual
-            for i in range(total_doses):
-                dose_time = start_time + timedelta(hours=frequency * i)
+            for dose_time in _dose_schedule(start_time, frequency, duration_days):
                 db_dose = Dose(
                     medication_id=db_medication.id,
                     scheduled_time=dose_time,
@@ -228,7 +493,14 @@ def add_medication(db: Session, patient_id: int, medication: MedicationCreate):
             # Si falla la creación de dosis, al menos mantener la medicación
             pass
 
+        record_change(
+            db, MEDICATION, db_medication.id, patient_id, db_patient.assistant_id
+        )
+        catalog_pair = (medication.name, medication.dosage)
+        record_catalog_usage(db, [catalog_pair])
         db.commit()
+        patient_cache.invalidate(patient_id)
+        medication_catalog.add([catalog_pair])
         db.refresh(db_medication)
 
         # Asegurarnos de que estamos devolviendo el objeto y no None
@@ -242,6 +514,251 @@ def add_medication(db: Session, patient_id: int, medication: MedicationCreate):
         )
 
 
+# Filas por INSERT de varios VALUES: SQLite limita los parámetros por sentencia
+INSERT_CHUNK_ROWS = 500
+
+
+def _insert_returning_ids(db: Session, model, rows: list) -> list:
+    """Inserta rows por tandas y devuelve sus ids en el orden de rows"""
+    ids = []
+    for position in range(0, len(rows), INSERT_CHUNK_ROWS):
+        chunk = rows[position : position + INSERT_CHUNK_ROWS]
+        # SQLite asigna los ids en el orden de VALUES
+        ids.extend(
+            sorted(db.scalars(insert(model).values(chunk).returning(model.id)).all())
+        )
+    return ids
+
+
+def apply_protocol(
+    db: Session,
+    patient_ids: list,
+    medications: list,
+    start_time: Optional[datetime] = None,
+):
+    """
+    Crea las medicaciones del protocolo en cada paciente con todas sus dosis
+    en una sola transacción: las horas se calculan de una vez para todas las
+    medicaciones (compute_dose_times) y se insertan por lotes. Si falta algún
+    paciente o el protocolo supera PROTOCOL_MAX_DOSES dosis no se crea nada.
+    """
+    patient_ids = list(dict.fromkeys(patient_ids))
+    patients = {
+        row.id: row
+        for row in db.query(Patient.id, Patient.assistant_id, Patient.created_by)
+        .filter(Patient.id.in_(patient_ids))
+        .all()
+    }
+    missing = [patient_id for patient_id in patient_ids if patient_id not in patients]
+    if missing:
+        raise HTTPException(status_code=404, detail=f"Patients not found: {missing}")
+    if any(
+        medication.frequency <= 0 or medication.duration_days <= 0
+        for medication in medications
+    ):
+        raise HTTPException(
+            status_code=400,
+            detail="frequency and duration_days must be greater than zero",
+        )
+    total_doses = len(patient_ids) * sum(
+        max(int(medication.duration_days * 24 / medication.frequency), 1)
+        for medication in medications
+    )
+    if total_doses > PROTOCOL_MAX_DOSES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Protocol would create {total_doses} doses "
+            f"(maximum {PROTOCOL_MAX_DOSES})",
+        )
+
+    default_start = clock.to_local_naive(start_time) or clock.now()
+    rows = []
+    for patient_id in patient_ids:
+        for medication in medications:
+            start = clock.to_local_naive(medication.start_time) or default_start
+            rows.append(
+                {
+                    "patient_id": patient_id,
+                    "name": medication.name,
+                    "dosage": medication.dosage,
+                    "frequency": medication.frequency,
+                    "start_time": start,
+                    "next_dose_time": start,
+                    "duration_days": medication.duration_days,
+                    "status": "active",
+                    "completed": False,
+                    "notification_sent": False,
+                    "created_by": patients[patient_id].created_by,
+                }
+            )
+
+    medication_ids = _insert_returning_ids(db, Medication, rows)
+    medication_index, dose_times = compute_dose_times(
+        [row["start_time"] for row in rows],
+        [row["frequency"] for row in rows],
+        [row["duration_days"] for row in rows],
+    )
+    db.execute(
+        insert(Dose.__table__),
+        [
+            {
+                "medication_id": medication_ids[index],
+                "scheduled_time": dose_time,
+                "status": "pending",
+                "notification_sent": False,
+            }
+            for index, dose_time in zip(medication_index.tolist(), dose_times)
+        ],
+    )
+    record_changes(
+        db,
+        MEDICATION,
+        [
+            (medication_id, row["patient_id"], patients[row["patient_id"]].assistant_id)
+            for medication_id, row in zip(medication_ids, rows)
+        ],
+    )
+    catalog_pairs = [(row["name"], row["dosage"]) for row in rows]
+    record_catalog_usage(db, catalog_pairs)
+    db.commit()
+    patient_cache.invalidate(*patient_ids)
+    medication_catalog.add(catalog_pairs)
+
+    results = {
+        patient_id: {"patient_id": patient_id, "medication_ids": [], "doses_created": 0}
+        for patient_id in patient_ids
+    }
+    for medication_id, row in zip(medication_ids, rows):
+        results[row["patient_id"]]["medication_ids"].append(medication_id)
+    for index in medication_index.tolist():
+        results[rows[index]["patient_id"]]["doses_created"] += 1
+    return list(results.values())
+
+
+def create_patients_bulk(db: Session, patients: list, user_id: int) -> list:
+    """
+    Crea varios pacientes (PatientCreate) con sus medicaciones, dosis y notas
+    en una sola transacción de INSERTs por lotes; las horas de todas las
+    dosis se calculan de una vez (compute_dose_times). Asistentes y
+    frecuencias deben llegar ya validados. Devuelve, por paciente, su id y
+    cuántas medicaciones y dosis se crearon.
+    """
+    now = clock.now()
+    patient_ids = _insert_returning_ids(
+        db,
+        Patient,
+        [
+            {
+                "name": patient.name,
+                "species": patient.species,
+                "created_by": user_id,
+                "assistant_id": patient.assistant_id,
+                "assistant_name": patient.assistant_name,
+            }
+            for patient in patients
+        ],
+    )
+
+    medication_rows = []
+    # Posición en patients del paciente de cada medicación
+    medication_owners = []
+    note_rows = []
+    for position, (patient, patient_id) in enumerate(zip(patients, patient_ids)):
+        for medication in patient.medications or []:
+            start = clock.to_local_naive(medication.start_time) or now
+            medication_rows.append(
+                {
+                    "patient_id": patient_id,
+                    "name": medication.name,
+                    "dosage": medication.dosage,
+                    "frequency": medication.frequency,
+                    "start_time": start,
+                    "next_dose_time": start,
+                    "duration_days": medication.duration_days,
+                    "status": "active",
+                    "completed": False,
+                    "notification_sent": False,
+                    "created_by": user_id,
+                }
+            )
+            medication_owners.append(position)
+        for note in patient.notes or []:
+            note_rows.append(
+                {
+                    "patient_id": patient_id,
+                    "content": note.content,
+                    "created_by": user_id,
+                }
+            )
+
+    medication_ids = _insert_returning_ids(db, Medication, medication_rows)
+    doses_created = [0] * len(patients)
+    if medication_rows:
+        medication_index, dose_times = compute_dose_times(
+            [row["start_time"] for row in medication_rows],
+            [row["frequency"] for row in medication_rows],
+            [row["duration_days"] for row in medication_rows],
+        )
+        medication_index = medication_index.tolist()
+        db.execute(
+            insert(Dose.__table__),
+            [
+                {
+                    "medication_id": medication_ids[index],
+                    "scheduled_time": dose_time,
+                    "status": "pending",
+                    "notification_sent": False,
+                }
+                for index, dose_time in zip(medication_index, dose_times)
+            ],
+        )
+        for index in medication_index:
+            doses_created[medication_owners[index]] += 1
+    note_ids = _insert_returning_ids(db, Note, note_rows)
+
+    assistants = {
+        patient_id: patient.assistant_id
+        for patient, patient_id in zip(patients, patient_ids)
+    }
+    record_changes(
+        db,
+        PATIENT,
+        [
+            (patient_id, patient_id, assistants[patient_id])
+            for patient_id in patient_ids
+        ],
+    )
+    for entity, ids, rows in (
+        (MEDICATION, medication_ids, medication_rows),
+        (NOTE, note_ids, note_rows),
+    ):
+        record_changes(
+            db,
+            entity,
+            [
+                (entity_id, row["patient_id"], assistants[row["patient_id"]])
+                for entity_id, row in zip(ids, rows)
+            ],
+        )
+    catalog_pairs = [(row["name"], row["dosage"]) for row in medication_rows]
+    record_catalog_usage(db, catalog_pairs)
+    db.commit()
+    patient_cache.invalidate(*patient_ids)
+    medication_catalog.add(catalog_pairs)
+
+    medications_created = [0] * len(patients)
+    for position in medication_owners:
+        medications_created[position] += 1
+    return [
+        {
+            "patient_id": patient_id,
+            "medications_created": medications_created[position],
+            "doses_created": doses_created[position],
+        }
+        for position, patient_id in enumerate(patient_ids)
+    ]
+
+
 def update_medication(db: Session, medication_id: int, medication: MedicationUpdate):
     db_medication = db.query(Medication).filter(Medication.id == medication_id).first()
     if not db_medication:
@@ -249,16 +766,28 @@ def update_medication(db: Session, medication_id: int, medication: MedicationUpd
 
     update_data = medication.model_dump(exclude_unset=True)
 
-    # If frequency is updated, recalculate next_dose_time
-    if "frequency" in update_data:
-        next_dose_time = datetime.now() + timedelta(
-            hours=float(update_data["frequency"])
+    if any(
+        update_data.get(field) is not None and update_data[field] <= 0
+        for field in ("frequency", "duration_days")
+    ):
+        raise HTTPException(
+            status_code=400,
+            detail="frequency and duration_days must be greater than zero",
         )
-        update_data["next_dose_time"] = next_dose_time
+
+    # Si cambia la frecuencia o la duración, reprogramar las dosis pendientes.
+    # Las medicaciones sin duración u hora de inicio (las creadas junto con el
+    # paciente) no tienen calendario que rehacer: solo se guardan los valores
+    frequency = update_data.get("frequency", db_medication.frequency)
+    duration_days = update_data.get("duration_days", db_medication.duration_days)
+    reschedule = bool(frequency and duration_days and db_medication.start_time) and (
+        frequency != db_medication.frequency
+        or duration_days != db_medication.duration_days
+    )
 
     # If medication is marked as completed
     if "completed" in update_data and update_data["completed"]:
-        update_data["completed_at"] = datetime.now()
+        update_data["completed_at"] = clock.now()
         update_data["status"] = "completed"
 
     # Si se está actualizando el estado
@@ -271,25 +800,51 @@ def update_medication(db: Session, medication_id: int, medication: MedicationUpd
 
     for key, value in update_data.items():
         setattr(db_medication, key, value)
+    if reschedule and db_medication.status == "active":
+        changes = reschedule_medication_doses(
+            db, db_medication, float(frequency), duration_days
+        )
+        Logger.info(
+            f"📅 Medicación {medication_id} reprogramada: "
+            f"{changes['removed']} dosis eliminadas, {changes['added']} añadidas"
+            + (", tratamiento completado" if changes["completed"] else "")
+        )
+    patient_id = db_medication.patient_id
+    cancelled = update_data.get("status") == "cancelled"
+    if cancelled:
+        assistant_id = db_medication.patient.assistant_id
+    record_change(db, MEDICATION, medication_id, patient_id)
+    # Un nombre o dosificación corregidos también cuentan para el catálogo
+    catalog_pairs = []
+    if {"name", "dosage"} & update_data.keys():
+        catalog_pairs = [(db_medication.name, db_medication.dosage)]
+        record_catalog_usage(db, catalog_pairs)
 
     db.add(db_medication)
     db.commit()
+    patient_cache.invalidate(patient_id)
+    medication_catalog.add(catalog_pairs)
+    if cancelled:
+        event_broker.publish(
+            MEDICATION_CANCELLED, patient_id, assistant_id, medication_id=medication_id
+        )
     db.refresh(db_medication)
     return db_medication
 
 
 def delete_medication(db: Session, medication_id: int):
     try:
-        # Primero, eliminar todas las dosis asociadas
-        db.query(Dose).filter(Dose.medication_id == medication_id).delete()
-
-        # Luego eliminar la medicación
-        result = db.query(Medication).filter(Medication.id == medication_id).delete()
-
-        if result == 0:
+        db_medication = get_medication(db, medication_id)
+        if db_medication is None:
             raise HTTPException(status_code=404, detail="Medication not found")
+        patient_id = db_medication.patient_id
+        record_change(db, MEDICATION, medication_id, patient_id, deleted=True)
+
+        # Las dosis, también las archivadas, se borran en cascada
+        db.query(Medication).filter(Medication.id == medication_id).delete()
 
         db.commit()
+        patient_cache.invalidate(patient_id)
         return {"message": "Medication and associated doses deleted"}
     except Exception as e:
         db.rollback()
@@ -304,7 +859,7 @@ def complete_medication(db: Session, medication_id: int, user_id: int):
         raise HTTPException(status_code=404, detail="Medication not found")
 
     db_medication.completed = True
-    db_medication.completed_at = datetime.now()
+    db_medication.completed_at = clock.now()
     db_medication.completed_by = user_id
     db_medication.notification_sent = False  # Resetear bandera de notificación
     db_medication.status = "completed"  # Actualizar estado para nuevo sistema
@@ -320,15 +875,17 @@ def complete_medication(db: Session, medication_id: int, user_id: int):
             )
 
     # Calculate next dose time
-    db_medication.next_dose_time = datetime.now() + timedelta(hours=frequency)
+    db_medication.next_dose_time = clock.now() + timedelta(hours=frequency)
 
     # Marcar todas las dosis pendientes como completadas o omitidas
     db.query(Dose).filter(
         Dose.medication_id == medication_id, Dose.status == "pending"
     ).update({"status": "administered"})
+    record_change(db, MEDICATION, medication_id, db_medication.patient_id)
 
     db.add(db_medication)
     db.commit()
+    patient_cache.invalidate(db_medication.patient_id)
     db.refresh(db_medication)
     return db_medication
 
@@ -339,13 +896,103 @@ def add_note(db: Session, patient_id: int, note: NoteCreate, user_id: int):
     if not db_patient:
         raise HTTPException(status_code=404, detail="Patient not found")
 
+    assistant_id = db_patient.assistant_id
     db_note = Note(patient_id=patient_id, content=note.content, created_by=user_id)
     db.add(db_note)
+    db.flush()
+    record_change(db, NOTE, db_note.id, patient_id, assistant_id)
     db.commit()
+    patient_cache.invalidate(patient_id)
     db.refresh(db_note)
+    event_broker.publish(
+        NOTE_ADDED,
+        patient_id,
+        assistant_id,
+        note_id=db_note.id,
+        content=db_note.content,
+        created_by=user_id,
+        created_at=db_note.created_at,
+    )
     return db_note
 
 
+def add_notes(db: Session, items: list, user_id: int, assistant_id=None):
+    """
+    Crea varias notas en una sola transacción. Con assistant_id solo se
+    aceptan notas de los pacientes de ese asistente. Devuelve un resultado
+    por elemento, en el mismo orden.
+    """
+    owners = dict(
+        db.query(Patient.id, Patient.assistant_id)
+        .filter(Patient.id.in_({item.patient_id for item in items}))
+        .all()
+    )
+
+    results, accepted = [], []
+    for item in items:
+        result = {"patient_id": item.patient_id}
+        if item.patient_id not in owners:
+            result.update(status="not_found", detail="Patient not found")
+        elif assistant_id is not None and owners[item.patient_id] != assistant_id:
+            result.update(
+                status="forbidden",
+                detail="Not authorized to add notes to this patient",
+            )
+        else:
+            result.update(status="created")
+            accepted.append(result)
+        results.append((item, result))
+
+    if accepted:
+        # Un solo INSERT con todas las filas. RETURNING no garantiza el orden,
+        # así que cada fila se asigna por (paciente, contenido): dos elementos
+        # con la misma clave son intercambiables
+        rows = db.execute(
+            insert(Note)
+            .values(
+                [
+                    {
+                        "patient_id": item.patient_id,
+                        "content": item.content,
+                        "created_by": user_id,
+                    }
+                    for item, result in results
+                    if result["status"] == "created"
+                ]
+            )
+            .returning(
+                Note.id,
+                Note.patient_id,
+                Note.content,
+                Note.created_by,
+                Note.created_at,
+            )
+        ).all()
+        by_key = defaultdict(list)
+        for row in rows:
+            by_key[(row.patient_id, row.content)].append(dict(row._mapping))
+        for item, result in results:
+            if result["status"] == "created":
+                result["note"] = by_key[(item.patient_id, item.content)].pop()
+
+        record_changes(
+            db, NOTE, [(row.id, row.patient_id, owners[row.patient_id]) for row in rows]
+        )
+        db.commit()
+        patient_cache.invalidate(*{row.patient_id for row in rows})
+        for row in rows:
+            event_broker.publish(
+                NOTE_ADDED,
+                row.patient_id,
+                owners[row.patient_id],
+                note_id=row.id,
+                content=row.content,
+                created_by=user_id,
+                created_at=row.created_at,
+            )
+    return [result for _, result in results]
+
+
 # Nuevas funciones para el sistema de dosis
 
 
@@ -357,12 +1004,19 @@ def administer_dose(
     db: Session, dose_id: int, user_id: int, notes: Optional[str] = None
 ):
     """Marcar una dosis específica como administrada"""
-    db_dose = get_dose(db, dose_id)
+    # Medicación y paciente en la misma consulta: se usan para la siguiente
+    # dosis, el registro de cambios y el evento
+    db_dose = (
+        db.query(Dose)
+        .options(joinedload(Dose.medication).joinedload(Medication.patient))
+        .filter(Dose.id == dose_id)
+        .first()
+    )
     if not db_dose:
         raise HTTPException(status_code=404, detail="Dose not found")
 
     db_dose.status = "administered"
-    db_dose.administration_time = datetime.now()
+    db_dose.administration_time = clock.now()
     db_dose.administered_by = user_id
     if notes:
         db_dose.notes = notes
@@ -370,6 +1024,10 @@ def administer_dose(
     # Obtener la medicación asociada
     medication = db_dose.medication
 
+    # Enviar el cambio de estado antes de buscar la siguiente dosis
+    # (autoflush está desactivado y si no la dosis actual seguiría "pendiente")
+    db.flush()
+
     # Encontrar la siguiente dosis pendiente
     next_dose = (
         db.query(Dose)
@@ -383,28 +1041,193 @@ def administer_dose(
         medication.next_dose_time = next_dose.scheduled_time
         medication.notification_sent = False  # Resetear notificación para próxima dosis
 
-    # Verificar si hay más dosis pendientes
-    pending_doses = (
-        db.query(Dose)
-        .filter(Dose.medication_id == medication.id, Dose.status == "pending")
-        .count()
-    )
-
     # Si no hay más dosis pendientes, marcar el tratamiento como completado
-    if pending_doses == 0:
+    else:
         medication.status = "completed"
         medication.completed = True
-        medication.completed_at = datetime.now()
+        medication.completed_at = clock.now()
         medication.completed_by = user_id
-        medication.updated_at = datetime.now()
+        medication.updated_at = clock.now()
+
+    # Capturar antes del commit, que expira los objetos
+    patient_id, assistant_id = medication.patient_id, medication.patient.assistant_id
+    event = dict(
+        dose_id=db_dose.id,
+        medication_id=medication.id,
+        medication_name=medication.name,
+        administration_time=db_dose.administration_time,
+        administered_by=user_id,
+        medication_completed=medication.status == "completed",
+    )
 
+    # Los cambios de dosis se sincronizan como cambios de su medicación
+    record_change(db, MEDICATION, medication.id, patient_id, assistant_id)
     db.add(db_dose)
     db.add(medication)
     db.commit()
+    patient_cache.invalidate(patient_id)
+    event_broker.publish(DOSE_ADMINISTERED, patient_id, assistant_id, **event)
     db.refresh(db_dose)
     return db_dose
 
 
+def administer_doses(db: Session, items: list, user_id: int):
+    """
+    Administra varias dosis en una sola transacción: una consulta para
+    validarlas, un UPDATE ... RETURNING por tanda para marcarlas y una sola
+    revisión de la siguiente dosis por medicación afectada. Devuelve un
+    resultado por elemento, en el mismo orden.
+    """
+    now = clock.now()
+    found = {
+        row.id: row
+        for row in db.query(
+            Dose.id,
+            Dose.status,
+            Dose.medication_id,
+            Medication.name.label("medication_name"),
+            Medication.patient_id,
+            Patient.assistant_id,
+        )
+        .join(Medication, Dose.medication_id == Medication.id)
+        .join(Patient, Medication.patient_id == Patient.id)
+        .filter(Dose.id.in_({item.dose_id for item in items}))
+        .all()
+    }
+
+    results, updates, seen = [], [], set()
+    for item in items:
+        row = found.get(item.dose_id)
+        result = {"dose_id": item.dose_id}
+        if row is None:
+            result.update(status="not_found", detail="Dose not found")
+        elif item.dose_id in seen:
+            result.update(status="duplicate", detail="Dose repeated in this batch")
+        elif row.status != "pending":
+            result.update(
+                status="not_pending",
+                medication_id=row.medication_id,
+                detail=f"Dose is {row.status}",
+            )
+        else:
+            seen.add(item.dose_id)
+            result.update(status="administered", medication_id=row.medication_id)
+            updates.append(
+                {
+                    "b_dose_id": item.dose_id,
+                    "b_administered_at": clock.to_local_naive(item.administered_at)
+                    or now,
+                    "b_notes": item.notes or None,
+                }
+            )
+        results.append(result)
+
+    # La condición sobre el estado evita pisar una dosis administrada por
+    # otra petición entre la validación y el UPDATE; RETURNING dice cuáles
+    # se marcaron de verdad
+    administered = set()
+    for position in range(0, len(updates), INSERT_CHUNK_ROWS):
+        chunk = updates[position : position + INSERT_CHUNK_ROWS]
+        administered.update(
+            db.scalars(
+                update(Dose.__table__)
+                .where(
+                    Dose.id.in_([u["b_dose_id"] for u in chunk]),
+                    Dose.status == "pending",
+                )
+                .values(
+                    status="administered",
+                    administration_time=case(
+                        {u["b_dose_id"]: u["b_administered_at"] for u in chunk},
+                        value=Dose.id,
+                    ),
+                    administered_by=user_id,
+                    notes=func.coalesce(
+                        case(
+                            {u["b_dose_id"]: u["b_notes"] for u in chunk},
+                            value=Dose.id,
+                        ),
+                        Dose.notes,
+                    ),
+                )
+                .returning(Dose.id)
+            ).all()
+        )
+    lost = {u["b_dose_id"] for u in updates} - administered
+    if lost:
+        for result in results:
+            if result["status"] == "administered" and result["dose_id"] in lost:
+                result.update(status="not_pending", detail="Dose is no longer pending")
+        updates = [u for u in updates if u["b_dose_id"] in administered]
+    if not updates:
+        db.rollback()
+        return results
+
+    # Medicación afectada -> fila de una de sus dosis (paciente y asistente)
+    affected = {
+        found[u["b_dose_id"]].medication_id: found[u["b_dose_id"]] for u in updates
+    }
+    medications = set(affected)
+    next_doses = dict(
+        db.query(Dose.medication_id, func.min(Dose.scheduled_time))
+        .filter(Dose.medication_id.in_(medications), Dose.status == "pending")
+        .group_by(Dose.medication_id)
+        .all()
+    )
+    if next_doses:
+        db.execute(
+            update(Medication.__table__)
+            .where(Medication.id == bindparam("b_medication_id"))
+            .values(next_dose_time=bindparam("b_next"), notification_sent=False),
+            [
+                {"b_medication_id": medication_id, "b_next": next_time}
+                for medication_id, next_time in next_doses.items()
+            ],
+        )
+    completed = medications - set(next_doses)
+    if completed:
+        # Sin más dosis pendientes el tratamiento queda completado
+        db.execute(
+            update(Medication.__table__)
+            .where(Medication.id.in_(completed))
+            .values(
+                status="completed",
+                completed=True,
+                completed_at=now,
+                completed_by=user_id,
+                updated_at=now,
+            )
+        )
+
+    record_changes(
+        db,
+        MEDICATION,
+        [(mid, row.patient_id, row.assistant_id) for mid, row in affected.items()],
+    )
+    db.commit()
+
+    # Los objetos ya cargados en la sesión no ven los UPDATE por lotes
+    db.expire_all()
+    patient_cache.invalidate(*{row.patient_id for row in affected.values()})
+    for u in updates:
+        row = found[u["b_dose_id"]]
+        event_broker.publish(
+            DOSE_ADMINISTERED,
+            row.patient_id,
+            row.assistant_id,
+            dose_id=row.id,
+            medication_id=row.medication_id,
+            medication_name=row.medication_name,
+            administration_time=u["b_administered_at"],
+            administered_by=user_id,
+            medication_completed=row.medication_id in completed,
+        )
+    for result in results:
+        if result["status"] == "administered":
+            result["medication_completed"] = result["medication_id"] in completed
+    return results
+
+
 def cancel_medication(db: Session, medication_id: int, user_id: int):
     """Cancelar un tratamiento completo"""
     db_medication = db.query(Medication).filter(Medication.id == medication_id).first()
@@ -412,15 +1235,26 @@ def cancel_medication(db: Session, medication_id: int, user_id: int):
         raise HTTPException(status_code=404, detail="Medication not found")
 
     db_medication.status = "cancelled"
-    db_medication.updated_at = datetime.now()
+    db_medication.updated_at = clock.now()
+    patient_id = db_medication.patient_id
+    assistant_id = db_medication.patient.assistant_id
 
     # Marcar todas las dosis pendientes como omitidas
     db.query(Dose).filter(
         Dose.medication_id == medication_id, Dose.status == "pending"
     ).update({"status": "missed"})
+    record_change(db, MEDICATION, medication_id, patient_id, assistant_id)
 
     db.add(db_medication)
     db.commit()
+    patient_cache.invalidate(patient_id)
+    event_broker.publish(
+        MEDICATION_CANCELLED,
+        patient_id,
+        assistant_id,
+        medication_id=medication_id,
+        cancelled_by=user_id,
+    )
     db.refresh(db_medication)
     return db_medication
 
@@ -480,6 +1314,45 @@ def get_pending_doses(
         )
 
 
+def get_dose_worklist(
+    db: Session,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    assistant_id: Optional[int] = None,
+    limit: int = 500,
+):
+    """
+    Dosis pendientes de tratamientos activos entre start y end, de todos los
+    pacientes o solo de los del asistente, en una sola consulta. Sin start
+    se incluyen también las atrasadas.
+    """
+    query = (
+        db.query(
+            Dose.id.label("dose_id"),
+            Dose.scheduled_time,
+            Dose.status,
+            Dose.notification_sent,
+            Medication.id.label("medication_id"),
+            Medication.name.label("medication_name"),
+            Medication.dosage,
+            Patient.id.label("patient_id"),
+            Patient.name.label("patient_name"),
+            Patient.species,
+            Patient.assistant_id,
+        )
+        .join(Medication, Dose.medication_id == Medication.id)
+        .join(Patient, Medication.patient_id == Patient.id)
+        .filter(Dose.status == "pending", Medication.status == "active")
+    )
+    if start is not None:
+        query = query.filter(Dose.scheduled_time >= start)
+    if end is not None:
+        query = query.filter(Dose.scheduled_time <= end)
+    if assistant_id is not None:
+        query = query.filter(Patient.assistant_id == assistant_id)
+    return query.order_by(Dose.scheduled_time.asc(), Dose.id.asc()).limit(limit).all()
+
+
 # Función para obtener medicamentos que necesitan notificación
 def get_medications_for_notification(db: Session):
     """
@@ -488,7 +1361,7 @@ def get_medications_for_notification(db: Session):
     2. Su próxima dosis debía administrarse hace más de 5 minutos
     3. No se ha enviado notificación aún
     """
-    now = datetime.now()
+    now = clock.now()
     five_minutes_ago = now - timedelta(minutes=5)
 
     pending_medications = (
@@ -509,8 +1382,10 @@ def mark_medication_as_notified(db: Session, medication_id: int):
     db_medication = db.query(Medication).filter(Medication.id == medication_id).first()
     if db_medication:
         db_medication.notification_sent = True
+        record_change(db, MEDICATION, medication_id, db_medication.patient_id)
         db.add(db_medication)
         db.commit()
+        patient_cache.invalidate(db_medication.patient_id)
         return True
     return False
 
@@ -525,9 +1400,7 @@ def get_doses_for_notification(db: Session):
     - No notificadas
     - Programadas al menos 5 minutos en el pasado
     """
-    from datetime import datetime, timedelta
-
-    current_time = datetime.now()
+    current_time = clock.now()
     notification_threshold = current_time - timedelta(minutes=5)
 
     return (
@@ -546,8 +1419,10 @@ def mark_dose_as_notified(db: Session, dose_id: int):
     db_dose = db.query(Dose).filter(Dose.id == dose_id).first()
     if db_dose:
         db_dose.notification_sent = True
+        record_medication_changes(db, [db_dose.medication])
         db.add(db_dose)
         db.commit()
+        patient_cache.invalidate(db_dose.medication.patient_id)
         return True
     return False
 
@@ -558,7 +1433,9 @@ def update_medication_next_dose(db: Session, medication_id: int, next_time: date
     if db_medication:
         db_medication.next_dose_time = next_time
         db_medication.notification_sent = False
+        record_change(db, MEDICATION, medication_id, db_medication.patient_id)
         db.add(db_medication)
         db.commit()
+        patient_cache.invalidate(db_medication.patient_id)
         return True
     return False
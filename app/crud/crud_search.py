@@ -0,0 +1,94 @@
+import re
+from typing import Optional
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+# Palabras de la búsqueda; el resto (comillas, operadores FTS5...) se ignora
+TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+PATIENT_SEARCH = """
+SELECT p.id, p.name, p.species, p.assistant_id
+FROM patients_fts
+JOIN patients p ON p.id = patients_fts.rowid
+WHERE patients_fts MATCH :query {visibility}
+ORDER BY patients_fts.rank
+LIMIT :limit
+"""
+
+MEDICATION_SEARCH = """
+SELECT m.id, m.name, m.status, m.patient_id, p.name AS patient_name
+FROM medications_fts
+JOIN medications m ON m.id = medications_fts.rowid
+JOIN patients p ON p.id = m.patient_id
+WHERE medications_fts MATCH :query {visibility}
+ORDER BY medications_fts.rank
+LIMIT :limit
+"""
+
+# Con años de notas un término común aparece en cientos de miles y ordenar
+# todas por relevancia tarda; se ordenan solo las NOTE_SEARCH_WINDOW más
+# recientes que coinciden, que es donde se busca casi siempre
+NOTE_SEARCH_WINDOW = 1000
+
+NOTE_SEARCH = """
+WITH recent AS (
+    SELECT notes_fts.rowid AS id
+    FROM notes_fts
+    JOIN notes n ON n.id = notes_fts.rowid
+    JOIN patients p ON p.id = n.patient_id
+    WHERE notes_fts MATCH :query {visibility}
+    ORDER BY notes_fts.rowid DESC
+    LIMIT :window
+)
+SELECT n.id, n.patient_id, p.name AS patient_name, n.created_at,
+       snippet(notes_fts, 0, '[', ']', '…', 12) AS snippet
+FROM notes_fts
+JOIN notes n ON n.id = notes_fts.rowid
+JOIN patients p ON p.id = n.patient_id
+WHERE notes_fts MATCH :query
+  AND notes_fts.rowid >= (SELECT min(id) FROM recent) {visibility}
+ORDER BY notes_fts.rank
+LIMIT :limit
+"""
+
+
+def build_match_query(q: str) -> Optional[str]:
+    """
+    Convierte el texto del usuario en una consulta FTS5: todas las palabras
+    deben aparecer y cada una vale como prefijo ("amox" encuentra
+    "amoxicilina"). Devuelve None si no queda ninguna palabra.
+    """
+    tokens = TOKEN_RE.findall(q)
+    if not tokens:
+        return None
+    return " ".join(f'"{token}"*' for token in tokens)
+
+
+def search(db: Session, q: str, assistant_id: Optional[int] = None, limit: int = 20):
+    """
+    Busca en nombres de pacientes, nombres de medicaciones y notas, con los
+    resultados de cada tipo ordenados por relevancia (bm25; en notas, entre
+    las NOTE_SEARCH_WINDOW coincidencias más recientes). Con
+    assistant_id solo se buscan sus pacientes, igual que en GET /patients/.
+    """
+    results = {"query": q, "patients": [], "medications": [], "notes": []}
+    match = build_match_query(q)
+    if match is None:
+        return results
+
+    visibility = "AND p.assistant_id = :assistant_id" if assistant_id else ""
+    params = {
+        "query": match,
+        "limit": limit,
+        "assistant_id": assistant_id,
+        "window": NOTE_SEARCH_WINDOW,
+    }
+    for key, sql in (
+        ("patients", PATIENT_SEARCH),
+        ("medications", MEDICATION_SEARCH),
+        ("notes", NOTE_SEARCH),
+    ):
+        rows = db.execute(text(sql.format(visibility=visibility)), params)
+        results[key] = [dict(row._mapping) for row in rows]
+    return results
@@ -0,0 +1,227 @@
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import case, distinct, func, or_, select
+from sqlalchemy.orm import Session
+
+from app.core import clock
+from app.models.daily_stats import DoseDailyStats
+from app.models.patient import Dose, Medication, Patient
+from app.models.user import User
+from app.services.daily_stats import (
+    COUNT_COLUMNS,
+    dose_counts,
+    doses_between,
+    summarized_through,
+    with_patient,
+)
+
+
+def with_rates(counts: dict) -> dict:
+    """Añade las tasas de adherencia, puntualidad y omisión a unos contadores"""
+    finished = counts["administered"] + counts["missed"]
+    timed = counts["on_time"] + counts["late"]
+    return {
+        **counts,
+        "adherence_rate": (
+            round(counts["administered"] / finished, 4) if finished else None
+        ),
+        "on_time_rate": round(counts["on_time"] / timed, 4) if timed else None,
+        "missed_rate": round(counts["missed"] / finished, 4) if finished else None,
+    }
+
+
+def _add_counts(target: dict, row) -> None:
+    for name in COUNT_COLUMNS:
+        target[name] += getattr(row, name) or 0
+
+
+def _empty_counts() -> dict:
+    return dict.fromkeys(COUNT_COLUMNS, 0)
+
+
+def _assistant_names(db: Session, assistant_ids) -> dict:
+    ids = [assistant_id for assistant_id in assistant_ids if assistant_id is not None]
+    if not ids:
+        return {}
+    return {
+        user_id: full_name or username
+        for user_id, full_name, username in db.query(
+            User.id, User.full_name, User.username
+        ).filter(User.id.in_(ids))
+    }
+
+
+def get_adherence(db: Session, start: date, end: date) -> dict:
+    """
+    Dosis programadas en los días [start, end] por asistente y por nombre de
+    medicación. Los días ya resumidos se leen de dose_daily_stats y solo los
+    posteriores (normalmente ayer y hoy) se agrupan desde doses, así que el
+    coste no crece con la longitud del rango.
+    """
+    through = summarized_through(db)
+    groups = defaultdict(_empty_counts)
+
+    if through is not None and start <= through:
+        sums = [
+            func.sum(getattr(DoseDailyStats, name)).label(name)
+            for name in COUNT_COLUMNS
+        ]
+        rows = db.execute(
+            select(DoseDailyStats.assistant_id, DoseDailyStats.medication_name, *sums)
+            .where(DoseDailyStats.day >= start, DoseDailyStats.day <= min(end, through))
+            .group_by(DoseDailyStats.assistant_id, DoseDailyStats.medication_name)
+        )
+        for row in rows:
+            _add_counts(groups[(row.assistant_id, row.medication_name)], row)
+
+    live_start = start if through is None else max(start, through + timedelta(days=1))
+    if live_start <= end:
+        doses = doses_between(
+            datetime.combine(live_start, datetime.min.time()),
+            datetime.combine(end + timedelta(days=1), datetime.min.time()),
+        )
+        medication_name = func.coalesce(Medication.name, "").label("medication_name")
+        rows = db.execute(
+            select(Patient.assistant_id, medication_name, *dose_counts(doses))
+            .select_from(with_patient(doses))
+            .group_by(Patient.assistant_id, medication_name)
+        )
+        for row in rows:
+            _add_counts(groups[(row.assistant_id, row.medication_name)], row)
+
+    totals = _empty_counts()
+    by_assistant = defaultdict(_empty_counts)
+    by_medication = defaultdict(_empty_counts)
+    for (assistant_id, medication_name), counts in groups.items():
+        for name, value in counts.items():
+            totals[name] += value
+            by_assistant[assistant_id][name] += value
+            by_medication[medication_name][name] += value
+
+    names = _assistant_names(db, by_assistant)
+    medications = [
+        with_rates(dict(counts, medication_name=medication_name))
+        for medication_name, counts in by_medication.items()
+    ]
+    medications.sort(
+        key=lambda item: (-(item["missed_rate"] or 0), item["medication_name"])
+    )
+    return {
+        "start": start,
+        "end": end,
+        "summarized_through": through,
+        "totals": with_rates(totals),
+        "assistants": [
+            with_rates(
+                dict(
+                    counts,
+                    assistant_id=assistant_id,
+                    assistant_name=names.get(assistant_id),
+                )
+            )
+            for assistant_id, counts in sorted(
+                by_assistant.items(), key=lambda item: (item[0] is None, item[0] or 0)
+            )
+        ],
+        "medications": medications,
+    }
+
+
+def get_overview(db: Session) -> dict:
+    """
+    Foto del momento por asistente: pacientes, tratamientos activos, dosis
+    pendientes y atrasadas, y las dosis programadas para hoy. Dos GROUP BY:
+    uno sobre pacientes y medicaciones y otro sobre las dosis pendientes o
+    de hoy.
+    """
+    now = clock.now()
+    today = datetime.combine(now.date(), datetime.min.time())
+    tomorrow = today + timedelta(days=1)
+
+    assistants = {}
+    rows = db.execute(
+        select(
+            Patient.assistant_id,
+            func.coalesce(User.full_name, User.username).label("assistant_name"),
+            func.count(distinct(Patient.id)).label("patients"),
+            func.count(case((Medication.status == "active", Medication.id))).label(
+                "active_medications"
+            ),
+        )
+        .select_from(Patient)
+        .outerjoin(Medication, Medication.patient_id == Patient.id)
+        .outerjoin(User, User.id == Patient.assistant_id)
+        .group_by(Patient.assistant_id)
+    )
+    for row in rows:
+        assistants[row.assistant_id] = {
+            "assistant_id": row.assistant_id,
+            "assistant_name": row.assistant_name,
+            "patients": row.patients,
+            "active_medications": row.active_medications,
+            "pending_doses": 0,
+            "overdue_doses": 0,
+            "today": _empty_counts(),
+        }
+
+    # Pendientes de cualquier día más todas las de hoy
+    is_today = (Dose.scheduled_time >= today) & (Dose.scheduled_time < tomorrow)
+    doses = (
+        select(
+            Dose.medication_id,
+            Dose.scheduled_time,
+            Dose.status,
+            Dose.administration_time,
+        )
+        .where(or_(Dose.status == "pending", is_today))
+        .subquery("d")
+    )
+    is_today = (doses.c.scheduled_time >= today) & (doses.c.scheduled_time < tomorrow)
+    pending = doses.c.status == "pending"
+    rows = db.execute(
+        select(
+            Patient.assistant_id,
+            func.sum(case((pending, 1), else_=0)).label("pending_doses"),
+            func.sum(
+                case((pending & (doses.c.scheduled_time < now), 1), else_=0)
+            ).label("overdue_doses"),
+            *dose_counts(doses, is_today),
+        )
+        .select_from(with_patient(doses))
+        .group_by(Patient.assistant_id)
+    )
+    for row in rows:
+        entry = assistants.get(row.assistant_id)
+        if entry is None:
+            continue
+        entry["pending_doses"] = row.pending_doses or 0
+        entry["overdue_doses"] = row.overdue_doses or 0
+        _add_counts(entry["today"], row)
+
+    overview = {
+        "generated_at": now,
+        "patients": 0,
+        "active_medications": 0,
+        "pending_doses": 0,
+        "overdue_doses": 0,
+    }
+    today_totals = _empty_counts()
+    for entry in assistants.values():
+        for name in (
+            "patients",
+            "active_medications",
+            "pending_doses",
+            "overdue_doses",
+        ):
+            overview[name] += entry[name]
+        for name, value in entry["today"].items():
+            today_totals[name] += value
+        entry["today"] = with_rates(entry["today"])
+
+    overview["today"] = with_rates(today_totals)
+    overview["assistants"] = sorted(
+        assistants.values(),
+        key=lambda entry: (entry["assistant_id"] is None, entry["assistant_id"] or 0),
+    )
+    return overview
@@ -0,0 +1,193 @@
+from sqlalchemy import Integer, bindparam, func, insert, select
+from sqlalchemy.orm import Session, selectinload
+from typing import Iterable, Optional
+
+from app.models.change_log import ChangeLog
+from app.models.patient import Patient, Medication, Note
+
+PATIENT = "patient"
+MEDICATION = "medication"
+NOTE = "note"
+
+SYNC_PAGE_SIZE = 1000
+
+
+def record_change(
+    db: Session,
+    entity: str,
+    entity_id: int,
+    patient_id: int,
+    assistant_id: Optional[int] = None,
+    deleted: bool = False,
+):
+    """
+    Añade una entrada al registro de cambios dentro de la transacción en curso:
+    se confirma (o se descarta) junto con la escritura que la origina. Si no
+    se indica el asistente, se toma del paciente en el mismo INSERT.
+    """
+    if assistant_id is None:
+        assistant_id = (
+            select(Patient.assistant_id)
+            .where(Patient.id == patient_id)
+            .scalar_subquery()
+        )
+    db.add(
+        ChangeLog(
+            entity=entity,
+            entity_id=entity_id,
+            patient_id=patient_id,
+            assistant_id=assistant_id,
+            deleted=deleted,
+        )
+    )
+
+
+def record_changes(db: Session, entity: str, rows: Iterable[tuple]):
+    """
+    Varias entradas (entity_id, patient_id, assistant_id) en un solo INSERT
+    por lotes; para escrituras masivas. Si el asistente es None se toma del
+    paciente en el mismo INSERT, como en record_change.
+    """
+    values = [
+        {
+            "row_entity_id": entity_id,
+            "row_patient_id": patient_id,
+            "row_assistant_id": assistant_id,
+        }
+        for entity_id, patient_id, assistant_id in rows
+    ]
+    if not values:
+        return
+    patient_id = bindparam("row_patient_id", type_=Integer)
+    db.execute(
+        insert(ChangeLog).values(
+            entity=entity,
+            entity_id=bindparam("row_entity_id", type_=Integer),
+            patient_id=patient_id,
+            assistant_id=func.coalesce(
+                bindparam("row_assistant_id", type_=Integer),
+                select(Patient.assistant_id)
+                .where(Patient.id == patient_id)
+                .scalar_subquery(),
+            ),
+            deleted=False,
+        ),
+        values,
+    )
+
+
+def record_medication_changes(db: Session, medications: Iterable[Medication]):
+    record_changes(
+        db,
+        MEDICATION,
+        [(medication.id, medication.patient_id, None) for medication in medications],
+    )
+
+
+def record_patient_reassignment(db: Session, db_patient: Patient, old_assistant_id):
+    """
+    Al cambiar de asistente, el anterior recibe una baja del paciente y el
+    nuevo recibe el paciente con todas sus medicaciones y notas.
+    """
+    record_change(
+        db, PATIENT, db_patient.id, db_patient.id, old_assistant_id, deleted=True
+    )
+    for entity, children in (
+        (MEDICATION, db_patient.medications),
+        (NOTE, db_patient.notes),
+    ):
+        record_changes(
+            db,
+            entity,
+            [(child.id, db_patient.id, db_patient.assistant_id) for child in children],
+        )
+
+
+def latest_change_id(db: Session) -> int:
+    """
+    Último id de change_log: cambia con cualquier escritura sobre pacientes,
+    medicaciones o notas, también las hechas desde otro proceso (scripts)
+    """
+    return db.query(func.max(ChangeLog.id)).scalar() or 0
+
+
+def get_changes_since(
+    db: Session,
+    since: int,
+    assistant_id: Optional[int] = None,
+    limit: int = SYNC_PAGE_SIZE,
+):
+    query = db.query(ChangeLog).filter(ChangeLog.id > since)
+    if assistant_id is not None:
+        query = query.filter(ChangeLog.assistant_id == assistant_id)
+    return query.order_by(ChangeLog.id.asc()).limit(limit).all()
+
+
+def build_sync_payload(
+    db: Session,
+    since: int,
+    changes: list,
+    has_more: bool,
+    assistant_id: Optional[int] = None,
+):
+    """
+    Reduce los cambios a su último estado por entidad: las altas y
+    modificaciones se devuelven con la fila actual y las bajas como ids.
+    Una fila que ya no existe, o que ya no es visible para el asistente,
+    cuenta como baja aunque su último registro no lo sea (por ejemplo,
+    medicaciones de un paciente eliminado o reasignado).
+    """
+    latest = {}
+    for change in changes:
+        latest[(change.entity, change.entity_id)] = change
+
+    upserts = {PATIENT: set(), MEDICATION: set(), NOTE: set()}
+    deleted = {PATIENT: set(), MEDICATION: set(), NOTE: set()}
+    for (entity, entity_id), change in latest.items():
+        (deleted if change.deleted else upserts)[entity].add(entity_id)
+
+    def visible(query, model):
+        if assistant_id is None:
+            return query
+        if model is not Patient:
+            query = query.join(Patient, model.patient_id == Patient.id)
+        return query.filter(Patient.assistant_id == assistant_id)
+
+    patients = (
+        visible(db.query(Patient), Patient)
+        .filter(Patient.id.in_(upserts[PATIENT]))
+        .all()
+        if upserts[PATIENT]
+        else []
+    )
+    medications = (
+        visible(db.query(Medication), Medication)
+        .options(selectinload(Medication.doses))
+        .filter(Medication.id.in_(upserts[MEDICATION]))
+        .all()
+        if upserts[MEDICATION]
+        else []
+    )
+    notes = (
+        visible(db.query(Note), Note).filter(Note.id.in_(upserts[NOTE])).all()
+        if upserts[NOTE]
+        else []
+    )
+
+    deleted[PATIENT] |= upserts[PATIENT] - {p.id for p in patients}
+    deleted[MEDICATION] |= upserts[MEDICATION] - {m.id for m in medications}
+    deleted[NOTE] |= upserts[NOTE] - {n.id for n in notes}
+
+    return {
+        "cursor": changes[-1].id if changes else since,
+        "has_more": has_more,
+        "patients": patients,
+        "medications": medications,
+        "doses": [dose for medication in medications for dose in medication.doses],
+        "notes": notes,
+        "deleted": {
+            "patients": sorted(deleted[PATIENT]),
+            "medications": sorted(deleted[MEDICATION]),
+            "notes": sorted(deleted[NOTE]),
+        },
+    }
@@ -1,3 +1,4 @@
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 from app.models.user import User
 from app.schemas.user import UserCreate, UserUpdate
@@ -100,7 +101,17 @@ def delete_user(db: Session, user_id: int) -> User:
         )
 
     db.delete(db_user)
-    db.commit()
+    try:
+        db.commit()
+    except IntegrityError:
+        # Con las claves foráneas activas no se puede dejar pacientes, notas
+        # o dosis apuntando a un usuario que ya no existe
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="User is referenced by patients or clinical records; "
+            "reassign them or deactivate the user instead",
+        )
     return db_user
 
 
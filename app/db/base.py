@@ -1,31 +1,168 @@
-from sqlalchemy import create_engine
+from contextlib import contextmanager
+import logging
+import threading
+import time
+import traceback
+
+from sqlalchemy import create_engine, event
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.pool import QueuePool
 
 from app.core.config import settings
 
+logger = logging.getLogger(__name__)
+
 SQLALCHEMY_DATABASE_URL = settings.DATABASE_URL
 
 
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool que mide cuánto tiempo espera cada checkout por una conexión"""
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            _record_wait(time.perf_counter() - start)
+
+
 engine = create_engine(
     SQLALCHEMY_DATABASE_URL,
     connect_args={"check_same_thread": False},
     pool_size=10,
     max_overflow=20,
-    poolclass=QueuePool,
+    poolclass=InstrumentedQueuePool,
     pool_pre_ping=True,
     pool_timeout=20,
     pool_recycle=1800,
 )
 SessionLocal = sessionmaker(autocommit=False, bind=engine, autoflush=False)
 
+
+if engine.dialect.name == "sqlite":
+
+    @event.listens_for(engine, "connect")
+    def _enable_foreign_keys(dbapi_connection, connection_record):
+        # SQLite no aplica las claves foráneas (ni ON DELETE CASCADE) si no se
+        # activan en cada conexión
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA foreign_keys=ON")
+        cursor.close()
+
+
 Base = declarative_base()
 
 
-def get_db():
+# Métricas del pool de conexiones
+_pool_lock = threading.Lock()
+_pool_metrics = {
+    "checkouts": 0,
+    "checkins": 0,
+    "wait_count": 0,
+    "wait_total_seconds": 0.0,
+    "wait_max_seconds": 0.0,
+    "last_wait_seconds": 0.0,
+}
+# id(connection_record) -> {"since": monotonic, "stack": traceback o None}
+_checked_out = {}
+
+
+def _record_wait(seconds: float):
+    with _pool_lock:
+        _pool_metrics["wait_count"] += 1
+        _pool_metrics["wait_total_seconds"] += seconds
+        _pool_metrics["last_wait_seconds"] = seconds
+        if seconds > _pool_metrics["wait_max_seconds"]:
+            _pool_metrics["wait_max_seconds"] = seconds
+
+
+@event.listens_for(engine, "checkout")
+def _on_checkout(dbapi_connection, connection_record, connection_proxy):
+    # En modo debug guardamos la pila para saber quién retuvo la conexión
+    stack = "".join(traceback.format_stack(limit=25)) if settings.DEBUG else None
+    with _pool_lock:
+        _pool_metrics["checkouts"] += 1
+        _checked_out[id(connection_record)] = {
+            "since": time.monotonic(),
+            "stack": stack,
+        }
+
+
+@event.listens_for(engine, "checkin")
+def _on_checkin(dbapi_connection, connection_record):
+    with _pool_lock:
+        _pool_metrics["checkins"] += 1
+        _checked_out.pop(id(connection_record), None)
+
+
+def get_leaked_connections():
+    """
+    Conexiones que llevan más de POOL_LEAK_THRESHOLD_SECONDS fuera del pool.
+    Normalmente indican una sesión que nunca se cerró.
+    """
+    now = time.monotonic()
+    threshold = settings.POOL_LEAK_THRESHOLD_SECONDS
+    with _pool_lock:
+        leaked = [
+            {"held_seconds": round(now - info["since"], 2), "stack": info["stack"]}
+            for info in _checked_out.values()
+            if now - info["since"] > threshold
+        ]
+    for item in leaked:
+        logger.warning(
+            f"⚠️ Conexión retenida {item['held_seconds']}s sin devolverse al pool"
+            + (f"\n{item['stack']}" if item["stack"] else "")
+        )
+    return leaked
+
+
+def get_pool_status():
+    """Estado actual del pool y métricas acumuladas, para /check-health"""
+    pool = engine.pool
+    leaked = get_leaked_connections()
+    with _pool_lock:
+        metrics = dict(_pool_metrics)
+    wait_count = metrics["wait_count"]
+    return {
+        "size": pool.size(),
+        "checked_out": pool.checkedout(),
+        "checked_in": pool.checkedin(),
+        "overflow": pool.overflow(),
+        "max_overflow": pool._max_overflow,
+        "checkouts": metrics["checkouts"],
+        "checkins": metrics["checkins"],
+        "wait": {
+            "count": wait_count,
+            "avg_ms": (
+                round(metrics["wait_total_seconds"] / wait_count * 1000, 3)
+                if wait_count
+                else 0.0
+            ),
+            "max_ms": round(metrics["wait_max_seconds"] * 1000, 3),
+            "last_ms": round(metrics["last_wait_seconds"] * 1000, 3),
+        },
+        "leaked_count": len(leaked),
+        "leaked": leaked if settings.DEBUG else [],
+    }
+
+
+@contextmanager
+def session_scope():
+    """
+    Sesión con ciclo de vida garantizado: rollback si ocurre un error
+    y cierre siempre, devolviendo la conexión al pool.
+    """
     db = SessionLocal()
     try:
         yield db
+    except Exception:
+        db.rollback()
+        raise
     finally:
-        db.close
+        db.close()
+
+
+def get_db():
+    with session_scope() as db:
+        yield db
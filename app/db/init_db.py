@@ -1,6 +1,7 @@
 from sqlalchemy.orm import Session
 
-from app.db.base import Base, engine, SessionLocal
+from app.db.base import Base, engine
+from app.db.search_index import create_search_index
 from app.models import user
 from app.crud.crud_user import create_user
 from app.schemas.user import UserCreate
@@ -8,8 +9,7 @@ from app.schemas.user import UserCreate
 
 def init_db(db: Session) -> None:
     Base.metadata.create_all(bind=engine)
-
-    db = SessionLocal()
+    create_search_index(engine)
 
     if not db.query(user.User).filter(user.User.role == "admin").first():
         admin_user = UserCreate(
@@ -21,5 +21,3 @@ def init_db(db: Session) -> None:
             phone="+50660793603",
         )
         create_user(db=db, user=admin_user)
-
-    db.close()
@@ -0,0 +1,71 @@
+from contextvars import ContextVar
+from typing import List, Optional
+import time
+
+from sqlalchemy import event
+
+from app.db.base import engine
+
+# Contador activo en el contexto actual (petición, tick del scheduler, prueba...)
+_active_counters: ContextVar[tuple] = ContextVar("active_query_counters", default=())
+
+
+class QueryCounter:
+    """
+    Cuenta las sentencias SQL ejecutadas por el engine mientras está activo.
+
+    Se usa como context manager, por ejemplo en un fixture de pytest o
+    alrededor de un tick del scheduler:
+
+        with QueryCounter() as counter:
+            get_patients(db)
+        assert counter.count <= 4
+
+    Los contadores se pueden anidar; cada sentencia se suma a todos los activos.
+    """
+
+    def __init__(self, capture_statements: bool = False):
+        self.count = 0
+        self.total_seconds = 0.0
+        self.capture_statements = capture_statements
+        self.statements: List[dict] = []
+        self._token = None
+
+    def __enter__(self):
+        self._token = _active_counters.set(_active_counters.get() + (self,))
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        _active_counters.reset(self._token)
+        self._token = None
+        return False
+
+    def _record(self, statement: str, seconds: float):
+        self.count += 1
+        self.total_seconds += seconds
+        if self.capture_statements:
+            self.statements.append(
+                {"sql": statement, "duration_ms": round(seconds * 1000, 3)}
+            )
+
+
+def get_active_counter() -> Optional[QueryCounter]:
+    counters = _active_counters.get()
+    return counters[-1] if counters else None
+
+
+@event.listens_for(engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _active_counters.get():
+        conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+
+@event.listens_for(engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    counters = _active_counters.get()
+    if not counters:
+        return
+    starts = conn.info.get("query_start_time")
+    elapsed = time.perf_counter() - starts.pop() if starts else 0.0
+    for counter in counters:
+        counter._record(statement, elapsed)
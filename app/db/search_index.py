@@ -0,0 +1,61 @@
+"""
+Índices de texto completo (SQLite FTS5) sobre nombres de pacientes, nombres
+de medicaciones y contenido de notas.
+
+Cada índice es una tabla FTS5 de contenido externo (no duplica el texto, lo
+lee de la tabla original) que se mantiene al día con triggers, así que
+cualquier escritura, también los INSERT por lotes y los borrados en cascada,
+queda indexada sin pasar por la capa CRUD.
+"""
+
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+
+# (tabla FTS, tabla original, columna indexada)
+SEARCH_INDEXES = [
+    ("patients_fts", "patients", "name"),
+    ("medications_fts", "medications", "name"),
+    ("notes_fts", "notes", "content"),
+]
+
+# Sin distinguir mayúsculas ni tildes: "gonzalez" encuentra "González"
+TOKENIZER = "unicode61 remove_diacritics 2"
+
+
+def search_index_ddl(fts: str, table: str, column: str) -> list:
+    return [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5("
+        f"{column}, content='{table}', content_rowid='id', "
+        f"tokenize='{TOKENIZER}')",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {table} BEGIN "
+        f"INSERT INTO {fts}(rowid, {column}) VALUES (new.id, new.{column}); END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {table} BEGIN "
+        f"INSERT INTO {fts}({fts}, rowid, {column}) "
+        f"VALUES ('delete', old.id, old.{column}); END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE OF {column} ON {table} "
+        f"BEGIN INSERT INTO {fts}({fts}, rowid, {column}) "
+        f"VALUES ('delete', old.id, old.{column}); "
+        f"INSERT INTO {fts}(rowid, {column}) VALUES (new.id, new.{column}); END",
+    ]
+
+
+def create_search_index(engine: Engine) -> None:
+    """
+    Crea las tablas FTS y sus triggers si faltan, e indexa las filas que ya
+    existían. Para bases creadas con create_all; las existentes lo reciben
+    por migración.
+    """
+    if engine.dialect.name != "sqlite":
+        return
+    with engine.begin() as connection:
+        for fts, table, column in SEARCH_INDEXES:
+            exists = connection.execute(
+                text(
+                    "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"
+                ),
+                {"name": fts},
+            ).first()
+            for statement in search_index_ddl(fts, table, column):
+                connection.execute(text(statement))
+            if not exists:
+                connection.execute(text(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')"))
@@ -0,0 +1,189 @@
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.concurrency import run_in_threadpool
+from starlette.routing import Match
+from fastapi import Request, Response
+from fastapi.responses import JSONResponse
+import hashlib
+import logging
+
+from app.core.security import decode_access_token
+from app.crud.crud_idempotency import (
+    complete_idempotent_request,
+    get_idempotency_record,
+    release_idempotency_key,
+    start_idempotent_request,
+    take_over_idempotent_request,
+)
+from app.db.base import session_scope
+
+logger = logging.getLogger(__name__)
+
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+MAX_KEY_LENGTH = 255
+# Cabeceras de la respuesta que no se guardan: Response las vuelve a poner o
+# son de la ejecución original
+UNSTORED_HEADERS = {"content-length", "content-type", "x-query-count"}
+
+# Rutas (método, plantilla de ruta) que aceptan Idempotency-Key: las
+# escrituras que las tablets reintentan cuando falla la red
+IDEMPOTENT_ROUTES = {
+    ("POST", "/patients/{patient_id}/medications"),
+    ("POST", "/patients/doses/{dose_id}/administer"),
+    ("POST", "/patients/medications/{medication_id}/cancel"),
+    ("POST", "/patients/{patient_id}/notes"),
+    ("POST", "/patients/notes/batch"),
+    ("POST", "/doses/administer"),
+    ("POST", "/patients/protocols/apply"),
+}
+
+
+def _route_path(request: Request):
+    for route in request.app.router.routes:
+        match, _ = route.matches(request.scope)
+        if match == Match.FULL:
+            return route.path
+    return None
+
+
+def _principal(request: Request):
+    """Usuario del token sin consultar la base; la ruta valida el token igual"""
+    scheme, _, token = request.headers.get("Authorization", "").partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return None
+    payload = decode_access_token(token)
+    return payload.get("sub") if payload else None
+
+
+def _fingerprint(request: Request, body: bytes) -> str:
+    digest = hashlib.sha256()
+    digest.update(f"{request.method} {request.url.path}?{request.url.query}\n".encode())
+    digest.update(body)
+    return digest.hexdigest()
+
+
+def _claim(principal: str, key: str, fingerprint: str):
+    """
+    Devuelve ("new", None) si esta petición debe ejecutarse; si no,
+    ("replay", (status, content_type, headers, body)), ("conflict", None) o
+    ("in_progress", None). Una petición en curso cuyo plazo venció se
+    vuelve a ejecutar.
+    """
+    with session_scope() as db:
+        record = get_idempotency_record(db, principal, key)
+        if record is None:
+            if start_idempotent_request(db, principal, key, fingerprint):
+                return "new", None
+            record = get_idempotency_record(db, principal, key)
+            if record is None:
+                return "in_progress", None
+        if record.fingerprint != fingerprint:
+            return "conflict", None
+        if record.status_code is None:
+            if take_over_idempotent_request(db, principal, key):
+                return "new", None
+            return "in_progress", None
+        return "replay", (
+            record.status_code,
+            record.content_type,
+            record.headers or [],
+            record.body,
+        )
+
+
+def _release(principal: str, key: str):
+    with session_scope() as db:
+        release_idempotency_key(db, principal, key)
+
+
+def _complete(principal, key, status_code, content_type, headers, body):
+    with session_scope() as db:
+        if status_code >= 500:
+            release_idempotency_key(db, principal, key)
+        else:
+            complete_idempotent_request(
+                db, principal, key, status_code, content_type, headers, body
+            )
+
+
+class IdempotencyMiddleware(BaseHTTPMiddleware):
+    """
+    Con la cabecera Idempotency-Key, un reintento de la misma petición se
+    contesta con la respuesta guardada de la primera, sin volver a ejecutar
+    la escritura (ni la verificación de dosis que programa). Las claves son
+    por usuario y vencen a las IDEMPOTENCY_TTL_HOURS horas; reutilizar una
+    clave con otro cuerpo devuelve 422 y repetirla mientras la original
+    sigue en curso, 409 (durante IDEMPOTENCY_LEASE_SECONDS como mucho).
+    Tras un error 5xx la clave se libera.
+    """
+
+    async def dispatch(self, request: Request, call_next):
+        key = request.headers.get(IDEMPOTENCY_HEADER)
+        if not key or (request.method, _route_path(request)) not in IDEMPOTENT_ROUTES:
+            return await call_next(request)
+        if len(key) > MAX_KEY_LENGTH:
+            return JSONResponse(
+                status_code=400,
+                content={"detail": f"{IDEMPOTENCY_HEADER} is too long"},
+            )
+        principal = _principal(request)
+        if principal is None:
+            # Sin token válido la ruta responderá 401; no hay nada que guardar
+            return await call_next(request)
+
+        fingerprint = _fingerprint(request, await request.body())
+        outcome, stored = await run_in_threadpool(_claim, principal, key, fingerprint)
+        if outcome == "conflict":
+            return JSONResponse(
+                status_code=422,
+                content={
+                    "detail": f"{IDEMPOTENCY_HEADER} was already used "
+                    "for a different request"
+                },
+            )
+        if outcome == "in_progress":
+            return JSONResponse(
+                status_code=409,
+                content={
+                    "detail": "A request with this "
+                    f"{IDEMPOTENCY_HEADER} is still in progress"
+                },
+            )
+        if outcome == "replay":
+            status_code, content_type, headers, body = stored
+            logger.info(
+                f"🔁 Reintento de {request.method} {request.url.path} respondido desde {IDEMPOTENCY_HEADER}"
+            )
+            replayed = Response(
+                content=body, status_code=status_code, media_type=content_type
+            )
+            for name, value in headers:
+                replayed.headers.append(name, value)
+            replayed.headers["Idempotent-Replayed"] = "true"
+            return replayed
+
+        try:
+            response = await call_next(request)
+            body = b"".join([chunk async for chunk in response.body_iterator])
+        except Exception:
+            await run_in_threadpool(_release, principal, key)
+            raise
+
+        await run_in_threadpool(
+            _complete,
+            principal,
+            key,
+            response.status_code,
+            response.headers.get("content-type"),
+            [
+                [name, value]
+                for name, value in response.headers.items()
+                if name not in UNSTORED_HEADERS
+            ],
+            body,
+        )
+        return Response(
+            content=body,
+            status_code=response.status_code,
+            headers=dict(response.headers),
+            background=response.background,
+        )
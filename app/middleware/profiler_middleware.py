@@ -0,0 +1,77 @@
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.concurrency import run_in_threadpool
+from fastapi import HTTPException, Request
+from fastapi.responses import JSONResponse
+import logging
+
+from app.api.deps import (
+    get_current_active_user,
+    get_current_user,
+    get_current_user_with_role,
+    get_token_subject,
+)
+from app.core.profiling import ProfilerBusy, profiling
+from app.db.base import session_scope
+
+logger = logging.getLogger(__name__)
+
+PROFILE_HEADER = "X-Profile"
+PROFILE_QUERY_PARAM = "profile"
+
+
+def _profiling_requested(request: Request) -> bool:
+    value = request.headers.get(PROFILE_HEADER) or request.query_params.get(
+        PROFILE_QUERY_PARAM
+    )
+    return value in ("1", "true", "yes")
+
+
+def _require_admin(authorization: str):
+    """Mismas comprobaciones que Depends(get_current_user_with_role(["admin"]))"""
+    scheme, _, token = authorization.partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        raise HTTPException(status_code=401, detail="Not authenticated")
+    with session_scope() as db:
+        user = get_current_user(username=get_token_subject(token), db=db)
+        return get_current_user_with_role(["admin"])(
+            current_user=get_current_active_user(current_user=user)
+        )
+
+
+class ProfilerMiddleware(BaseHTTPMiddleware):
+    """
+    Perfila una petición concreta cuando un administrador lo pide con la
+    cabecera X-Profile: 1 o con ?profile=1. El perfil (pilas muestreadas y
+    SQL con tiempos) se guarda y su id se devuelve en X-Profile-Id;
+    consultarlo en GET /debug/profiles/{id}.
+    """
+
+    async def dispatch(self, request: Request, call_next):
+        if not _profiling_requested(request):
+            return await call_next(request)
+
+        try:
+            await run_in_threadpool(
+                _require_admin, request.headers.get("Authorization", "")
+            )
+        except HTTPException as e:
+            return JSONResponse(
+                status_code=e.status_code,
+                content={"detail": e.detail},
+                headers=e.headers,
+            )
+
+        try:
+            with profiling(f"{request.method} {request.url.path}") as profile:
+                response = await call_next(request)
+        except ProfilerBusy:
+            return JSONResponse(
+                status_code=409, content={"detail": "Profiler busy, retry later"}
+            )
+
+        logger.info(
+            f"🔬 Perfil {profile['id']} guardado para {profile['label']} "
+            f"({profile['duration_ms']} ms, {profile['sql']['count']} consultas)"
+        )
+        response.headers["X-Profile-Id"] = profile["id"]
+        return response
@@ -0,0 +1,61 @@
+from starlette.middleware.base import BaseHTTPMiddleware
+from fastapi import Request
+import logging
+
+from app.core.config import settings
+from app.db.query_counter import QueryCounter
+
+logger = logging.getLogger(__name__)
+
+# Presupuesto de consultas SQL por ruta (método, plantilla de ruta).
+# Si un cambio hace que una ruta supere su presupuesto probablemente
+# reintrodujo un patrón N+1: revisar las opciones de carga antes de subirlo.
+QUERY_BUDGETS = {
+    # Incluye el último id de change_log para el ETag
+    ("GET", "/patients/"): 6,
+    ("GET", "/patients/{patient_id}"): 5,
+    ("GET", "/patients/{patient_id}/pending-doses/"): 3,
+    ("POST", "/patients/doses/{dose_id}/administer"): 7,
+    ("GET", "/patients/summary"): 2,
+    ("GET", "/patients/{patient_id}/medications"): 3,
+    ("GET", "/patients/medications/{medication_id}/doses"): 4,
+    ("GET", "/patients/{patient_id}/notes"): 3,
+    ("GET", "/doses/worklist"): 2,
+    ("GET", "/search"): 4,
+    ("GET", "/stats/overview"): 3,
+    ("GET", "/stats/adherence"): 5,
+    # Se responde desde el índice en memoria
+    ("GET", "/medications/catalog/suggest"): 0,
+    # Por lote, sin importar cuántos elementos traiga
+    ("POST", "/doses/administer"): 7,
+    ("POST", "/patients/notes/batch"): 4,
+    # Incluye la suma de usos en el catálogo de medicaciones
+    ("POST", "/patients/protocols/apply"): 6,
+}
+
+
+def get_query_budget(method: str, path: str) -> int:
+    return QUERY_BUDGETS.get((method, path), settings.QUERY_BUDGET_DEFAULT)
+
+
+class QueryBudgetMiddleware(BaseHTTPMiddleware):
+    """
+    Cuenta las consultas SQL de cada petición, las expone en la cabecera
+    X-Query-Count y registra un aviso si la ruta supera su presupuesto.
+    """
+
+    async def dispatch(self, request: Request, call_next):
+        with QueryCounter() as counter:
+            response = await call_next(request)
+
+        route = request.scope.get("route")
+        path = getattr(route, "path", request.url.path)
+        budget = get_query_budget(request.method, path)
+
+        response.headers["X-Query-Count"] = str(counter.count)
+        if counter.count > budget:
+            logger.warning(
+                f"⚠️ {request.method} {path} ejecutó {counter.count} consultas "
+                f"(presupuesto: {budget})"
+            )
+        return response
@@ -0,0 +1,24 @@
+from sqlalchemy import Column, Integer, String, Boolean, DateTime
+from sqlalchemy.sql import func
+from app.db.base import Base
+
+
+class ChangeLog(Base):
+    """
+    Registro de cambios para GET /sync: el id es la secuencia del cursor.
+    AUTOINCREMENT garantiza que SQLite nunca reutilice un id.
+    """
+
+    __tablename__ = "change_log"
+    __table_args__ = {"sqlite_autoincrement": True}
+
+    id = Column(Integer, primary_key=True)
+    # patient, medication o note; los cambios de dosis se registran como
+    # cambios de su medicación
+    entity = Column(String, nullable=False)
+    entity_id = Column(Integer, nullable=False)
+    patient_id = Column(Integer)
+    # Asistente del paciente al momento del cambio, para filtrar la visibilidad
+    assistant_id = Column(Integer, index=True)
+    deleted = Column(Boolean, default=False, nullable=False)
+    changed_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -0,0 +1,26 @@
+from sqlalchemy import Column, Integer, String, Date
+from app.db.base import Base
+
+
+class DoseDailyStats(Base):
+    """
+    Resumen diario de dosis por asistente y nombre de medicación, para que
+    las estadísticas de rangos largos no recorran toda la tabla de dosis.
+    Solo contiene días cerrados (sus dosis ya no cambian de estado); lo
+    rellena el scheduler de forma incremental.
+    """
+
+    __tablename__ = "dose_daily_stats"
+
+    id = Column(Integer, primary_key=True)
+    # Día de la hora programada
+    day = Column(Date, nullable=False, index=True)
+    # Asistente del paciente al momento de resumir el día
+    assistant_id = Column(Integer)
+    medication_name = Column(String, nullable=False, default="")
+    scheduled = Column(Integer, nullable=False, default=0)
+    administered = Column(Integer, nullable=False, default=0)
+    on_time = Column(Integer, nullable=False, default=0)
+    late = Column(Integer, nullable=False, default=0)
+    missed = Column(Integer, nullable=False, default=0)
+    pending = Column(Integer, nullable=False, default=0)
@@ -0,0 +1,38 @@
+from sqlalchemy import (
+    Column,
+    Integer,
+    JSON,
+    String,
+    DateTime,
+    LargeBinary,
+    UniqueConstraint,
+)
+from sqlalchemy.sql import func
+from app.db.base import Base
+
+
+class IdempotencyKey(Base):
+    """
+    Respuesta guardada de una petición con cabecera Idempotency-Key, para
+    contestar los reintentos sin volver a ejecutar la escritura. Mientras
+    status_code es NULL la petición original sigue en curso, como mucho
+    hasta lease_expires_at: después otro reintento puede ejecutarla.
+    """
+
+    __tablename__ = "idempotency_keys"
+    __table_args__ = (UniqueConstraint("principal", "key"),)
+
+    id = Column(Integer, primary_key=True)
+    # Usuario del token: la misma clave de dos usuarios son peticiones distintas
+    principal = Column(String, nullable=False)
+    key = Column(String, nullable=False)
+    # sha256 de método, ruta y cuerpo de la petición original
+    fingerprint = Column(String, nullable=False)
+    status_code = Column(Integer, nullable=True)
+    content_type = Column(String, nullable=True)
+    # Cabeceras de la respuesta original (ETag, Location...) como [nombre, valor]
+    headers = Column(JSON, nullable=True)
+    body = Column(LargeBinary, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    expires_at = Column(DateTime(timezone=True), nullable=False, index=True)
+    lease_expires_at = Column(DateTime(timezone=True), nullable=True)
@@ -0,0 +1,22 @@
+from sqlalchemy import Column, Integer, String, DateTime, UniqueConstraint
+from sqlalchemy.sql import func
+from app.db.base import Base
+
+
+class MedicationCatalogEntry(Base):
+    """
+    Nombre de medicación con una de sus dosificaciones, tomado del historial
+    de medicaciones o importado de una lista. Alimenta el autocompletado.
+    """
+
+    __tablename__ = "medication_catalog"
+    __table_args__ = (UniqueConstraint("name", "dosage"),)
+
+    id = Column(Integer, primary_key=True)
+    name = Column(String, nullable=False, index=True)
+    # "" si no tiene dosificación: en la restricción única NULL no se repite
+    dosage = Column(String, nullable=False, default="")
+    # Medicaciones creadas con este nombre y dosificación
+    usage_count = Column(Integer, nullable=False, default=0)
+    source = Column(String, nullable=False, default="history")  # history, import
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
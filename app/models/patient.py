@@ -7,6 +7,7 @@ from sqlalchemy import (
     ForeignKey,
     Boolean,
     Float,
+    Index,
 )
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
@@ -20,24 +21,36 @@ class Patient(Base):
     name = Column(String, index=True)
     species = Column(String)
     created_by = Column(Integer, ForeignKey("users.id"))
-    assistant_id = Column(Integer, ForeignKey("users.id"))
+    assistant_id = Column(Integer, ForeignKey("users.id"), index=True)
     assistant_name = Column(String)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
     created_by_user = relationship("User", foreign_keys=[created_by])
     assistant = relationship("User", foreign_keys=[assistant_id])
+    # Los hijos los borra la base de datos (ON DELETE CASCADE); passive_deletes
+    # evita que el ORM los cargue uno a uno antes de borrar el paciente
     medications = relationship(
-        "Medication", back_populates="patient", cascade="all, delete-orphan"
+        "Medication",
+        back_populates="patient",
+        cascade="all, delete-orphan",
+        passive_deletes=True,
+    )
+    notes = relationship(
+        "Note",
+        back_populates="patient",
+        cascade="all, delete-orphan",
+        passive_deletes=True,
     )
-    notes = relationship("Note", back_populates="patient", cascade="all, delete-orphan")
 
 
 class Medication(Base):
     __tablename__ = "medications"
 
     id = Column(Integer, primary_key=True, index=True)
-    patient_id = Column(Integer, ForeignKey("patients.id"))
+    patient_id = Column(
+        Integer, ForeignKey("patients.id", ondelete="CASCADE"), index=True
+    )
     name = Column(String)
     dosage = Column(String)
     frequency = Column(Float)
@@ -56,16 +69,32 @@ class Medication(Base):
 
     patient = relationship("Patient", back_populates="medications")
     doses = relationship(
-        "Dose", back_populates="medication", cascade="all, delete-orphan"
+        "Dose",
+        back_populates="medication",
+        cascade="all, delete-orphan",
+        passive_deletes=True,
+    )
+    # Dosis archivadas; no se cargan nunca, solo se borran en cascada
+    dose_history = relationship(
+        "DoseHistory", cascade="all, delete-orphan", passive_deletes=True
     )
     completed_by_user = relationship("User", foreign_keys=[completed_by])
 
 
 class Dose(Base):
     __tablename__ = "doses"
+    # Rangos de dosis pendientes por hora: worklist y verificador de dosis.
+    # Todas las dosis por hora (con el id, que es el rowid): exportación por
+    # páginas y resumen diario
+    __table_args__ = (
+        Index("ix_doses_status_scheduled_time", "status", "scheduled_time"),
+        Index("ix_doses_scheduled_time", "scheduled_time"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
-    medication_id = Column(Integer, ForeignKey("medications.id"))
+    medication_id = Column(
+        Integer, ForeignKey("medications.id", ondelete="CASCADE"), index=True
+    )
     scheduled_time = Column(DateTime(timezone=True))  # hora programada
     status = Column(String, default="pending")  # "pending", "administered", "missed"
     administration_time = Column(DateTime(timezone=True), nullable=True)  # hora real
@@ -79,11 +108,35 @@ class Dose(Base):
     administered_by_user = relationship("User", foreign_keys=[administered_by])
 
 
+class DoseHistory(Base):
+    """
+    Dosis de medicaciones terminadas hace tiempo, movidas fuera de doses para
+    que las consultas del día a día no recorran años de historial. Conservan
+    su id original.
+    """
+
+    __tablename__ = "dose_history"
+
+    id = Column(Integer, primary_key=True, autoincrement=False)
+    medication_id = Column(
+        Integer, ForeignKey("medications.id", ondelete="CASCADE"), index=True
+    )
+    scheduled_time = Column(DateTime(timezone=True), index=True)
+    status = Column(String)
+    administration_time = Column(DateTime(timezone=True), nullable=True)
+    administered_by = Column(Integer, ForeignKey("users.id"), nullable=True)
+    notes = Column(String, nullable=True)
+    notification_sent = Column(Boolean, default=False)
+    archived_at = Column(DateTime(timezone=True))
+
+
 class Note(Base):
     __tablename__ = "notes"
 
     id = Column(Integer, primary_key=True, index=True)
-    patient_id = Column(Integer, ForeignKey("patients.id"))
+    patient_id = Column(
+        Integer, ForeignKey("patients.id", ondelete="CASCADE"), index=True
+    )
     content = Column(Text)
     created_by = Column(Integer, ForeignKey("users.id"))
     created_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -0,0 +1,27 @@
+from pydantic import BaseModel, Field
+from typing import List, Optional
+
+CATALOG_IMPORT_MAX_ITEMS = 5000
+
+
+class CatalogSuggestion(BaseModel):
+    name: str
+    # Dosificaciones usadas con este nombre, de la más a la menos frecuente
+    dosages: List[str] = []
+    usage_count: int = 0
+
+
+class CatalogImportItem(BaseModel):
+    name: str = Field(..., min_length=1)
+    dosage: Optional[str] = None
+
+
+class CatalogImport(BaseModel):
+    items: List[CatalogImportItem] = Field(
+        ..., min_length=1, max_length=CATALOG_IMPORT_MAX_ITEMS
+    )
+
+
+class CatalogImportResult(BaseModel):
+    received: int
+    added: int
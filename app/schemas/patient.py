@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import Optional, List
 from datetime import datetime
 
@@ -27,7 +27,7 @@ class MedicationUpdate(BaseModel):
     duration_days: Optional[int] = None
 
 
-class MedicationRead(MedicationBase):
+class MedicationSummary(MedicationBase):
     id: int
     patient_id: int
     next_dose_time: datetime
@@ -38,6 +38,12 @@ class MedicationRead(MedicationBase):
     status: str = "active"
     start_time: Optional[datetime] = None
     duration_days: Optional[int] = None
+
+    class Config:
+        from_attributes = True
+
+
+class MedicationRead(MedicationSummary):
     doses: List["DoseRead"] = []
 
     class Config:
@@ -93,6 +99,23 @@ class PatientRead(PatientBase):
         from_attributes = True
 
 
+class PatientSummary(PatientBase):
+    """Vista ligera de un paciente para listados: solo columnas y agregados"""
+
+    id: int
+    created_by: int
+    created_at: datetime
+    updated_at: Optional[datetime] = None
+    active_medications: int = 0
+    pending_doses: int = 0
+    next_dose_time: Optional[datetime] = None
+    latest_note: Optional[str] = None
+    latest_note_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+
 class DoseBase(BaseModel):
     scheduled_time: datetime
     status: str = "pending"
@@ -117,3 +140,105 @@ class DoseRead(DoseBase):
 
     class Config:
         from_attributes = True
+
+
+class WorklistItem(BaseModel):
+    """Dosis pendiente de la lista de trabajo, con los nombres ya resueltos"""
+
+    dose_id: int
+    scheduled_time: datetime
+    status: str
+    notification_sent: bool = False
+    medication_id: int
+    medication_name: str
+    dosage: str
+    patient_id: int
+    patient_name: str
+    species: str
+    assistant_id: int
+
+    class Config:
+        from_attributes = True
+
+
+# Operaciones por lotes
+BATCH_MAX_ITEMS = 500
+
+
+class DoseAdministrationItem(BaseModel):
+    dose_id: int
+    notes: Optional[str] = None
+    # Sin hora se usa la actual
+    administered_at: Optional[datetime] = None
+
+
+class DoseAdministrationBatch(BaseModel):
+    items: List[DoseAdministrationItem] = Field(
+        ..., min_length=1, max_length=BATCH_MAX_ITEMS
+    )
+
+
+class DoseAdministrationResult(BaseModel):
+    """status: administered, not_found, not_pending o duplicate"""
+
+    dose_id: int
+    status: str
+    medication_id: Optional[int] = None
+    medication_completed: bool = False
+    detail: Optional[str] = None
+
+
+class NoteBatchItem(NoteCreate):
+    patient_id: int
+
+
+class NoteBatch(BaseModel):
+    items: List[NoteBatchItem] = Field(..., min_length=1, max_length=BATCH_MAX_ITEMS)
+
+
+class NoteBatchResult(BaseModel):
+    """status: created, not_found o forbidden"""
+
+    patient_id: int
+    status: str
+    note: Optional[NoteRead] = None
+    detail: Optional[str] = None
+
+
+# Protocolos: las mismas medicaciones aplicadas a varios pacientes
+PROTOCOL_MAX_PATIENTS = 100
+PROTOCOL_MAX_MEDICATIONS = 20
+# Dosis que puede crear una aplicación de protocolo entre todos los pacientes
+PROTOCOL_MAX_DOSES = 50000
+
+
+class ProtocolApplication(BaseModel):
+    patient_ids: List[int] = Field(..., min_length=1, max_length=PROTOCOL_MAX_PATIENTS)
+    medications: List[MedicationCreate] = Field(
+        ..., min_length=1, max_length=PROTOCOL_MAX_MEDICATIONS
+    )
+    # Inicio de las medicaciones que no traen start_time; sin él, ahora
+    start_time: Optional[datetime] = None
+
+
+class ProtocolApplicationResult(BaseModel):
+    patient_id: int
+    medication_ids: List[int]
+    doses_created: int
+
+
+class PatientImportError(BaseModel):
+    # Línea del archivo donde empieza el paciente
+    row: int
+    error: str
+
+
+class PatientImportResult(BaseModel):
+    # Pacientes leídos del archivo (en CSV, grupos de filas)
+    received: int
+    created: int
+    failed: int
+    medications_created: int
+    doses_created: int
+    # Como mucho IMPORT_MAX_ERRORS; failed tiene el total
+    errors: List[PatientImportError] = []
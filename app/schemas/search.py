@@ -0,0 +1,36 @@
+from pydantic import BaseModel
+from typing import List, Optional
+from datetime import datetime
+
+
+class PatientHit(BaseModel):
+    id: int
+    name: str
+    species: Optional[str] = None
+    assistant_id: Optional[int] = None
+
+
+class MedicationHit(BaseModel):
+    id: int
+    name: str
+    status: Optional[str] = None
+    patient_id: int
+    patient_name: str
+
+
+class NoteHit(BaseModel):
+    id: int
+    patient_id: int
+    patient_name: str
+    created_at: Optional[datetime] = None
+    # Fragmento de la nota con los términos encontrados entre [ ]
+    snippet: str
+
+
+class SearchResults(BaseModel):
+    """Resultados por tipo, de más a menos relevante"""
+
+    query: str
+    patients: List[PatientHit] = []
+    medications: List[MedicationHit] = []
+    notes: List[NoteHit] = []
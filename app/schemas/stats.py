@@ -0,0 +1,62 @@
+from pydantic import BaseModel
+from typing import List, Optional
+from datetime import date, datetime
+
+
+class DoseCounts(BaseModel):
+    # Dosis programadas en el rango, según su estado actual
+    scheduled: int = 0
+    administered: int = 0
+    # Administradas con hasta DOSE_ON_TIME_MINUTES de retraso, o con más
+    on_time: int = 0
+    late: int = 0
+    missed: int = 0
+    pending: int = 0
+    # administradas / (administradas + omitidas)
+    adherence_rate: Optional[float] = None
+    # a tiempo / (a tiempo + tarde)
+    on_time_rate: Optional[float] = None
+    # omitidas / (administradas + omitidas)
+    missed_rate: Optional[float] = None
+
+
+class AssistantDoseCounts(DoseCounts):
+    assistant_id: Optional[int] = None
+    assistant_name: Optional[str] = None
+
+
+class MedicationDoseCounts(DoseCounts):
+    medication_name: str
+
+
+class AdherenceReport(BaseModel):
+    start: date
+    end: date
+    # Días hasta este se leen del resumen diario; los siguientes, de doses
+    summarized_through: Optional[date] = None
+    totals: DoseCounts
+    assistants: List[AssistantDoseCounts] = []
+    # De mayor a menor tasa de omisión
+    medications: List[MedicationDoseCounts] = []
+
+
+class AssistantOverview(BaseModel):
+    assistant_id: Optional[int] = None
+    assistant_name: Optional[str] = None
+    patients: int = 0
+    active_medications: int = 0
+    pending_doses: int = 0
+    # Pendientes cuya hora programada ya pasó
+    overdue_doses: int = 0
+    # Dosis programadas para hoy
+    today: DoseCounts = DoseCounts()
+
+
+class StatsOverview(BaseModel):
+    generated_at: datetime
+    patients: int = 0
+    active_medications: int = 0
+    pending_doses: int = 0
+    overdue_doses: int = 0
+    today: DoseCounts = DoseCounts()
+    assistants: List[AssistantOverview] = []
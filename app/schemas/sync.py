@@ -0,0 +1,36 @@
+from pydantic import BaseModel
+from typing import List, Optional
+from datetime import datetime
+
+from app.schemas.patient import DoseRead, MedicationSummary, NoteRead, PatientBase
+
+
+class SyncPatient(PatientBase):
+    id: int
+    created_by: int
+    created_at: datetime
+    updated_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+
+class SyncDeleted(BaseModel):
+    patients: List[int] = []
+    medications: List[int] = []
+    notes: List[int] = []
+
+
+class SyncResponse(BaseModel):
+    """
+    Cambios posteriores al cursor. Una baja de paciente implica la de sus
+    medicaciones, dosis y notas; una baja de medicación, la de sus dosis.
+    """
+
+    cursor: int
+    has_more: bool
+    patients: List[SyncPatient] = []
+    medications: List[MedicationSummary] = []
+    doses: List[DoseRead] = []
+    notes: List[NoteRead] = []
+    deleted: SyncDeleted
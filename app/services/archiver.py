@@ -0,0 +1,111 @@
+import logging
+import time
+from datetime import timedelta
+
+from sqlalchemy import DateTime, delete, insert, literal, select
+from sqlalchemy.orm import Session
+
+from app.core import clock
+from app.core.config import settings
+from app.db.base import session_scope
+from app.models.patient import Dose, DoseHistory, Medication
+from app.services.patient_cache import patient_cache
+
+logger = logging.getLogger(__name__)
+
+archive_history = []
+archive_totals = {"runs": 0, "doses_archived": 0}
+
+# Columnas que se copian de doses a dose_history
+ARCHIVED_COLUMNS = (
+    "id",
+    "medication_id",
+    "scheduled_time",
+    "status",
+    "administration_time",
+    "administered_by",
+    "notes",
+    "notification_sent",
+)
+
+
+def archive_finished_doses(db: Session, batch_size: int = None) -> int:
+    """
+    Mueve a dose_history las dosis de medicaciones completadas o canceladas
+    programadas hace más de DOSE_ARCHIVE_AFTER_DAYS días. Trabaja por lotes
+    de batch_size dosis, cada uno en su propia transacción corta (copiar,
+    borrar, commit), para no bloquear las escrituras de la clínica mientras
+    se vacía un historial grande. Devuelve cuántas dosis se movieron.
+    """
+    batch_size = batch_size or settings.DOSE_ARCHIVE_BATCH_SIZE
+    now = clock.now()
+    cutoff = now - timedelta(days=settings.DOSE_ARCHIVE_AFTER_DAYS)
+    candidates = (
+        select(Dose.id, Medication.patient_id)
+        .join(Medication, Medication.id == Dose.medication_id)
+        .where(
+            Medication.status.in_(("completed", "cancelled")),
+            Dose.status != "pending",
+            Dose.scheduled_time < cutoff,
+        )
+        .limit(batch_size)
+    )
+    columns = [getattr(Dose, name) for name in ARCHIVED_COLUMNS]
+
+    archived = 0
+    while True:
+        rows = db.execute(candidates).all()
+        if not rows:
+            break
+        dose_ids = [dose_id for dose_id, _ in rows]
+        db.execute(
+            insert(DoseHistory.__table__).from_select(
+                [*ARCHIVED_COLUMNS, "archived_at"],
+                select(*columns, literal(now, DateTime(timezone=True))).where(
+                    Dose.id.in_(dose_ids)
+                ),
+            )
+        )
+        db.execute(delete(Dose.__table__).where(Dose.id.in_(dose_ids)))
+        db.commit()
+        # Los detalles de paciente en caché incluyen las dosis movidas
+        patient_cache.invalidate(*{patient_id for _, patient_id in rows})
+        archived += len(rows)
+        if len(rows) < batch_size:
+            break
+    return archived
+
+
+def run_dose_archive():
+    """Archivado con su propia sesión, para el scheduler; guarda sus métricas"""
+    started = time.perf_counter()
+    with session_scope() as db:
+        archived = archive_finished_doses(db)
+
+    info = {
+        "timestamp": clock.now(),
+        "duration_ms": round((time.perf_counter() - started) * 1000, 2),
+        "doses_archived": archived,
+    }
+    archive_history.append(info)
+    if len(archive_history) > 10:
+        archive_history.pop(0)
+    archive_totals["runs"] += 1
+    archive_totals["doses_archived"] += archived
+
+    if archived:
+        logger.info(f"📦 {archived} dosis de tratamientos terminados archivadas")
+    return info
+
+
+def get_archive_stats() -> dict:
+    last = archive_history[-1] if archive_history else None
+    return {
+        "after_days": settings.DOSE_ARCHIVE_AFTER_DAYS,
+        **archive_totals,
+        "last_run": (
+            dict(last, timestamp=last["timestamp"].strftime("%Y-%m-%d %H:%M:%S"))
+            if last
+            else None
+        ),
+    }
@@ -0,0 +1,197 @@
+import logging
+import time
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import and_, case, delete, func, insert, select, true, union_all
+from sqlalchemy.orm import Session
+
+from app.core import clock
+from app.core.config import settings
+from app.db.base import session_scope
+from app.models.daily_stats import DoseDailyStats
+from app.models.patient import Dose, DoseHistory, Medication, Patient
+
+logger = logging.getLogger(__name__)
+
+refresh_history = []
+refresh_totals = {"runs": 0, "days_summarized": 0}
+
+# Contadores del resumen diario, en el orden de sus columnas
+COUNT_COLUMNS = ("scheduled", "administered", "on_time", "late", "missed", "pending")
+
+
+def doses_between(start: datetime, end: datetime, include_history: bool = True):
+    """Dosis programadas en [start, end), también las archivadas si se pide"""
+    selects = [
+        select(
+            model.medication_id,
+            model.scheduled_time,
+            model.status,
+            model.administration_time,
+        ).where(model.scheduled_time >= start, model.scheduled_time < end)
+        for model in ((Dose, DoseHistory) if include_history else (Dose,))
+    ]
+    query = union_all(*selects) if len(selects) > 1 else selects[0]
+    return query.subquery("d")
+
+
+def dose_counts(doses, condition=None) -> list:
+    """
+    Agregados de COUNT_COLUMNS sobre una subconsulta de doses_between(),
+    contando solo las filas que cumplan condition si se indica
+    """
+    administered = doses.c.status == "administered"
+    # Retraso en minutos; las dosis completadas sin hora real no son ni a
+    # tiempo ni tarde
+    delay = (
+        func.julianday(doses.c.administration_time)
+        - func.julianday(doses.c.scheduled_time)
+    ) * 1440
+    on_time = settings.DOSE_ON_TIME_MINUTES
+    conditions = {
+        "scheduled": true(),
+        "administered": administered,
+        "on_time": and_(administered, delay <= on_time),
+        "late": and_(administered, delay > on_time),
+        "missed": doses.c.status == "missed",
+        "pending": doses.c.status == "pending",
+    }
+    return [
+        func.sum(
+            case(
+                (
+                    (
+                        conditions[name]
+                        if condition is None
+                        else and_(condition, conditions[name])
+                    ),
+                    1,
+                ),
+                else_=0,
+            )
+        ).label(name)
+        for name in COUNT_COLUMNS
+    ]
+
+
+def with_patient(doses):
+    """Une las dosis con su medicación y paciente"""
+    return doses.join(Medication, Medication.id == doses.c.medication_id).join(
+        Patient, Patient.id == Medication.patient_id
+    )
+
+
+def last_closed_day() -> date:
+    """
+    Último día cuyas dosis ya no cambian: pasado el margen del barrido de
+    atrasadas, toda dosis pendiente de ese día ya es administrada u omitida.
+    """
+    settled = clock.now() - timedelta(
+        hours=settings.OVERDUE_GRACE_HOURS, minutes=settings.OVERDUE_SWEEP_MINUTES
+    )
+    return settled.date() - timedelta(days=1)
+
+
+def summarized_through(db: Session):
+    """Último día presente en dose_daily_stats, o None si está vacía"""
+    return db.query(func.max(DoseDailyStats.day)).scalar()
+
+
+def summarize_days(db: Session, first: date, last: date) -> None:
+    """Recalcula el resumen de los días [first, last] con un solo GROUP BY"""
+    start = datetime.combine(first, datetime.min.time())
+    end = datetime.combine(last + timedelta(days=1), datetime.min.time())
+    doses = doses_between(start, end)
+    day = func.date(doses.c.scheduled_time)
+    db.execute(
+        delete(DoseDailyStats.__table__).where(
+            DoseDailyStats.day >= first, DoseDailyStats.day <= last
+        )
+    )
+    db.execute(
+        insert(DoseDailyStats.__table__).from_select(
+            ["day", "assistant_id", "medication_name", *COUNT_COLUMNS],
+            select(
+                day,
+                Patient.assistant_id,
+                func.coalesce(Medication.name, ""),
+                *dose_counts(doses),
+            )
+            .select_from(with_patient(doses))
+            .group_by(day, Patient.assistant_id, Medication.name),
+        )
+    )
+
+
+def refresh_daily_stats(db: Session) -> int:
+    """
+    Resume los días cerrados que aún no están en dose_daily_stats, desde el
+    siguiente al último resumido (o desde la primera dosis si está vacía),
+    en tandas de DAILY_STATS_BATCH_DAYS días con su propio commit. Los
+    últimos DAILY_STATS_RESUMMARIZE_DAYS días cerrados se vuelven a resumir
+    siempre, así que los cambios tardíos en sus dosis llegan al resumen.
+    Devuelve cuántos días se resumieron.
+    """
+    last = last_closed_day()
+    through = summarized_through(db)
+    if through is not None:
+        first = min(
+            through + timedelta(days=1),
+            last - timedelta(days=settings.DAILY_STATS_RESUMMARIZE_DAYS - 1),
+        )
+    else:
+        first_doses = [
+            db.query(func.min(model.scheduled_time)).scalar()
+            for model in (Dose, DoseHistory)
+        ]
+        first_doses = [value for value in first_doses if value is not None]
+        if not first_doses:
+            return 0
+        first = min(first_doses).date()
+
+    summarized = 0
+    while first <= last:
+        batch_last = min(
+            first + timedelta(days=settings.DAILY_STATS_BATCH_DAYS - 1), last
+        )
+        summarize_days(db, first, batch_last)
+        db.commit()
+        summarized += (batch_last - first).days + 1
+        first = batch_last + timedelta(days=1)
+    return summarized
+
+
+def run_daily_stats_refresh():
+    """Actualización con su propia sesión, para el scheduler; guarda sus métricas"""
+    started = time.perf_counter()
+    with session_scope() as db:
+        summarized = refresh_daily_stats(db)
+        through = summarized_through(db)
+
+    info = {
+        "timestamp": clock.now(),
+        "duration_ms": round((time.perf_counter() - started) * 1000, 2),
+        "days_summarized": summarized,
+        "summarized_through": through.isoformat() if through else None,
+    }
+    refresh_history.append(info)
+    if len(refresh_history) > 10:
+        refresh_history.pop(0)
+    refresh_totals["runs"] += 1
+    refresh_totals["days_summarized"] += summarized
+
+    if summarized:
+        logger.info(f"📊 {summarized} días de dosis resumidos en dose_daily_stats")
+    return info
+
+
+def get_daily_stats_refresh_stats() -> dict:
+    last = refresh_history[-1] if refresh_history else None
+    return {
+        **refresh_totals,
+        "last_run": (
+            dict(last, timestamp=last["timestamp"].strftime("%Y-%m-%d %H:%M:%S"))
+            if last
+            else None
+        ),
+    }
@@ -0,0 +1,190 @@
+import csv
+import io
+from datetime import datetime
+from typing import Iterator, Optional, Tuple
+
+import orjson
+from fastapi.responses import StreamingResponse
+from sqlalchemy import false, func, or_, select, true, union_all
+from sqlalchemy.orm import aliased
+
+from app.db.base import session_scope
+from app.models.patient import Dose, DoseHistory, Medication, Patient
+from app.models.user import User
+
+# Filas que se leen por consulta y se escriben por fragmento de la respuesta
+EXPORT_BATCH_SIZE = 1000
+
+EXPORT_COLUMNS = (
+    "dose_id",
+    "patient_id",
+    "patient_name",
+    "species",
+    "assistant_id",
+    "assistant_name",
+    "medication_id",
+    "medication_name",
+    "dosage",
+    "scheduled_time",
+    "status",
+    "administration_time",
+    "administered_by",
+    "administered_by_name",
+    "notes",
+    "archived",
+)
+
+EXPORT_MEDIA_TYPES = {
+    "csv": "text/csv; charset=utf-8",
+    "ndjson": "application/x-ndjson",
+}
+# Para validar ?format= en las rutas
+EXPORT_FORMAT_PATTERN = "^(csv|ndjson)$"
+
+
+def export_query(
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    patient_id: Optional[int] = None,
+    assistant_id: Optional[int] = None,
+    after: Optional[Tuple[datetime, int]] = None,
+):
+    """
+    Página de EXPORT_BATCH_SIZE dosis programadas en [start, end), también
+    las archivadas, con el paciente, la medicación y quién las administró,
+    por (hora programada, id) a continuación de after. Filtros, orden y
+    límite se aplican dentro de cada rama de la unión para que recorran el
+    índice de scheduled_time de doses y dose_history en lugar de ordenar
+    toda la exportación.
+    """
+    medications = select(Medication.id).join(
+        Patient, Patient.id == Medication.patient_id
+    )
+    if patient_id is not None:
+        medications = medications.where(Medication.patient_id == patient_id)
+    if assistant_id is not None:
+        medications = medications.where(Patient.assistant_id == assistant_id)
+
+    selects = []
+    for model, archived in ((Dose, false()), (DoseHistory, true())):
+        query = select(
+            model.id,
+            model.medication_id,
+            model.scheduled_time,
+            model.status,
+            model.administration_time,
+            model.administered_by,
+            model.notes,
+            archived.label("archived"),
+        ).where(model.scheduled_time.is_not(None))
+        if start is not None:
+            query = query.where(model.scheduled_time >= start)
+        if end is not None:
+            query = query.where(model.scheduled_time < end)
+        if patient_id is not None or assistant_id is not None:
+            query = query.where(model.medication_id.in_(medications))
+        if after is not None:
+            after_time, after_id = after
+            query = query.where(
+                model.scheduled_time >= after_time,
+                or_(model.scheduled_time > after_time, model.id > after_id),
+            )
+        query = query.order_by(model.scheduled_time, model.id).limit(EXPORT_BATCH_SIZE)
+        # SQLite no admite ORDER BY/LIMIT en las ramas de una unión sin subconsulta
+        selects.append(select(query.subquery()))
+    doses = union_all(*selects).subquery("d")
+
+    assistant = aliased(User)
+    administrator = aliased(User)
+    return (
+        select(
+            doses.c.id.label("dose_id"),
+            Patient.id.label("patient_id"),
+            Patient.name.label("patient_name"),
+            Patient.species,
+            Patient.assistant_id,
+            func.coalesce(
+                assistant.full_name, assistant.username, Patient.assistant_name
+            ).label("assistant_name"),
+            doses.c.medication_id,
+            Medication.name.label("medication_name"),
+            Medication.dosage,
+            doses.c.scheduled_time,
+            doses.c.status,
+            doses.c.administration_time,
+            doses.c.administered_by,
+            func.coalesce(administrator.full_name, administrator.username).label(
+                "administered_by_name"
+            ),
+            doses.c.notes,
+            doses.c.archived,
+        )
+        .join(Medication, Medication.id == doses.c.medication_id)
+        .join(Patient, Patient.id == Medication.patient_id)
+        .outerjoin(assistant, assistant.id == Patient.assistant_id)
+        .outerjoin(administrator, administrator.id == doses.c.administered_by)
+        .order_by(doses.c.scheduled_time, doses.c.id)
+        .limit(EXPORT_BATCH_SIZE)
+    )
+
+
+def _csv_value(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    return value
+
+
+def export_batches(**filters) -> Iterator[list]:
+    """
+    Recorre export_query(**filters) página a página, cada una en su propia
+    sesión: ninguna transacción de lectura dura más que una consulta, así
+    que la exportación no bloquea las escrituras mientras se transmite.
+    """
+    after = None
+    while True:
+        with session_scope() as db:
+            rows = db.execute(export_query(**filters, after=after)).all()
+        if rows:
+            yield rows
+        if len(rows) < EXPORT_BATCH_SIZE:
+            return
+        after = (rows[-1].scheduled_time, rows[-1].dose_id)
+
+
+def stream_dose_export(format: str, **filters) -> Iterator[bytes]:
+    """
+    Genera el CSV o NDJSON de export_query(**filters) por páginas de
+    EXPORT_BATCH_SIZE filas: la memoria usada no depende del tamaño de la
+    exportación. Abre sus propias sesiones porque la de la petición se
+    cierra antes de transmitir.
+    """
+    if format == "csv":
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(EXPORT_COLUMNS)
+        for rows in export_batches(**filters):
+            writer.writerows([_csv_value(value) for value in row] for row in rows)
+            yield buffer.getvalue().encode()
+            buffer.seek(0)
+            buffer.truncate()
+        if buffer.tell():
+            yield buffer.getvalue().encode()
+    else:
+        for rows in export_batches(**filters):
+            yield b"".join(
+                orjson.dumps(
+                    dict(zip(EXPORT_COLUMNS, row)),
+                    option=orjson.OPT_APPEND_NEWLINE,
+                )
+                for row in rows
+            )
+
+
+def dose_export_response(format: str, filename: str, **filters) -> StreamingResponse:
+    return StreamingResponse(
+        stream_dose_export(format, **filters),
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}.{format}"'},
+    )
@@ -0,0 +1,159 @@
+import asyncio
+import json
+from collections import deque
+from datetime import datetime
+from itertools import count
+from threading import Lock
+from typing import Optional, Tuple
+from uuid import uuid4
+
+DOSE_DUE = "dose-due"
+DOSE_ADMINISTERED = "dose-administered"
+MEDICATION_CANCELLED = "medication-cancelled"
+NOTE_ADDED = "note-added"
+# El cliente viene de otro arranque o se perdió eventos que ya no están en
+# el historial: debe recargar su estado
+RESYNC = "resync"
+
+# Eventos recientes que se reenvían a un cliente que reconecta con Last-Event-ID
+HISTORY_SIZE = 500
+# Eventos pendientes por conexión; si un cliente no lee, se le desconecta
+QUEUE_SIZE = 100
+
+
+class Subscription:
+    def __init__(self, assistant_id: Optional[int]):
+        # None: admin o doctor, ve todos los pacientes
+        self.assistant_id = assistant_id
+        self.loop = asyncio.get_running_loop()
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=QUEUE_SIZE)
+        self.overflowed = False
+
+    def can_see(self, event: dict) -> bool:
+        return self.assistant_id is None or event["assistant_id"] == self.assistant_id
+
+    def offer(self, event: dict):
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.overflowed = True
+
+
+class EventBroker:
+    """
+    Difunde eventos de dosis, medicaciones y notas a las conexiones abiertas
+    en GET /events/stream. publish() se llama desde el CRUD (threadpool) y
+    desde el scheduler (su propio hilo), por eso los eventos se entregan a
+    cada conexión con call_soon_threadsafe en el event loop que la atiende.
+
+    Es un broker en memoria: con varios workers cada uno solo ve sus eventos.
+    La secuencia de ids vuelve a empezar con cada arranque, así que los ids
+    que se envían llevan el epoch del proceso ("<epoch>-<n>"): un
+    Last-Event-ID de otro arranque no se confunde con uno de este.
+    """
+
+    def __init__(self):
+        self._subscriptions = set()
+        self._history = deque(maxlen=HISTORY_SIZE)
+        self._ids = count(1)
+        self._last_id = 0
+        self._lock = Lock()
+        self.epoch = uuid4().hex[:12]
+
+    def subscribe(self, assistant_id: Optional[int]) -> Subscription:
+        subscription = Subscription(assistant_id)
+        with self._lock:
+            self._subscriptions.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        with self._lock:
+            self._subscriptions.discard(subscription)
+
+    def publish(self, event_type: str, patient_id: int, assistant_id: int, **data):
+        with self._lock:
+            self._last_id = next(self._ids)
+            event = {
+                "id": self._last_id,
+                "type": event_type,
+                "patient_id": patient_id,
+                "assistant_id": assistant_id,
+                "data": data,
+            }
+            self._history.append(event)
+            subscriptions = [s for s in self._subscriptions if s.can_see(event)]
+        for subscription in subscriptions:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.offer, event)
+            except RuntimeError:
+                # El loop de esa conexión ya se cerró
+                self.unsubscribe(subscription)
+
+    def event_id(self, sequence: int) -> str:
+        return f"{self.epoch}-{sequence}"
+
+    def resume_point(self, last_event_id: Optional[str]) -> Tuple[int, bool]:
+        """
+        Secuencia desde la que reenviar según la cabecera Last-Event-ID, y si
+        el cliente debe recargar su estado: el id es de otro arranque, no se
+        entiende, o los eventos que le faltan ya salieron del historial. En
+        ese caso recarga todo y solo necesita los eventos nuevos.
+        """
+        if not last_event_id:
+            return 0, False
+        epoch, _, sequence = last_event_id.partition("-")
+        with self._lock:
+            oldest = self._history[0]["id"] if self._history else self._last_id + 1
+            if (
+                epoch != self.epoch
+                or not sequence.isdigit()
+                or not oldest - 1 <= int(sequence) <= self._last_id
+            ):
+                return self._last_id, True
+        return int(sequence), False
+
+    def replay(self, subscription: Subscription, last_event_id: int) -> list:
+        with self._lock:
+            return [
+                event
+                for event in self._history
+                if event["id"] > last_event_id and subscription.can_see(event)
+            ]
+
+    def stats(self) -> dict:
+        return {
+            "connections": len(self._subscriptions),
+            "epoch": self.epoch,
+            "last_event_id": self._last_id,
+        }
+
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+
+def format_sse(event: dict) -> str:
+    payload = {
+        "patient_id": event["patient_id"],
+        "assistant_id": event["assistant_id"],
+        **event["data"],
+    }
+    return (
+        f"id: {event_broker.event_id(event['id'])}\n"
+        f"event: {event['type']}\n"
+        f"data: {json.dumps(payload, default=_json_default)}\n\n"
+    )
+
+
+def format_resync(sequence: int) -> str:
+    """Aviso de recarga; su id deja al cliente al día con este arranque"""
+    return (
+        f"id: {event_broker.event_id(sequence)}\n"
+        f"event: {RESYNC}\n"
+        f"data: {json.dumps({'epoch': event_broker.epoch})}\n\n"
+    )
+
+
+event_broker = EventBroker()
@@ -0,0 +1,131 @@
+import re
+import unicodedata
+from bisect import bisect_left, insort
+from collections import Counter
+from threading import Lock
+from typing import Iterable, Tuple
+
+# Coincidencias que se revisan como máximo por búsqueda antes de ordenar
+SUGGEST_SCAN_LIMIT = 500
+# Dosificaciones que se devuelven por nombre, de la más usada a la menos
+SUGGEST_DOSAGES = 5
+
+
+def normalize(value: str) -> str:
+    """Minúsculas y sin tildes: "Amoxicilina" y "amoxicilína" son lo mismo"""
+    decomposed = unicodedata.normalize("NFKD", value.casefold())
+    return "".join(char for char in decomposed if not unicodedata.combining(char))
+
+
+class _CatalogName:
+    __slots__ = ("spellings", "dosages", "usage_count")
+
+    def __init__(self):
+        self.spellings = Counter()
+        self.dosages = Counter()
+        self.usage_count = 0
+
+    @property
+    def name(self) -> str:
+        # La forma de escribirlo más usada, o la primera que se vio
+        return self.spellings.most_common(1)[0][0]
+
+
+class MedicationCatalogIndex:
+    """
+    Índice en memoria del catálogo de medicaciones para el autocompletado.
+
+    Las claves son el nombre normalizado y cada palabra a partir de la
+    segunda ("clavul" encuentra "Amoxicilina Clavulánico"), en una lista
+    ordenada: una búsqueda por prefijo es un bisect más un recorrido de las
+    claves contiguas, sin tocar la base de datos. Se carga al arrancar y se
+    actualiza con add() cuando se crean medicaciones o se importan nombres.
+    """
+
+    def __init__(self):
+        self._lock = Lock()
+        self._keys = []
+        self._names = {}
+
+    def load(self, entries: Iterable[Tuple[str, str, int]]):
+        """entries: (nombre, dosificación, usos)"""
+        names = {}
+        for name, dosage, usage_count in entries:
+            self._accumulate(names, name, dosage, usage_count)
+        keys = sorted(
+            (key, normalized) for normalized in names for key in _keys_for(normalized)
+        )
+        with self._lock:
+            self._names = names
+            self._keys = keys
+
+    def add(self, pairs: Iterable[Tuple[str, str]], usage_count: int = 1):
+        """Suma usos a pares (nombre, dosificación) e indexa los nombres nuevos"""
+        with self._lock:
+            for name, dosage in pairs:
+                normalized, is_new = self._accumulate(
+                    self._names, name, dosage, usage_count
+                )
+                if is_new:
+                    for key in _keys_for(normalized):
+                        insort(self._keys, (key, normalized))
+
+    def suggest(self, prefix: str, limit: int = 10) -> list:
+        prefix = normalize(prefix.strip())
+        if not prefix:
+            return []
+        with self._lock:
+            found = {}
+            index = bisect_left(self._keys, (prefix,))
+            while index < len(self._keys) and len(found) < SUGGEST_SCAN_LIMIT:
+                key, normalized = self._keys[index]
+                if not key.startswith(prefix):
+                    break
+                found[normalized] = self._names[normalized]
+                index += 1
+
+            ranked = sorted(
+                found.values(), key=lambda entry: (-entry.usage_count, entry.name)
+            )
+            return [
+                {
+                    "name": entry.name,
+                    "dosages": [
+                        dosage
+                        for dosage, _ in entry.dosages.most_common(SUGGEST_DOSAGES)
+                        if dosage
+                    ],
+                    "usage_count": entry.usage_count,
+                }
+                for entry in ranked[:limit]
+            ]
+
+    def stats(self) -> dict:
+        return {"names": len(self._names), "keys": len(self._keys)}
+
+    @staticmethod
+    def _accumulate(names: dict, name: str, dosage: str, usage_count: int):
+        """Devuelve (nombre normalizado, si es nuevo); (None, False) si está vacío"""
+        name = (name or "").strip()
+        if not name:
+            return None, False
+        normalized = normalize(name)
+        entry = names.get(normalized)
+        is_new = entry is None
+        if is_new:
+            entry = names[normalized] = _CatalogName()
+        # Con 0 usos (importados) la grafía y la dosificación quedan registradas
+        entry.spellings[name] += usage_count
+        entry.dosages[(dosage or "").strip()] += usage_count
+        entry.usage_count += usage_count
+        return normalized, is_new
+
+
+def _keys_for(normalized: str) -> list:
+    words = re.findall(r"\w+", normalized)
+    return [normalized] + [
+        " ".join(words[position:]) for position in range(1, len(words))
+    ]
+
+
+medication_catalog = MedicationCatalogIndex()
@@ -1,19 +1,35 @@
 from twilio.rest import Client
-from sqlalchemy.orm import Session
+from sqlalchemy import func
+from sqlalchemy.orm import Session, joinedload
 from app.core.config import settings
+from app.core import clock
 import logging
 import json
+from app.crud.crud_sync import record_medication_changes
 from app.crud.crud_user import get_user
-from app.models.patient import Dose  # Importante: importar directamente el modelo
-from datetime import datetime, timedelta
+from app.db.base import session_scope
+from app.db.query_counter import QueryCounter
+from app.models.patient import (  # Importante: importar directamente los modelos
+    Dose,
+    Medication,
+    Note,
+    Patient,
+)
+from app.services.events import DOSE_DUE, event_broker
+from app.services.patient_cache import patient_cache
+from datetime import timedelta
 
 logger = logging.getLogger(__name__)
 logging.basicConfig(level=logging.INFO)
 
 check_history = []
 
+# Consultas SQL esperadas por verificación, sin importar cuántas dosis venzan:
+# dosis vencidas, admin, últimas notas, registro de cambios y los dos UPDATE
+TICK_QUERY_BUDGET = 6
 
-def send_whatsapp_notification(to_number: str, variables: dict) -> bool:
+
+def send_via_twilio(to_number: str, variables: dict) -> bool:
     """
     Envía notificación WhatsApp usando Twilio.:
     """
@@ -46,12 +62,43 @@ def send_whatsapp_notification(to_number: str, variables: dict) -> bool:
         return False
 
 
+# Transporte usado para enviar las notificaciones. Se puede reemplazar
+# (por ejemplo en simulaciones) con cualquier función (numero, variables) -> bool
+_transport = send_via_twilio
+
+
+def set_notification_transport(transport=None):
+    """Instala un transporte de notificaciones; sin argumento vuelve a Twilio"""
+    global _transport
+    _transport = transport or send_via_twilio
+
+
+def send_whatsapp_notification(to_number: str, variables: dict) -> bool:
+    return _transport(to_number, variables)
+
+
+def _get_latest_notes(db: Session, patient_ids: set) -> dict:
+    """Contenido de la última nota de cada paciente, en una sola consulta"""
+    if not patient_ids:
+        return {}
+    latest_ids = (
+        db.query(func.max(Note.id))
+        .filter(Note.patient_id.in_(patient_ids))
+        .group_by(Note.patient_id)
+    )
+    rows = (
+        db.query(Note.patient_id, Note.content).filter(Note.id.in_(latest_ids)).all()
+    )
+    return {patient_id: content for patient_id, content in rows}
+
+
 def check_and_send_dose_notifications(db: Session):
     """
     Revisa dosis pendientes y envía notificaciones WhatsApp.
     Solo envía notificaciones para dosis programadas al menos 5 minutos en el pasado.
+    Devuelve los IDs de las dosis notificadas.
     """
-    current_time = datetime.now()
+    current_time = clock.now()
     logger.info(
         f"🔍 Verificando dosis pendientes: {current_time.strftime('%Y-%m-%d %H:%M:%S')}"
     )
@@ -62,9 +109,16 @@ def check_and_send_dose_notifications(db: Session):
         f"⏱️ Umbral de notificación: {notification_threshold.strftime('%Y-%m-%d %H:%M:%S')}"
     )
 
-    # Consulta directa para garantizar el filtrado correcto
+    # Consulta directa para garantizar el filtrado correcto. Medicación,
+    # paciente y asistente se cargan en la misma consulta para no hacer
+    # tres consultas extra por cada dosis
     pending_doses = (
         db.query(Dose)
+        .options(
+            joinedload(Dose.medication)
+            .joinedload(Medication.patient)
+            .joinedload(Patient.assistant)
+        )
         .filter(
             Dose.status == "pending",
             Dose.notification_sent.is_(False),
@@ -85,70 +139,109 @@ def check_and_send_dose_notifications(db: Session):
     if len(check_history) > 10:
         check_history.pop(0)
 
+    messages = []
+    patient_ids = {
+        dose.medication.patient_id
+        for dose in pending_doses
+        if dose.medication and dose.medication.patient_id
+    }
+    if pending_doses:
+        admin_user = get_user(db, 1)  # Asumiendo que el admin tiene ID 1
+        admin_phone = admin_user.phone if admin_user else None
+        latest_notes = _get_latest_notes(db, patient_ids)
+
+    # Preparar los mensajes antes del commit: después del commit los objetos
+    # se expiran y leerlos volvería a consultar cada dosis
     for dose in pending_doses:
-        try:
-            # IMPORTANTE: Marcar como notificado ANTES de enviar
-            dose.notification_sent = True
-            db.add(dose)
-            db.commit()
-
-            # Obtener información del paciente, medicación y asistente
-            medication = dose.medication
-            if not medication:
-                logger.warning(
-                    f"Skipping notification for dose {dose.id}: medication not found"
-                )
-                continue
-
-            patient = medication.patient
-            if not patient:
-                logger.warning(
-                    f"Skipping notification for dose {dose.id}: patient not found"
-                )
-                continue
-
-            assistant = patient.assistant
-            admin_user = get_user(db, 1)  # Asumiendo que el admin tiene ID 1
-
-            # Actualizar next_dose_time en la medicación para mantener compatibilidad
-            medication.next_dose_time = dose.scheduled_time
-            db.add(medication)
-            db.commit()
-
-            # Construir variables para el mensaje
-            variables = {
-                "1": patient.name,
-                "2": medication.name,
-                "3": medication.dosage,
-                "4": dose.scheduled_time.strftime("%H:%M"),
-                "5": assistant.full_name if assistant else "N/A",
-                "6": (
-                    patient.notes[-1].content
-                    if patient.notes and len(patient.notes) > 0
-                    else "N/A"
-                ),
+        # IMPORTANTE: Marcar como notificado ANTES de enviar
+        dose.notification_sent = True
+
+        # Obtener información del paciente, medicación y asistente
+        medication = dose.medication
+        if not medication:
+            logger.warning(
+                f"Skipping notification for dose {dose.id}: medication not found"
+            )
+            continue
+
+        # Actualizar next_dose_time en la medicación para mantener compatibilidad
+        medication.next_dose_time = dose.scheduled_time
+
+        patient = medication.patient
+        if not patient:
+            logger.warning(
+                f"Skipping notification for dose {dose.id}: patient not found"
+            )
+            continue
+
+        assistant = patient.assistant
+
+        # Construir variables para el mensaje
+        variables = {
+            "1": patient.name,
+            "2": medication.name,
+            "3": medication.dosage,
+            "4": dose.scheduled_time.strftime("%H:%M"),
+            "5": assistant.full_name if assistant else "N/A",
+            "6": latest_notes.get(patient.id, "N/A"),
+        }
+        messages.append(
+            {
+                "dose_id": dose.id,
+                "medication_id": medication.id,
+                "scheduled_time": dose.scheduled_time,
+                "patient_id": patient.id,
+                "assistant_id": patient.assistant_id,
+                "variables": variables,
+                "assistant_username": assistant.username if assistant else None,
+                "assistant_phone": assistant.phone if assistant else None,
             }
+        )
 
+    # Un solo commit para todas las dosis marcadas
+    if pending_doses:
+        record_medication_changes(
+            db, {dose.medication for dose in pending_doses if dose.medication}
+        )
+        db.commit()
+        patient_cache.invalidate(*patient_ids)
+
+    for message in messages:
+        event_broker.publish(
+            DOSE_DUE,
+            message["patient_id"],
+            message["assistant_id"],
+            dose_id=message["dose_id"],
+            medication_id=message["medication_id"],
+            medication_name=message["variables"]["2"],
+            dosage=message["variables"]["3"],
+            scheduled_time=message["scheduled_time"],
+        )
+
+    for message in messages:
+        dose_id = message["dose_id"]
+        variables = message["variables"]
+        try:
             # Enviar a asistente asignado (si existe y tiene número de teléfono)
-            if assistant and assistant.phone:
-                if send_whatsapp_notification(assistant.phone, variables):
+            if message["assistant_phone"]:
+                if send_whatsapp_notification(message["assistant_phone"], variables):
                     logger.info(
-                        f"Notification sent to assistant {assistant.username} for dose {dose.id}"
+                        f"Notification sent to assistant {message['assistant_username']} for dose {dose_id}"
                     )
                 else:
                     logger.error(
-                        f"Failed to send notification to assistant {assistant.username}"
+                        f"Failed to send notification to assistant {message['assistant_username']}"
                     )
 
             # Enviar a administrador también (si existe y tiene número de teléfono)
-            if admin_user and admin_user.phone:
-                if send_whatsapp_notification(admin_user.phone, variables):
-                    logger.info(f"Notification sent to admin for dose {dose.id}")
+            if admin_phone:
+                if send_whatsapp_notification(admin_phone, variables):
+                    logger.info(f"Notification sent to admin for dose {dose_id}")
                 else:
                     logger.error("Failed to send notification to admin")
 
         except Exception as e:
-            logger.error(f"Error processing notification for dose {dose.id}: {str(e)}")
+            logger.error(f"Error processing notification for dose {dose_id}: {str(e)}")
             # No revertir el estado para evitar bucles infinitos
 
     if not pending_doses:
@@ -156,6 +249,8 @@ def check_and_send_dose_notifications(db: Session):
             "✓ No hay dosis pendientes que requieran notificación en este momento"
         )
 
+    return [message["dose_id"] for message in messages]
+
 
 def check_and_send_medication_notifications(db: Session):
     """
@@ -164,6 +259,22 @@ def check_and_send_medication_notifications(db: Session):
     return check_and_send_dose_notifications(db)
 
 
+def run_dose_notification_check():
+    """
+    Ejecuta una verificación de dosis con su propia sesión.
+    Usar desde tareas en segundo plano y el scheduler: la sesión de la
+    petición ya está cerrada cuando estas se ejecutan.
+    """
+    with session_scope() as db, QueryCounter() as counter:
+        check_and_send_dose_notifications(db)
+
+    if counter.count > TICK_QUERY_BUDGET:
+        logger.warning(
+            f"⚠️ La verificación de dosis ejecutó {counter.count} consultas "
+            f"(presupuesto: {TICK_QUERY_BUDGET})"
+        )
+
+
 def get_notification_check_history():
     """
     Devuelve el historial de verificaciones de notificaciones
@@ -0,0 +1,92 @@
+from collections import OrderedDict
+from itertools import count
+from threading import Lock
+from typing import NamedTuple, Optional
+
+from app.core.config import settings
+
+
+class CachedPatient(NamedTuple):
+    version: int
+    assistant_id: int
+    body: bytes
+
+
+class PatientDocumentCache:
+    """
+    Caché LRU de los PatientRead ya serializados, por id de paciente.
+
+    Cada paciente tiene un número de versión que las escrituras incrementan
+    con invalidate(). Una entrada solo es válida si se guardó con la versión
+    vigente, así que una lectura que corrió en paralelo con una escritura no
+    puede dejar un documento viejo en la caché: quien lee toma la versión
+    antes de consultar y la pasa a put().
+
+    La caché es por proceso: con varios workers cada uno tendría la suya y
+    las escrituras de uno no invalidarían a los demás.
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[int, CachedPatient]" = OrderedDict()
+        # Las versiones nunca se borran: si volvieran a 0, un put() en vuelo
+        # con la versión anterior podría parecer vigente
+        self._versions: dict = {}
+        self._counter = count(1)
+        # Última versión emitida para cualquier paciente: cambia con cada escritura
+        self.last_version = 0
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def version(self, patient_id: int) -> int:
+        return self._versions.get(patient_id, 0)
+
+    def get(self, patient_id: int) -> Optional[CachedPatient]:
+        with self._lock:
+            entry = self._entries.get(patient_id)
+            if entry is None or entry.version != self.version(patient_id):
+                self.misses += 1
+                return None
+            self._entries.move_to_end(patient_id)
+            self.hits += 1
+            return entry
+
+    def put(self, patient_id: int, version: int, assistant_id: int, body: bytes):
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            if version != self.version(patient_id):
+                return
+            self._entries[patient_id] = CachedPatient(version, assistant_id, body)
+            self._entries.move_to_end(patient_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, *patient_ids: int):
+        """Llamar después del commit de cualquier escritura sobre el paciente"""
+        with self._lock:
+            for patient_id in patient_ids:
+                self.last_version = next(self._counter)
+                self._versions[patient_id] = self.last_version
+                self._entries.pop(patient_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+patient_cache = PatientDocumentCache(settings.PATIENT_CACHE_MAX_ENTRIES)
@@ -0,0 +1,216 @@
+"""
+Importación masiva de pacientes con sus medicaciones y notas desde CSV o
+NDJSON, para dar de alta una clínica nueva.
+
+NDJSON: un PatientCreate por línea; en lugar de assistant_id puede venir
+assistant_username.
+
+CSV: columnas name, species, assistant_id o assistant_username,
+assistant_name, medication_name, dosage, frequency, duration_days,
+start_time y note (todas menos las del paciente son opcionales). Cada fila
+añade al paciente como mucho una medicación y una nota; las filas seguidas
+del mismo paciente (mismo patient_ref si existe esa columna, o mismos
+nombre, especie y asistente) forman un solo paciente.
+"""
+
+import csv
+import logging
+from typing import Iterable, Iterator, Optional, Tuple
+
+import orjson
+from pydantic import ValidationError
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from app.crud.crud_patient import create_patients_bulk
+from app.models.user import User
+from app.schemas.patient import PatientCreate
+
+logger = logging.getLogger(__name__)
+
+IMPORT_FORMAT_PATTERN = "^(csv|ndjson)$"
+# Pacientes por transacción
+IMPORT_BATCH_SIZE = 200
+# Errores que se detallan en el resultado
+IMPORT_MAX_ERRORS = 1000
+
+CSV_PATIENT_COLUMNS = (
+    "name",
+    "species",
+    "assistant_id",
+    "assistant_username",
+    "assistant_name",
+)
+# Columna del CSV -> campo de MedicationCreate
+CSV_MEDICATION_COLUMNS = {
+    "medication_name": "name",
+    "dosage": "dosage",
+    "frequency": "frequency",
+    "duration_days": "duration_days",
+    "start_time": "start_time",
+}
+
+# (línea, registro, error): registro es None si la línea no se pudo leer
+ImportRecord = Tuple[int, Optional[dict], Optional[str]]
+
+
+def read_ndjson_records(lines: Iterable[str]) -> Iterator[ImportRecord]:
+    for number, line in enumerate(lines, 1):
+        if not line.strip():
+            continue
+        try:
+            record = orjson.loads(line)
+        except orjson.JSONDecodeError as e:
+            yield number, None, f"Invalid JSON: {e}"
+            continue
+        if not isinstance(record, dict):
+            yield number, None, "Each line must be a JSON object"
+            continue
+        yield number, record, None
+
+
+def read_csv_records(lines: Iterable[str]) -> Iterator[ImportRecord]:
+    reader = csv.DictReader(lines)
+    key = record = None
+    first_line = 0
+    while True:
+        try:
+            row = next(reader)
+        except StopIteration:
+            break
+        except csv.Error as e:
+            yield reader.line_num, None, f"Invalid CSV: {e}"
+            continue
+        # Las celdas sobrantes quedan bajo la clave None y se ignoran
+        values = {
+            column.strip(): (value or "").strip()
+            for column, value in row.items()
+            if column is not None
+        }
+        row_key = values.get("patient_ref") or tuple(
+            values.get(column, "") for column in CSV_PATIENT_COLUMNS[:4]
+        )
+        if record is None or row_key != key:
+            if record is not None:
+                yield first_line, record, None
+            key, first_line = row_key, reader.line_num
+            record = {
+                column: values[column]
+                for column in CSV_PATIENT_COLUMNS
+                if values.get(column)
+            }
+            record["medications"] = []
+            record["notes"] = []
+        if values.get("medication_name"):
+            medication = {
+                field: values[column]
+                for column, field in CSV_MEDICATION_COLUMNS.items()
+                if values.get(column)
+            }
+            medication.setdefault("dosage", "")
+            record["medications"].append(medication)
+        if values.get("note"):
+            record["notes"].append({"content": values["note"]})
+    if record is not None:
+        yield first_line, record, None
+
+
+IMPORT_READERS = {"csv": read_csv_records, "ndjson": read_ndjson_records}
+
+
+def _error_message(error: Exception) -> str:
+    if isinstance(error, ValidationError):
+        return "; ".join(
+            f"{'.'.join(str(part) for part in detail['loc'])}: {detail['msg']}"
+            for detail in error.errors()
+        )
+    return str(error)
+
+
+def _validate(record: dict, users: dict, usernames: dict) -> PatientCreate:
+    """
+    Valida el registro contra PatientCreate y resuelve su asistente con los
+    usuarios precargados, con las mismas reglas que create_patient
+    """
+    username = record.pop("assistant_username", None)
+    if record.get("assistant_id") in (None, "") and username:
+        if username not in usernames:
+            raise ValueError("Assistant not found")
+        record["assistant_id"] = usernames[username]
+    patient = PatientCreate.model_validate(record)
+
+    assistant = users.get(patient.assistant_id)
+    if assistant is None:
+        raise ValueError("Assistant not found")
+    if assistant.role != "assistant":
+        raise ValueError("Selected user is not an assistant")
+    if any(
+        medication.frequency <= 0 or medication.duration_days <= 0
+        for medication in patient.medications or []
+    ):
+        raise ValueError("frequency and duration_days must be greater than zero")
+    if not patient.assistant_name:
+        patient.assistant_name = assistant.full_name or assistant.username
+    return patient
+
+
+def _add_error(summary: dict, row: int, error: str):
+    summary["failed"] += 1
+    if len(summary["errors"]) < IMPORT_MAX_ERRORS:
+        summary["errors"].append({"row": row, "error": error})
+
+
+def _flush(db: Session, batch: list, user_id: int, summary: dict):
+    try:
+        results = create_patients_bulk(db, [patient for _, patient in batch], user_id)
+    except SQLAlchemyError as e:
+        db.rollback()
+        logger.error(f"❌ Error importando un lote de {len(batch)} pacientes: {e}")
+        for row, _ in batch:
+            _add_error(summary, row, "Database error, batch not imported")
+        return
+    summary["created"] += len(results)
+    for result in results:
+        summary["medications_created"] += result["medications_created"]
+        summary["doses_created"] += result["doses_created"]
+
+
+def import_patients(
+    db: Session, lines: Iterable[str], format: str, user_id: int
+) -> dict:
+    """
+    Lee el archivo línea a línea y crea los pacientes válidos en
+    transacciones de IMPORT_BATCH_SIZE; los que no pasan la validación se
+    informan por línea sin detener el resto. La memoria usada no depende
+    del tamaño del archivo.
+    """
+    users = {
+        user.id: user
+        for user in db.query(User.id, User.username, User.full_name, User.role)
+    }
+    usernames = {user.username: user.id for user in users.values()}
+    summary = {
+        "received": 0,
+        "created": 0,
+        "failed": 0,
+        "medications_created": 0,
+        "doses_created": 0,
+        "errors": [],
+    }
+
+    batch = []
+    for row, record, error in IMPORT_READERS[format](lines):
+        summary["received"] += 1
+        if error is None:
+            try:
+                batch.append((row, _validate(record, users, usernames)))
+            except ValueError as e:
+                error = _error_message(e)
+        if error is not None:
+            _add_error(summary, row, error)
+        if len(batch) >= IMPORT_BATCH_SIZE:
+            _flush(db, batch, user_id, summary)
+            batch = []
+    if batch:
+        _flush(db, batch, user_id, summary)
+    return summary
@@ -0,0 +1,41 @@
+from datetime import datetime
+from typing import List, Sequence, Tuple
+
+import numpy as np
+
+# Microsegundos por hora: las horas se calculan en datetime64[us]
+US_PER_HOUR = 3_600_000_000
+
+
+def compute_dose_times(
+    start_times: Sequence[datetime],
+    frequencies: Sequence[float],
+    durations_days: Sequence[float],
+) -> Tuple[np.ndarray, List[datetime]]:
+    """
+    Horas de todas las dosis de varias medicaciones a la vez. Devuelve, por
+    dosis, el índice de su medicación y la hora programada, en el orden de
+    las medicaciones y luego de la dosis.
+
+    Mismo calendario que add_medication (una dosis cada `frequency` horas,
+    int(días * 24 / frecuencia) dosis y al menos una), pero sin el bucle de
+    timedelta por dosis: todo se calcula con aritmética de datetime64.
+    Las horas deben llegar sin zona.
+    """
+    starts = np.array(start_times, dtype="datetime64[us]")
+    frequencies = np.asarray(frequencies, dtype=np.float64)
+    counts = np.maximum(
+        (np.asarray(durations_days, dtype=np.float64) * 24 / frequencies).astype(
+            np.int64
+        ),
+        1,
+    )
+
+    medication_index = np.repeat(np.arange(len(counts)), counts)
+    # Posición de cada dosis dentro de su medicación: 0, 1, 2... por tramo
+    first = np.cumsum(counts) - counts
+    dose_index = np.arange(counts.sum()) - np.repeat(first, counts)
+
+    offsets = np.rint(frequencies[medication_index] * dose_index * US_PER_HOUR)
+    times = starts[medication_index] + offsets.astype("timedelta64[us]")
+    return medication_index, times.tolist()
@@ -0,0 +1,150 @@
+import logging
+import time
+from datetime import timedelta
+
+from sqlalchemy import bindparam, func, update
+from sqlalchemy.orm import Session
+
+from app.core import clock
+from app.core.config import settings
+from app.crud.crud_sync import MEDICATION, record_changes
+from app.db.base import session_scope
+from app.db.query_counter import QueryCounter
+from app.models.patient import Dose, Medication, Patient
+from app.services.patient_cache import patient_cache
+
+logger = logging.getLogger(__name__)
+
+sweep_history = []
+sweep_totals = {"runs": 0, "doses_missed": 0, "medications_completed": 0}
+
+# Consultas SQL esperadas por barrido, sin importar cuántas dosis venzan
+SWEEP_QUERY_BUDGET = 6
+
+
+def sweep_overdue_doses(db: Session) -> dict:
+    """
+    Marca como omitidas (missed) en un solo UPDATE las dosis pendientes que
+    superan el margen OVERDUE_GRACE_HOURS y recalcula en bloque sus
+    medicaciones: la siguiente dosis de las que aún tienen pendientes, y
+    completadas las activas que ya no tienen ninguna.
+    """
+    now = clock.now()
+    cutoff = now - timedelta(hours=settings.OVERDUE_GRACE_HOURS)
+
+    # Una fila por dosis marcada, con su medicación
+    missed = (
+        db.execute(
+            update(Dose.__table__)
+            .where(Dose.status == "pending", Dose.scheduled_time < cutoff)
+            .values(status="missed")
+            .returning(Dose.medication_id)
+        )
+        .scalars()
+        .all()
+    )
+    result = {"doses_missed": len(missed), "medications_completed": 0}
+    if not missed:
+        db.commit()
+        return result
+
+    medications = {
+        row.id: row
+        for row in db.query(
+            Medication.id,
+            Medication.status,
+            Medication.patient_id,
+            Patient.assistant_id,
+        )
+        .join(Patient, Patient.id == Medication.patient_id)
+        .filter(Medication.id.in_(set(missed)))
+        .all()
+    }
+    next_doses = dict(
+        db.query(Dose.medication_id, func.min(Dose.scheduled_time))
+        .filter(Dose.medication_id.in_(medications), Dose.status == "pending")
+        .group_by(Dose.medication_id)
+        .all()
+    )
+    if next_doses:
+        db.execute(
+            update(Medication.__table__)
+            .where(Medication.id == bindparam("b_medication_id"))
+            .values(next_dose_time=bindparam("b_next"), notification_sent=False),
+            [
+                {"b_medication_id": medication_id, "b_next": next_time}
+                for medication_id, next_time in next_doses.items()
+            ],
+        )
+    # Activas sin dosis pendientes: el tratamiento terminó
+    completed = [
+        medication_id
+        for medication_id, row in medications.items()
+        if row.status == "active" and medication_id not in next_doses
+    ]
+    if completed:
+        db.execute(
+            update(Medication.__table__)
+            .where(Medication.id.in_(completed))
+            .values(
+                status="completed",
+                completed=True,
+                completed_at=now,
+                updated_at=now,
+            )
+        )
+    result["medications_completed"] = len(completed)
+
+    record_changes(
+        db,
+        MEDICATION,
+        [(row.id, row.patient_id, row.assistant_id) for row in medications.values()],
+    )
+    db.commit()
+    patient_cache.invalidate(*{row.patient_id for row in medications.values()})
+    return result
+
+
+def run_overdue_sweep():
+    """Barrido con su propia sesión, para el scheduler; guarda sus métricas"""
+    started = time.perf_counter()
+    with session_scope() as db, QueryCounter() as counter:
+        result = sweep_overdue_doses(db)
+
+    info = {
+        "timestamp": clock.now(),
+        "duration_ms": round((time.perf_counter() - started) * 1000, 2),
+        "queries": counter.count,
+        **result,
+    }
+    sweep_history.append(info)
+    if len(sweep_history) > 10:
+        sweep_history.pop(0)
+    sweep_totals["runs"] += 1
+    sweep_totals["doses_missed"] += result["doses_missed"]
+    sweep_totals["medications_completed"] += result["medications_completed"]
+
+    if result["doses_missed"]:
+        logger.info(
+            f"🧹 {result['doses_missed']} dosis vencidas marcadas como omitidas, "
+            f"{result['medications_completed']} medicaciones completadas"
+        )
+    if counter.count > SWEEP_QUERY_BUDGET:
+        logger.warning(
+            f"⚠️ El barrido de dosis vencidas ejecutó {counter.count} consultas "
+            f"(presupuesto: {SWEEP_QUERY_BUDGET})"
+        )
+    return info
+
+
+def get_sweep_stats() -> dict:
+    last = sweep_history[-1] if sweep_history else None
+    return {
+        "grace_hours": settings.OVERDUE_GRACE_HOURS,
+        **sweep_totals,
+        "last_run": (
+            dict(last, timestamp=last["timestamp"].strftime("%Y-%m-%d %H:%M:%S"))
+            if last
+            else None
+        ),
+    }
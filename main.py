@@ -1,19 +1,48 @@
 from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from app.middleware.db_session_middleware import DBSessionMiddleware
+from app.middleware.query_budget_middleware import QueryBudgetMiddleware
+from app.middleware.idempotency_middleware import IdempotencyMiddleware
+from app.middleware.profiler_middleware import ProfilerMiddleware
 from datetime import datetime
 from contextlib import asynccontextmanager
 from app.core.config import settings
 from app.db.init_db import init_db
-from app.api.routes import auth, users, patients, notifications
+from app.api.routes import (
+    auth,
+    users,
+    patients,
+    doses,
+    notifications,
+    debug,
+    events,
+    sync,
+    search,
+    medications,
+    stats,
+)
 from app.services.notifications import (
-    check_and_send_dose_notifications,  # Usamos solo esta función
+    run_dose_notification_check,  # Usamos solo esta función
     get_notification_check_history,
 )
 from apscheduler.schedulers.background import BackgroundScheduler
 from apscheduler.executors.pool import ThreadPoolExecutor
-from sqlalchemy.orm import Session
-from app.db.base import SessionLocal
+from app.db.base import session_scope, get_pool_status
+from app.crud.crud_idempotency import purge_expired_idempotency_keys
+from app.crud.crud_medication_catalog import (
+    get_catalog_entries,
+    sync_catalog_from_history,
+)
+from app.services.events import event_broker
+from app.services.patient_cache import patient_cache
+from app.services.medication_catalog import medication_catalog
+from app.services.sweeper import get_sweep_stats, run_overdue_sweep
+from app.services.archiver import get_archive_stats, run_dose_archive
+from app.services.daily_stats import (
+    get_daily_stats_refresh_stats,
+    run_daily_stats_refresh,
+)
 import logging
 
 # Configuración de logging
@@ -27,10 +56,20 @@ scheduler = None
 async def lifespan(app: FastAPI):
     global scheduler
     logger.info("🚀 Iniciando aplicación...")
-    db = SessionLocal()
-    try:
+    with session_scope() as db:
         init_db(db)
 
+        # Catálogo de medicaciones: completar con el historial y cargar el índice
+        sync_catalog_from_history(db)
+        medication_catalog.load(
+            (entry.name, entry.dosage, entry.usage_count)
+            for entry in get_catalog_entries(db)
+        )
+        logger.info(
+            f"💊 Catálogo de medicaciones cargado: "
+            f"{medication_catalog.stats()['names']} nombres"
+        )
+
         # Configurar el scheduler con un solo worker para evitar ejecuciones paralelas
         executors = {"default": ThreadPoolExecutor(1)}  # Limitar a un solo worker
 
@@ -45,12 +84,29 @@ async def lifespan(app: FastAPI):
         # IMPORTANTE: Solo usar UN trabajo para verificar dosis
         # Eliminamos check_medications_job que causaba duplicaciones
         scheduler.add_job(check_doses_job, "interval", minutes=1, id="check_doses")
+        scheduler.add_job(
+            run_overdue_sweep,
+            "interval",
+            minutes=settings.OVERDUE_SWEEP_MINUTES,
+            id="sweep_overdue",
+        )
+        # De madrugada, cuando la clínica apenas escribe
+        scheduler.add_job(run_dose_archive, "cron", hour=3, id="archive_doses")
+        scheduler.add_job(
+            purge_idempotency_keys_job, "interval", hours=1, id="purge_idempotency"
+        )
+        # La primera ejecución rellena los días anteriores a la puesta en marcha
+        scheduler.add_job(
+            run_daily_stats_refresh,
+            "interval",
+            hours=1,
+            id="refresh_daily_stats",
+            next_run_time=datetime.now(),
+        )
 
         scheduler.start()
         logger.info("⏲️ Programador de tareas iniciado - Verificando dosis cada minuto")
 
-    finally:
-        db.close()
     yield
     if scheduler:
         scheduler.shutdown()
@@ -61,6 +117,8 @@ app = FastAPI(
     title=settings.PROJECT_NAME,
     version="0.1.0",
     lifespan=lifespan,
+    # Las respuestas que no pasan por model_response (dicts) se codifican con orjson
+    default_response_class=ORJSONResponse,
     description="API para gestión veterinaria con sistema avanzado de tratamientos y dosificación",
 )
 
@@ -74,14 +132,25 @@ app.add_middleware(
 )
 
 app.add_middleware(DBSessionMiddleware)
+app.add_middleware(QueryBudgetMiddleware)
+# Fuera del presupuesto: sus consultas no cuentan para la ruta
+app.add_middleware(IdempotencyMiddleware)
+app.add_middleware(ProfilerMiddleware)
 
 
 app.include_router(auth.router, prefix="/auth", tags=["authentication"])
 app.include_router(users.router, prefix="/users", tags=["users"])
 app.include_router(patients.router, prefix="/patients", tags=["patients"])
+app.include_router(doses.router, prefix="/doses", tags=["doses"])
 app.include_router(
     notifications.router, prefix="/notifications", tags=["notifications"]
 )
+app.include_router(debug.router, prefix="/debug", tags=["debug"])
+app.include_router(events.router, prefix="/events", tags=["events"])
+app.include_router(sync.router, prefix="/sync", tags=["sync"])
+app.include_router(search.router, prefix="/search", tags=["search"])
+app.include_router(medications.router, prefix="/medications", tags=["medications"])
+app.include_router(stats.router, prefix="/stats", tags=["stats"])
 
 
 @app.get("/check-health", tags=["Health Check"])
@@ -115,7 +184,14 @@ def health_check():
                 "next_run": dose_next_run,
             },
             "pending_doses_found": (last_check["pending_count"] if last_check else 0),
+            "overdue_sweep": get_sweep_stats(),
+            "dose_archive": get_archive_stats(),
+            "daily_stats": get_daily_stats_refresh_stats(),
         },
+        "database_pool": get_pool_status(),
+        "patient_cache": patient_cache.stats(),
+        "medication_catalog": medication_catalog.stats(),
+        "event_stream": event_broker.stats(),
     }
 
 
@@ -131,11 +207,15 @@ def health_check():
 
 def check_doses_job():
     """Tarea programada para verificar dosis individuales pendientes"""
-    db: Session = SessionLocal()
-    try:
-        check_and_send_dose_notifications(db)
-    finally:
-        db.close()
+    run_dose_notification_check()
+
+
+def purge_idempotency_keys_job():
+    """Borra las claves de idempotencia vencidas"""
+    with session_scope() as db:
+        deleted = purge_expired_idempotency_keys(db)
+    if deleted:
+        logger.info(f"🧹 {deleted} claves de idempotencia vencidas eliminadas")
 
 
 if __name__ == "__main__":
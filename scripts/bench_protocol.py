@@ -0,0 +1,177 @@
+"""
+Compara la creación de un protocolo medicación a medicación con apply_protocol.
+
+Uso (sobre una base desechable generada con scripts.seed_clinic):
+    python -m scripts.bench_protocol --patients 20 --runs 3
+
+Ruta por medicación: un add_medication por paciente y medicación, cada uno
+con su bucle de timedelta y su commit. Ruta de protocolo: apply_protocol,
+con las horas calculadas en NumPy e inserciones por lotes en una sola
+transacción. También se mide solo el cálculo de horas y se verifica que
+ambos caminos programen exactamente las mismas dosis. Las medicaciones
+creadas se borran al terminar cada corrida.
+"""
+
+import argparse
+import json
+import statistics
+import time
+from datetime import timedelta
+
+from app.core import clock
+from app.crud.crud_patient import add_medication, apply_protocol
+from app.db.base import session_scope
+from app.models.patient import Dose, Medication, Patient
+from app.schemas.patient import MedicationCreate
+from app.services.schedule import compute_dose_times
+
+# Protocolo postoperatorio típico: analgesia, antibiótico, antiinflamatorio...
+PROTOCOL = [
+    MedicationCreate(
+        name="Meloxicam", dosage="0.1 mg/kg", frequency=24, duration_days=7
+    ),
+    MedicationCreate(
+        name="Amoxicilina", dosage="20 mg/kg", frequency=12, duration_days=14
+    ),
+    MedicationCreate(name="Tramadol", dosage="2 mg/kg", frequency=8, duration_days=5),
+    MedicationCreate(
+        name="Omeprazol", dosage="1 mg/kg", frequency=24, duration_days=14
+    ),
+    MedicationCreate(
+        name="Gabapentina", dosage="10 mg/kg", frequency=8, duration_days=10
+    ),
+    MedicationCreate(
+        name="Buprenorfina", dosage="0.02 mg/kg", frequency=6, duration_days=3
+    ),
+    MedicationCreate(
+        name="Clorhexidina", dosage="tópico", frequency=12, duration_days=21
+    ),
+    MedicationCreate(
+        name="Cefalexina", dosage="22 mg/kg", frequency=12, duration_days=21
+    ),
+]
+
+
+def python_schedule(start_times, frequencies, durations_days):
+    times = []
+    for start_time, frequency, duration_days in zip(
+        start_times, frequencies, durations_days
+    ):
+        total_doses = max(int((duration_days * 24) / frequency), 1)
+        times.extend(
+            start_time + timedelta(hours=frequency * i) for i in range(total_doses)
+        )
+    return times
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return time.perf_counter() - start, result
+
+
+def summary(timings) -> dict:
+    return {
+        "mean_ms": round(statistics.mean(timings) * 1000, 3),
+        "min_ms": round(min(timings) * 1000, 3),
+    }
+
+
+def dose_set(db, medication_ids):
+    rows = (
+        db.query(Medication.patient_id, Medication.name, Dose.scheduled_time)
+        .join(Dose, Dose.medication_id == Medication.id)
+        .filter(Medication.id.in_(medication_ids))
+        .all()
+    )
+    return sorted(rows)
+
+
+def cleanup(db, medication_ids):
+    db.query(Dose).filter(Dose.medication_id.in_(medication_ids)).delete(
+        synchronize_session=False
+    )
+    db.query(Medication).filter(Medication.id.in_(medication_ids)).delete(
+        synchronize_session=False
+    )
+    db.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--patients", type=int, default=20)
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    start = clock.now().replace(minute=0, second=0, microsecond=0)
+    protocol = [
+        medication.model_copy(update={"start_time": start}) for medication in PROTOCOL
+    ]
+
+    with session_scope() as db:
+        patient_ids = [
+            patient_id
+            for (patient_id,) in db.query(Patient.id).limit(args.patients).all()
+        ]
+        if not patient_ids:
+            raise SystemExit("No hay pacientes; ejecutar antes scripts.seed_clinic")
+
+        # Solo el cálculo de horas, para todas las medicaciones del lote
+        columns = (
+            [start] * len(protocol) * len(patient_ids),
+            [m.frequency for m in protocol] * len(patient_ids),
+            [m.duration_days for m in protocol] * len(patient_ids),
+        )
+        loop_times, numpy_times = [], []
+        for _ in range(args.runs):
+            elapsed, expected = timed(lambda: python_schedule(*columns))
+            loop_times.append(elapsed)
+            elapsed, (_, computed) = timed(lambda: compute_dose_times(*columns))
+            numpy_times.append(elapsed)
+
+        per_medication, protocol_times = [], []
+        identical = True
+        for _ in range(args.runs):
+            elapsed, created = timed(
+                lambda: [
+                    add_medication(db, patient_id, medication).id
+                    for patient_id in patient_ids
+                    for medication in protocol
+                ]
+            )
+            per_medication.append(elapsed)
+            baseline = dose_set(db, created)
+            cleanup(db, created)
+
+            elapsed, results = timed(
+                lambda: apply_protocol(db, patient_ids, protocol, start)
+            )
+            protocol_times.append(elapsed)
+            created = [i for result in results for i in result["medication_ids"]]
+            identical = identical and dose_set(db, created) == baseline
+            cleanup(db, created)
+
+    result = {
+        "patients": len(patient_ids),
+        "medications": len(protocol) * len(patient_ids),
+        "doses": len(expected),
+        "runs": args.runs,
+        "identical_schedule": identical and computed == expected,
+        "schedule_python_loop": summary(loop_times),
+        "schedule_numpy": summary(numpy_times),
+        "add_medication_each": summary(per_medication),
+        "apply_protocol": summary(protocol_times),
+    }
+    result["schedule_speedup"] = round(
+        result["schedule_python_loop"]["mean_ms"] / result["schedule_numpy"]["mean_ms"],
+        2,
+    )
+    result["end_to_end_speedup"] = round(
+        result["add_medication_each"]["mean_ms"] / result["apply_protocol"]["mean_ms"],
+        2,
+    )
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Compara la serialización por defecto de FastAPI con model_response.
+
+Uso (sobre una base generada con scripts.seed_clinic):
+    python -m scripts.bench_serialization --limit 100 --runs 50
+
+Ruta por defecto: validación del response_model, jsonable_encoder y
+json.dumps en JSONResponse. Ruta rápida: TypeAdapter.dump_json en
+pydantic-core. Se miden sobre los mismos objetos ORM ya cargados, así que
+solo se compara el coste de serializar, y se verifica que el JSON resultante
+sea idéntico.
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+import time
+from typing import List
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_model_field
+
+from app.api.responses import dump_json
+from app.crud.crud_patient import get_patients
+from app.db.base import session_scope
+from app.schemas.patient import PatientRead
+
+
+def fastapi_default(field, content) -> bytes:
+    encoded = asyncio.run(
+        serialize_response(field=field, response_content=content, is_coroutine=True)
+    )
+    return JSONResponse(content=encoded).body
+
+
+def fast_path(type_, content) -> bytes:
+    return dump_json(type_, content)
+
+
+def measure(fn, runs: int) -> dict:
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        body = fn()
+        timings.append(time.perf_counter() - start)
+    return {
+        "bytes": len(body),
+        "mean_ms": round(statistics.mean(timings) * 1000, 3),
+        "p50_ms": round(statistics.median(timings) * 1000, 3),
+        "min_ms": round(min(timings) * 1000, 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--limit", type=int, default=100, help="pacientes a serializar")
+    parser.add_argument("--runs", type=int, default=50)
+    args = parser.parse_args()
+
+    type_ = List[PatientRead]
+    field = create_model_field(name="Response_bench", type_=type_, mode="serialization")
+
+    with session_scope() as db:
+        patients = get_patients(db, 0, args.limit, None)
+        default_body = fastapi_default(field, patients)
+        fast_body = fast_path(type_, patients)
+
+        result = {
+            "patients": len(patients),
+            "runs": args.runs,
+            "identical_output": json.loads(default_body) == json.loads(fast_body),
+            "fastapi_default": measure(
+                lambda: fastapi_default(field, patients), args.runs
+            ),
+            "model_response": measure(lambda: fast_path(type_, patients), args.runs),
+        }
+
+    result["speedup"] = round(
+        result["fastapi_default"]["mean_ms"] / result["model_response"]["mean_ms"], 2
+    )
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,243 @@
+"""
+Benchmark de los endpoints principales y del verificador de dosis.
+
+Uso (sobre una base generada con scripts.seed_clinic, nunca sobre producción):
+    python -m scripts.benchmark --requests 200 --concurrency 4 --output bench.json
+
+Las peticiones se hacen en proceso con httpx.ASGITransport, sin red ni
+scheduler. El resultado es JSON para poder comparar entre commits.
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import subprocess
+import time
+from datetime import datetime
+
+import httpx
+from sqlalchemy import func
+
+from app.core.config import settings
+from app.db.base import session_scope
+from app.models.patient import Dose, Medication, Note, Patient
+from app.models.user import User
+from app.services.notifications import check_and_send_dose_notifications
+from app.services.patient_cache import patient_cache
+from scripts.seed_clinic import SEED_PASSWORD
+
+
+def percentile(sorted_values: list, pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    last = len(sorted_values) - 1
+    index = min(last, int(round(pct / 100 * last)))
+    return sorted_values[index]
+
+
+def summarize(latencies: list, elapsed: float, query_counts: list = None) -> dict:
+    values = sorted(latencies)
+    result = {
+        "requests": len(values),
+        "throughput_rps": round(len(values) / elapsed, 2) if elapsed else 0.0,
+        "latency_ms": {
+            "min": round(values[0] * 1000, 3) if values else 0.0,
+            "p50": round(percentile(values, 50) * 1000, 3),
+            "p90": round(percentile(values, 90) * 1000, 3),
+            "p99": round(percentile(values, 99) * 1000, 3),
+            "max": round(values[-1] * 1000, 3) if values else 0.0,
+        },
+    }
+    if query_counts:
+        result["queries_per_request"] = max(query_counts)
+    return result
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], text=True
+        ).strip()
+    except Exception:
+        return "unknown"
+
+
+def dataset_summary() -> dict:
+    with session_scope() as db:
+        return {
+            "users": db.query(func.count(User.id)).scalar(),
+            "patients": db.query(func.count(Patient.id)).scalar(),
+            "medications": db.query(func.count(Medication.id)).scalar(),
+            "doses": db.query(func.count(Dose.id)).scalar(),
+            "pending_doses": db.query(func.count(Dose.id))
+            .filter(Dose.status == "pending")
+            .scalar(),
+            "notes": db.query(func.count(Note.id)).scalar(),
+        }
+
+
+def pick_targets(assistant_username: str, count: int) -> dict:
+    """Paciente y dosis pendientes del asistente usado en el benchmark"""
+    with session_scope() as db:
+        assistant = db.query(User).filter(User.username == assistant_username).first()
+        patient_id = (
+            db.query(Patient.id)
+            .filter(Patient.assistant_id == assistant.id)
+            .order_by(Patient.id)
+            .limit(1)
+            .scalar()
+        )
+        dose_ids = [
+            dose_id
+            for (dose_id,) in db.query(Dose.id)
+            .join(Medication, Dose.medication_id == Medication.id)
+            .join(Patient, Medication.patient_id == Patient.id)
+            .filter(Patient.assistant_id == assistant.id, Dose.status == "pending")
+            .order_by(Dose.scheduled_time.asc())
+            .limit(count)
+        ]
+    return {"patient_id": patient_id, "dose_ids": dose_ids}
+
+
+async def login(client: httpx.AsyncClient, username: str, password: str) -> dict:
+    response = await client.post(
+        "/auth/login", data={"username": username, "password": password}
+    )
+    response.raise_for_status()
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+async def run_route(
+    client: httpx.AsyncClient,
+    method: str,
+    urls: list,
+    headers: dict,
+    concurrency: int,
+    body: dict = None,
+) -> dict:
+    latencies = []
+    query_counts = []
+    queue = list(urls)
+
+    async def worker():
+        while queue:
+            url = queue.pop()
+            start = time.perf_counter()
+            response = await client.request(method, url, headers=headers, json=body)
+            latencies.append(time.perf_counter() - start)
+            response.raise_for_status()
+            if "x-query-count" in response.headers:
+                query_counts.append(int(response.headers["x-query-count"]))
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return summarize(latencies, time.perf_counter() - start, query_counts)
+
+
+async def benchmark_routes(args) -> dict:
+    from main import app
+
+    targets = pick_targets(args.assistant, args.requests)
+    patient_id = targets["patient_id"]
+    transport = httpx.ASGITransport(app=app)
+    results = {}
+    async with httpx.AsyncClient(
+        transport=transport, base_url="http://bench"
+    ) as client:
+        admin = await login(client, args.admin, args.admin_password)
+        assistant = await login(client, args.assistant, SEED_PASSWORD)
+
+        read_routes = [
+            ("GET /patients/ (admin)", "/patients/", admin),
+            ("GET /patients/ (assistant)", "/patients/", assistant),
+            ("GET /patients/{id}", f"/patients/{patient_id}", assistant),
+            (
+                "GET /patients/{id}/pending-doses/",
+                f"/patients/{patient_id}/pending-doses/",
+                assistant,
+            ),
+            ("GET /users/assistants", "/users/assistants", admin),
+        ]
+        for name, url, headers in read_routes:
+            # Calentamiento: caches de SQLite y del pool
+            await client.get(url, headers=headers)
+            results[name] = await run_route(
+                client, "GET", [url] * args.requests, headers, args.concurrency
+            )
+
+        # Escritura: cada petición administra una dosis pendiente distinta
+        dose_urls = [f"/patients/doses/{d}/administer" for d in targets["dose_ids"]]
+        if dose_urls:
+            results["POST /patients/doses/{id}/administer"] = await run_route(
+                client, "POST", dose_urls, assistant, args.concurrency, body={}
+            )
+    return results
+
+
+def benchmark_notifier(runs: int) -> dict:
+    """Tiempo de una verificación completa con todas las dosis vencidas sin notificar"""
+    latencies = []
+    due = 0
+    for _ in range(runs):
+        with session_scope() as db:
+            db.query(Dose).filter(Dose.status == "pending").update(
+                {"notification_sent": False}
+            )
+            db.commit()
+            due = (
+                db.query(func.count(Dose.id))
+                .filter(Dose.status == "pending", Dose.scheduled_time <= datetime.now())
+                .scalar()
+            )
+            start = time.perf_counter()
+            check_and_send_dose_notifications(db)
+            latencies.append(time.perf_counter() - start)
+    result = summarize(latencies, sum(latencies))
+    result["ticks"] = result.pop("requests")
+    result["ticks_per_second"] = result.pop("throughput_rps")
+    result["due_doses_per_tick"] = due
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de la API de MediVet")
+    parser.add_argument("--requests", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=1)
+    parser.add_argument("--notifier-runs", type=int, default=5)
+    parser.add_argument("--admin", default="admin")
+    parser.add_argument("--admin-password", default="admin123")
+    parser.add_argument("--assistant", default="asistente_0")
+    parser.add_argument("--output", help="Archivo JSON de resultados")
+    args = parser.parse_args()
+
+    # Nunca enviar WhatsApp reales desde el benchmark
+    settings.TWILIO_ACCOUNT_SID = None
+
+    # Los envíos fallidos de WhatsApp se registran como error: silenciarlos
+    logging.disable(logging.ERROR)
+
+    report = {
+        "commit": git_commit(),
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "parameters": {
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "notifier_runs": args.notifier_runs,
+        },
+        "dataset": dataset_summary(),
+        "routes": asyncio.run(benchmark_routes(args)),
+        # GET /patients/{id} se sirve desde la caché tras la primera lectura
+        "patient_cache": patient_cache.stats(),
+        "notifier": benchmark_notifier(args.notifier_runs),
+    }
+
+    output = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+    print(output)
+
+
+if __name__ == "__main__":
+    main()
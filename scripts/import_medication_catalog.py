@@ -0,0 +1,45 @@
+"""
+Importa una lista de medicaciones al catálogo del autocompletado.
+
+Uso:
+    python -m scripts.import_medication_catalog vademecum.csv
+
+El CSV tiene el nombre en la primera columna y, opcionalmente, la
+dosificación en la segunda; una primera fila "name,dosage" se ignora. Los
+pares que ya existen no se duplican. Un servidor en marcha los verá al
+reiniciarse; para añadirlos sin reiniciar usar POST /medications/catalog/import.
+"""
+
+import argparse
+import csv
+
+from app.crud.crud_medication_catalog import import_catalog_entries
+from app.db.base import session_scope
+from app.db.init_db import init_db
+
+
+def read_catalog_csv(path: str) -> list:
+    with open(path, newline="", encoding="utf-8") as handle:
+        rows = [row for row in csv.reader(handle) if row and row[0].strip()]
+    if rows and [cell.strip().lower() for cell in rows[0][:2]] in (
+        ["name"],
+        ["name", "dosage"],
+    ):
+        rows = rows[1:]
+    return [(row[0], row[1] if len(row) > 1 else "") for row in rows]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("path", help="CSV con nombre y dosificación")
+    args = parser.parse_args()
+
+    pairs = read_catalog_csv(args.path)
+    with session_scope() as db:
+        init_db(db)
+        added = import_catalog_entries(db, pairs)
+    print({"read": len(pairs), "added": len(added)})
+
+
+if __name__ == "__main__":
+    main()
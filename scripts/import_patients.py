@@ -0,0 +1,45 @@
+"""
+Da de alta pacientes con sus medicaciones y notas desde un CSV o NDJSON.
+
+Uso:
+    python -m scripts.import_patients clinica.csv --user admin
+    python -m scripts.import_patients clinica.ndjson
+
+El formato se deduce de la extensión (o --format) y se describe en
+app/services/patient_import.py. El archivo se procesa línea a línea en
+transacciones por lotes; los pacientes con errores se informan al final
+sin detener la importación. Equivale a POST /patients/import.
+"""
+
+import argparse
+import json
+import sys
+
+from app.db.base import session_scope
+from app.db.init_db import init_db
+from app.models.user import User
+from app.services.patient_import import import_patients
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("path", help="CSV o NDJSON con los pacientes")
+    parser.add_argument("--format", choices=["csv", "ndjson"])
+    parser.add_argument(
+        "--user", default="admin", help="usuario que figura como creador"
+    )
+    args = parser.parse_args()
+    format = args.format or ("csv" if args.path.lower().endswith(".csv") else "ndjson")
+
+    with session_scope() as db:
+        init_db(db)
+        user = db.query(User).filter(User.username == args.user).first()
+        if user is None:
+            sys.exit(f"Usuario no encontrado: {args.user}")
+        with open(args.path, newline="", encoding="utf-8-sig") as handle:
+            summary = import_patients(db, handle, format, user.id)
+    print(json.dumps(summary, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
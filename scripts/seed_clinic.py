@@ -0,0 +1,199 @@
+"""
+Genera una clínica sintética usando las funciones reales de crud_patient.
+
+Uso:
+    python -m scripts.seed_clinic --users 20 --patients-per-assistant 15
+
+La base de datos es la configurada en DATABASE_URL. Los asistentes se crean
+como asistente_<n> y los doctores como doctor_<n>, todos con la contraseña
+SEED_PASSWORD, para que el benchmark pueda autenticarse con ellos.
+"""
+
+import argparse
+import logging
+import random
+from datetime import datetime, timedelta
+
+from sqlalchemy.orm import Session
+
+from app.crud.crud_patient import (
+    add_medication,
+    add_note,
+    administer_dose,
+    create_patient,
+)
+from app.crud.crud_user import create_user, get_user_by_username
+from app.db.base import session_scope
+from app.db.init_db import init_db
+from app.models.patient import Dose, Medication, Patient
+from app.schemas.patient import MedicationCreate, NoteCreate, PatientCreate
+from app.schemas.user import UserCreate
+
+SEED_PASSWORD = "medivet-seed"
+
+SPECIES = ["perro", "gato", "conejo", "hurón", "ave", "caballo"]
+PATIENT_NAMES = [
+    "Firulais", "Luna", "Max", "Rocky", "Nala", "Toby", "Kira", "Simba",
+    "Coco", "Lola", "Bruno", "Mía", "Thor", "Canela", "Manchas", "Pelusa",
+]
+# (nombre, dosis) de tratamientos frecuentes
+MEDICATIONS = [
+    ("Amoxicilina", "250 mg"),
+    ("Meloxicam", "0.1 mg/kg"),
+    ("Metronidazol", "15 mg/kg"),
+    ("Tramadol", "2 mg/kg"),
+    ("Omeprazol", "1 mg/kg"),
+    ("Cefalexina", "22 mg/kg"),
+    ("Prednisolona", "0.5 mg/kg"),
+    ("Furosemida", "2 mg/kg"),
+    ("Suero fisiológico", "50 ml/h"),
+    ("Maropitant", "1 mg/kg"),
+]
+# Frecuencias en horas y duraciones en días con pesos aproximados a la práctica
+FREQUENCIES = ([4, 6, 8, 12, 24], [1, 2, 4, 4, 3])
+DURATIONS = ([1, 3, 5, 7, 10, 14], [2, 4, 4, 3, 2, 1])
+NOTES = [
+    "Come con normalidad",
+    "Ligera fiebre por la mañana",
+    "Herida limpia, sin signos de infección",
+    "Vomitó después de la toma",
+    "Más activo que ayer",
+    "Revisar vendaje en el próximo turno",
+]
+
+
+def _get_or_create_user(db: Session, username: str, role: str, index: int):
+    user = get_user_by_username(db, username)
+    if user:
+        return user
+    return create_user(
+        db,
+        UserCreate(
+            username=username,
+            email=f"{username}@medivet.example.com",
+            password=SEED_PASSWORD,
+            full_name=f"{role.capitalize()} {index}",
+            role=role,
+            phone=f"+5068{index:07d}",
+        ),
+    )
+
+
+def seed_clinic(
+    db: Session,
+    users: int,
+    patients_per_assistant: int,
+    doctors: int = 2,
+    max_medications: int = 3,
+    history_days: int = 7,
+    administered_ratio: float = 0.85,
+    seed: int = 42,
+    now: datetime = None,
+) -> dict:
+    """
+    Crea `users` asistentes, `doctors` doctores y `patients_per_assistant`
+    pacientes por asistente, cada uno con 1..max_medications tratamientos
+    iniciados en los últimos `history_days` días. Las dosis ya vencidas se
+    administran con probabilidad `administered_ratio`.
+    """
+    rng = random.Random(seed)
+    now = now or datetime.now()
+    summary = {"assistants": 0, "doctors": 0, "patients": 0, "medications": 0}
+
+    doctor_users = [
+        _get_or_create_user(db, f"doctor_{i}", "doctor", i) for i in range(doctors)
+    ]
+    summary["doctors"] = len(doctor_users)
+
+    for a in range(users):
+        assistant = _get_or_create_user(db, f"asistente_{a}", "assistant", 1000 + a)
+        summary["assistants"] += 1
+        creator = rng.choice(doctor_users) if doctor_users else assistant
+
+        for p in range(patients_per_assistant):
+            patient = create_patient(
+                db,
+                PatientCreate(
+                    name=f"{rng.choice(PATIENT_NAMES)} {a}-{p}",
+                    species=rng.choice(SPECIES),
+                    assistant_id=assistant.id,
+                    assistant_name=assistant.full_name,
+                    notes=[NoteCreate(content=rng.choice(NOTES))],
+                ),
+                user_id=creator.id,
+            )
+            summary["patients"] += 1
+
+            for _ in range(rng.randint(1, max_medications)):
+                name, dosage = rng.choice(MEDICATIONS)
+                start_time = now - timedelta(
+                    minutes=rng.randint(0, history_days * 24 * 60)
+                )
+                add_medication(
+                    db,
+                    patient.id,
+                    MedicationCreate(
+                        name=name,
+                        dosage=dosage,
+                        frequency=rng.choices(*FREQUENCIES)[0],
+                        duration_days=rng.choices(*DURATIONS)[0],
+                        start_time=start_time.replace(microsecond=0),
+                    ),
+                )
+                summary["medications"] += 1
+
+            for _ in range(rng.randint(0, 3)):
+                add_note(
+                    db, patient.id, NoteCreate(content=rng.choice(NOTES)), assistant.id
+                )
+
+        # Administrar la mayor parte de las dosis ya vencidas de este asistente
+        due_doses = (
+            db.query(Dose.id)
+            .join(Medication, Dose.medication_id == Medication.id)
+            .join(Patient, Medication.patient_id == Patient.id)
+            .filter(
+                Patient.assistant_id == assistant.id,
+                Dose.status == "pending",
+                Dose.scheduled_time <= now,
+            )
+            .order_by(Dose.scheduled_time.asc())
+            .all()
+        )
+        for (dose_id,) in due_doses:
+            if rng.random() < administered_ratio:
+                administer_dose(db, dose_id, assistant.id)
+
+    summary["doses"] = db.query(Dose).count()
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Genera datos sintéticos de clínica")
+    parser.add_argument("--users", type=int, default=10, help="Asistentes a crear")
+    parser.add_argument("--patients-per-assistant", type=int, default=10)
+    parser.add_argument("--doctors", type=int, default=2)
+    parser.add_argument("--max-medications", type=int, default=3)
+    parser.add_argument("--history-days", type=int, default=7)
+    parser.add_argument("--administered-ratio", type=float, default=0.85)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    logging.getLogger("app.services.notifications").setLevel(logging.WARNING)
+    with session_scope() as db:
+        init_db(db)
+        summary = seed_clinic(
+            db,
+            users=args.users,
+            patients_per_assistant=args.patients_per_assistant,
+            doctors=args.doctors,
+            max_medications=args.max_medications,
+            history_days=args.history_days,
+            administered_ratio=args.administered_ratio,
+            seed=args.seed,
+        )
+    print(summary)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,216 @@
+"""
+Prueba de resistencia del verificador de dosis con reloj simulado.
+
+Uso (DATABASE_URL debe apuntar a una base descartable):
+    python -m scripts.soak_scheduler --medications 2000 --days 7 --output soak.json
+
+Crea los tratamientos con add_medication, instala un VirtualClock y avanza
+minuto a minuto ejecutando check_and_send_dose_notifications, con un
+transporte falso que solo cuenta envíos. Las asistentes administran una
+parte de las dosis con algunos minutos de retraso. Al final informa el
+coste por tick a lo largo del tiempo, notificaciones duplicadas, perdidas
+o tardías y el uso de memoria.
+"""
+
+import argparse
+import heapq
+import json
+import logging
+import random
+import resource
+import time
+import tracemalloc
+from collections import Counter
+from datetime import datetime, timedelta
+
+from app.core import clock
+from app.core.clock import VirtualClock
+from app.crud.crud_patient import add_medication, administer_dose, create_patient
+from app.db.base import session_scope
+from app.db.init_db import init_db
+from app.db.query_counter import QueryCounter
+from app.models.patient import Dose
+from app.models.user import User
+from app.schemas.patient import MedicationCreate, PatientCreate
+from app.services.notifications import (
+    check_and_send_dose_notifications,
+    set_notification_transport,
+)
+from scripts.seed_clinic import FREQUENCIES, DURATIONS, _get_or_create_user
+
+# El verificador notifica dosis con al menos 5 minutos de retraso
+NOTIFICATION_DELAY = timedelta(minutes=5)
+
+
+class FakeTransport:
+    """Transporte de notificaciones que solo cuenta los envíos"""
+
+    def __init__(self):
+        self.sent = 0
+
+    def __call__(self, to_number: str, variables: dict) -> bool:
+        self.sent += 1
+        return True
+
+
+def build_treatments(db, medications: int, patients: int, start: datetime, rng):
+    assistant = _get_or_create_user(db, "asistente_soak", "assistant", 9000)
+    admin = db.query(User).filter(User.role == "admin").first()
+    patient_ids = [
+        create_patient(
+            db,
+            PatientCreate(
+                name=f"Soak {i}", species="perro", assistant_id=assistant.id
+            ),
+            user_id=admin.id,
+        ).id
+        for i in range(patients)
+    ]
+    for _ in range(medications):
+        add_medication(
+            db,
+            rng.choice(patient_ids),
+            MedicationCreate(
+                name="Tratamiento",
+                dosage="1 ml",
+                frequency=rng.choices(*FREQUENCIES)[0],
+                duration_days=rng.choices(*DURATIONS)[0],
+                # Inicios repartidos a lo largo del primer día
+                start_time=start + timedelta(minutes=rng.randint(0, 24 * 60)),
+            ),
+        )
+    return assistant.id
+
+
+def run_soak(args) -> dict:
+    rng = random.Random(args.seed)
+    start = datetime(2025, 1, 6, 0, 0)
+    virtual_clock = VirtualClock(start)
+    transport = FakeTransport()
+    clock.set_clock(virtual_clock)
+    set_notification_transport(transport)
+
+    try:
+        with session_scope() as db:
+            init_db(db)
+            assistant_id = build_treatments(
+                db, args.medications, args.patients, start, rng
+            )
+            total_doses = db.query(Dose).count()
+
+        notified_at = {}
+        notification_counts = Counter()
+        # Dosis vencidas que se administrarán, con la hora simulada de administración
+        administrations = []
+        per_day = []
+        day_stats = None
+        tracemalloc.start()
+
+        ticks = args.days * 24 * 60
+        for tick in range(ticks):
+            now = virtual_clock.advance(minutes=1)
+            if tick % (24 * 60) == 0:
+                day_stats = {
+                    "day": tick // (24 * 60) + 1,
+                    "ticks": 0,
+                    "seconds": 0.0,
+                    "max_tick_ms": 0.0,
+                    "queries": 0,
+                    "notified": 0,
+                }
+                per_day.append(day_stats)
+
+            with session_scope() as db:
+                # Asistentes administrando dosis con algunos minutos de retraso
+                while administrations and administrations[0][0] <= now:
+                    _, dose_id = heapq.heappop(administrations)
+                    administer_dose(db, dose_id, assistant_id)
+
+                with QueryCounter() as counter:
+                    tick_start = time.perf_counter()
+                    dose_ids = check_and_send_dose_notifications(db)
+                    elapsed = time.perf_counter() - tick_start
+
+            for dose_id in dose_ids:
+                notification_counts[dose_id] += 1
+                notified_at.setdefault(dose_id, now)
+                if rng.random() < args.administered_ratio:
+                    heapq.heappush(
+                        administrations,
+                        (now + timedelta(minutes=rng.randint(0, 30)), dose_id),
+                    )
+
+            day_stats["ticks"] += 1
+            day_stats["seconds"] += elapsed
+            day_stats["max_tick_ms"] = max(day_stats["max_tick_ms"], elapsed * 1000)
+            day_stats["queries"] += counter.count
+            day_stats["notified"] += len(dose_ids)
+            if tick % (24 * 60) == 24 * 60 - 1:
+                current, peak = tracemalloc.get_traced_memory()
+                day_stats["traced_memory_kb"] = current // 1024
+                day_stats["traced_peak_kb"] = peak // 1024
+
+        tracemalloc.stop()
+        end = virtual_clock.now()
+
+        # Dosis que debían notificarse antes del final y nunca se notificaron
+        with session_scope() as db:
+            due = db.query(Dose.id, Dose.scheduled_time).filter(
+                Dose.scheduled_time <= end - NOTIFICATION_DELAY - timedelta(minutes=1)
+            )
+            scheduled = {dose_id: scheduled_time for dose_id, scheduled_time in due}
+        missed = [d for d in scheduled if d not in notified_at]
+        late = [
+            d
+            for d, at in notified_at.items()
+            if d in scheduled
+            and at - scheduled[d] > NOTIFICATION_DELAY + timedelta(minutes=1)
+        ]
+    finally:
+        clock.set_clock()
+        set_notification_transport()
+
+    for day in per_day:
+        day["avg_tick_ms"] = round(day.pop("seconds") / day["ticks"] * 1000, 3)
+        day["max_tick_ms"] = round(day["max_tick_ms"], 3)
+        day["avg_queries_per_tick"] = round(day.pop("queries") / day["ticks"], 2)
+
+    first, last = per_day[0]["avg_tick_ms"], per_day[-1]["avg_tick_ms"]
+    return {
+        "parameters": vars(args),
+        "total_doses": total_doses,
+        "ticks": ticks,
+        "notifications": {
+            "doses_notified": len(notification_counts),
+            "messages_sent": transport.sent,
+            "duplicates": sum(1 for c in notification_counts.values() if c > 1),
+            "missed": len(missed),
+            "late": len(late),
+        },
+        "tick_cost_growth": round(last / first, 3) if first else None,
+        "per_day": per_day,
+        "max_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Soak test del scheduler de dosis")
+    parser.add_argument("--medications", type=int, default=2000)
+    parser.add_argument("--patients", type=int, default=200)
+    parser.add_argument("--days", type=int, default=7)
+    parser.add_argument("--administered-ratio", type=float, default=0.9)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="Archivo JSON de resultados")
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+    report = run_soak(args)
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+    print(output)
+
+
+if __name__ == "__main__":
+    main()
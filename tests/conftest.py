@@ -0,0 +1,152 @@
+"""
+Fixtures comunes: una base SQLite temporal con una clínica pequeña y un
+cliente de la API sin lifespan (sin scheduler ni jobs en segundo plano).
+"""
+
+import os
+import tempfile
+from contextlib import contextmanager
+from datetime import timedelta
+
+# La configuración se lee al importar la app: fijarla antes
+_database_dir = tempfile.mkdtemp(prefix="medivet-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{_database_dir}/test.db"
+os.environ.setdefault("SECRET_KEY", "test-secret-key")
+for _name in (
+    "TWILIO_ACCOUNT_SID",
+    "TWILIO_AUTH_TOKEN",
+    "TWILIO_PHONE_NUMBER",
+    "TWILIO_TEMPLATE_ID",
+):
+    os.environ.setdefault(_name, "")
+
+import pytest  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+
+from app.core import clock  # noqa: E402
+from app.crud.crud_patient import add_medication, add_note, create_patient  # noqa: E402
+from app.crud.crud_user import create_user  # noqa: E402
+from app.db.base import session_scope  # noqa: E402
+from app.db.init_db import init_db  # noqa: E402
+from app.db.query_counter import QueryCounter  # noqa: E402
+from app.schemas.patient import (
+    MedicationCreate,
+    NoteCreate,
+    PatientCreate,
+)  # noqa: E402
+from app.schemas.user import UserCreate  # noqa: E402
+from main import app  # noqa: E402
+
+ADMIN_PASSWORD = "admin123"
+ASSISTANT_PASSWORD = "asistente123"
+# Tamaño de la clínica: suficiente para que un patrón N+1 supere cualquier
+# presupuesto
+ASSISTANTS = 2
+PATIENTS_PER_ASSISTANT = 4
+MEDICATIONS_PER_PATIENT = 2
+
+
+@pytest.fixture(scope="session")
+def clinic():
+    """Asistentes, pacientes, medicaciones con dosis vencidas y notas"""
+    with session_scope() as db:
+        init_db(db)
+        started = clock.now() - timedelta(hours=20)
+        assistant_ids, patient_ids, medication_ids = [], [], []
+        for number in range(ASSISTANTS):
+            assistant = create_user(
+                db,
+                UserCreate(
+                    username=f"asistente_{number}",
+                    email=f"asistente_{number}@example.com",
+                    password=ASSISTANT_PASSWORD,
+                    full_name=f"Asistente {number}",
+                    role="assistant",
+                    phone=f"+5060000000{number}",
+                ),
+            )
+            assistant_ids.append(assistant.id)
+            for position in range(PATIENTS_PER_ASSISTANT):
+                patient = create_patient(
+                    db,
+                    PatientCreate(
+                        name=f"Paciente {number}-{position}",
+                        species="perro",
+                        assistant_id=assistant.id,
+                    ),
+                    user_id=1,
+                )
+                patient_ids.append(patient.id)
+                for dose_number in range(MEDICATIONS_PER_PATIENT):
+                    medication = add_medication(
+                        db,
+                        patient.id,
+                        MedicationCreate(
+                            name=f"Amoxicilina {dose_number}",
+                            dosage="5ml",
+                            frequency=4,
+                            duration_days=2,
+                            start_time=started,
+                        ),
+                    )
+                    medication_ids.append(medication.id)
+                add_note(db, patient.id, NoteCreate(content="Control diario"), 1)
+    return {
+        "assistant_ids": assistant_ids,
+        "patient_ids": patient_ids,
+        "medication_ids": medication_ids,
+    }
+
+
+@pytest.fixture(scope="session")
+def client(clinic):
+    return TestClient(app)
+
+
+def _login(client, username: str, password: str) -> dict:
+    response = client.post(
+        "/auth/login", data={"username": username, "password": password}
+    )
+    assert response.status_code == 200, response.text
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+@pytest.fixture(scope="session")
+def admin_headers(client):
+    return _login(client, "admin", ADMIN_PASSWORD)
+
+
+@pytest.fixture(scope="session")
+def assistant_headers(client):
+    return _login(client, "asistente_0", ASSISTANT_PASSWORD)
+
+
+@pytest.fixture
+def db():
+    with session_scope() as session:
+        yield session
+
+
+@pytest.fixture
+def max_queries():
+    """
+    Context manager que falla si el bloque ejecuta más de `budget`
+    sentencias SQL, mostrando las ejecutadas:
+
+        with max_queries(5):
+            check_and_send_dose_notifications(db)
+    """
+
+    @contextmanager
+    def check(budget: int, label: str = "bloque"):
+        with QueryCounter(capture_statements=True) as counter:
+            yield counter
+        statements = "\n".join(
+            f"  {statement['sql']}" for statement in counter.statements
+        )
+        assert counter.count <= budget, (
+            f"{label} ejecutó {counter.count} consultas "
+            f"(presupuesto: {budget}):\n{statements}"
+        )
+
+    return check
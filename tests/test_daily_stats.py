@@ -0,0 +1,49 @@
+"""
+Resumen diario de dosis: los días cerrados recientes se vuelven a resumir en
+cada actualización para recoger los cambios tardíos.
+"""
+
+from datetime import datetime, timedelta
+
+from app.models.daily_stats import DoseDailyStats
+from app.models.patient import Dose, Medication
+from app.services.daily_stats import last_closed_day, refresh_daily_stats
+
+
+def _summary(db, day, medication_name: str) -> DoseDailyStats:
+    db.expire_all()
+    return (
+        db.query(DoseDailyStats)
+        .filter(
+            DoseDailyStats.day == day,
+            DoseDailyStats.medication_name == medication_name,
+        )
+        .one()
+    )
+
+
+def test_refresh_resummarizes_recent_days(db, clinic):
+    medication = db.get(Medication, clinic["medication_ids"][0])
+    day = last_closed_day() - timedelta(days=1)
+    dose = Dose(
+        medication_id=medication.id,
+        scheduled_time=datetime.combine(day, datetime.min.time()) + timedelta(hours=9),
+        status="missed",
+    )
+    db.add(dose)
+    db.commit()
+
+    refresh_daily_stats(db)
+    summary = _summary(db, day, medication.name)
+    administered, missed = summary.administered, summary.missed
+    assert missed >= 1
+
+    # Administración registrada tarde, después de resumir el día
+    dose.status = "administered"
+    dose.administration_time = dose.scheduled_time + timedelta(minutes=20)
+    db.commit()
+
+    refresh_daily_stats(db)
+    summary = _summary(db, day, medication.name)
+    assert summary.administered == administered + 1
+    assert summary.missed == missed - 1
@@ -0,0 +1,61 @@
+"""
+Exportación de dosis: se recorre por páginas (scheduled_time, id), cada una
+en su propia transacción, sin perder ni repetir filas.
+"""
+
+import orjson
+
+from app.models.patient import Dose
+from app.services import dose_export
+
+
+def _export(format: str, **filters) -> bytes:
+    return b"".join(dose_export.stream_dose_export(format, **filters))
+
+
+def test_export_pages_cover_every_dose_once(db, clinic, monkeypatch):
+    expected = db.query(Dose).count()
+    monkeypatch.setattr(dose_export, "EXPORT_BATCH_SIZE", 7)
+
+    rows = [orjson.loads(line) for line in _export("ndjson").splitlines()]
+    keys = [(row["scheduled_time"], row["dose_id"]) for row in rows]
+    assert len(rows) == expected
+    assert keys == sorted(keys)
+    assert len(set(keys)) == len(keys)
+
+    csv_lines = _export("csv", patient_id=clinic["patient_ids"][0]).splitlines()
+    assert csv_lines[0].startswith(b"dose_id,patient_id")
+    assert len(csv_lines) - 1 == (
+        db.query(Dose)
+        .filter(Dose.medication.has(patient_id=clinic["patient_ids"][0]))
+        .count()
+    )
+
+
+def test_export_does_not_block_writes(db, clinic, monkeypatch):
+    monkeypatch.setattr(dose_export, "EXPORT_BATCH_SIZE", 5)
+    chunks = dose_export.stream_dose_export("ndjson")
+    next(chunks)
+
+    # Con la exportación a medias, otra sesión puede escribir
+    dose = db.query(Dose).first()
+    dose.notes = "Revisada durante la exportación"
+    db.commit()
+
+    assert sum(chunk.count(b"\n") for chunk in chunks) > 0
+
+
+def test_export_routes(client, admin_headers, clinic):
+    response = client.get("/doses/export?format=csv", headers=admin_headers)
+    assert response.status_code == 200, response.text
+    assert response.headers["content-type"].startswith("text/csv")
+
+    patient_id = clinic["patient_ids"][0]
+    response = client.get(
+        f"/patients/{patient_id}/doses/export?format=ndjson", headers=admin_headers
+    )
+    assert response.status_code == 200, response.text
+    assert all(
+        orjson.loads(line)["patient_id"] == patient_id
+        for line in response.content.splitlines()
+    )
@@ -0,0 +1,91 @@
+"""
+POST /doses/administer: administración por lotes, también cuando otra
+petición administra la misma dosis entre la validación y el UPDATE.
+"""
+
+from datetime import datetime
+
+from sqlalchemy import event
+
+from app.db.base import engine
+from app.models.patient import Dose
+from app.services.events import DOSE_ADMINISTERED, event_broker
+
+
+def _pending_doses(db, clinic, count: int) -> list:
+    return (
+        db.query(Dose)
+        .filter(
+            Dose.status == "pending",
+            Dose.medication_id.in_(clinic["medication_ids"]),
+        )
+        .order_by(Dose.scheduled_time.desc())
+        .limit(count)
+        .all()
+    )
+
+
+def _published(since: int) -> list:
+    return [
+        event
+        for event in list(event_broker._history)
+        if event["id"] > since and event["type"] == DOSE_ADMINISTERED
+    ]
+
+
+def test_batch_stores_time_and_notes(client, assistant_headers, clinic, db):
+    dose = _pending_doses(db, clinic, 1)[0]
+    response = client.post(
+        "/doses/administer",
+        json={
+            "items": [
+                {
+                    "dose_id": dose.id,
+                    "notes": "Con comida",
+                    "administered_at": "2026-01-02T08:30:00",
+                }
+            ]
+        },
+        headers=assistant_headers,
+    )
+    assert response.status_code == 200, response.text
+    assert response.json()[0]["status"] == "administered"
+
+    db.refresh(dose)
+    assert dose.status == "administered"
+    assert dose.administration_time == datetime(2026, 1, 2, 8, 30)
+    assert dose.notes == "Con comida"
+
+
+def test_batch_reports_doses_administered_concurrently(
+    client, admin_headers, clinic, db
+):
+    raced, kept = (dose.id for dose in _pending_doses(db, clinic, 2))
+
+    # Otra petición administra `raced` justo antes del UPDATE del lote
+    pending_race = [raced]
+
+    def administer_first(conn, cursor, statement, parameters, context, executemany):
+        if pending_race and statement.startswith("UPDATE doses SET status"):
+            pending_race.clear()
+            cursor.execute(
+                "UPDATE doses SET status = 'administered', administered_by = 1 "
+                "WHERE id = ?",
+                (raced,),
+            )
+
+    event.listen(engine, "before_cursor_execute", administer_first)
+    last_event = event_broker.stats()["last_event_id"]
+    try:
+        response = client.post(
+            "/doses/administer",
+            json={"items": [{"dose_id": raced}, {"dose_id": kept}]},
+            headers=admin_headers,
+        )
+    finally:
+        event.remove(engine, "before_cursor_execute", administer_first)
+    assert response.status_code == 200, response.text
+
+    statuses = {result["dose_id"]: result["status"] for result in response.json()}
+    assert statuses == {raced: "not_pending", kept: "administered"}
+    assert [e["data"]["dose_id"] for e in _published(last_event)] == [kept]
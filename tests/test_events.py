@@ -0,0 +1,92 @@
+"""
+GET /events/stream: autenticación por cabecera o ?token= y reanudación con
+Last-Event-ID. TestClient espera el cuerpo completo y el flujo no termina,
+así que se llama a la aplicación ASGI directamente y se desconecta tras los
+primeros fragmentos.
+"""
+
+import asyncio
+
+from app.services.events import event_broker
+from main import app
+
+
+async def _open_stream(query: str, headers: dict, chunks: int) -> tuple:
+    """Estado y primeros `chunks` fragmentos del cuerpo de /events/stream"""
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": "/events/stream",
+        "raw_path": b"/events/stream",
+        "root_path": "",
+        "query_string": query.encode(),
+        "headers": [
+            (name.lower().encode(), value.encode()) for name, value in headers.items()
+        ],
+        "client": ("testclient", 50000),
+        "server": ("testserver", 80),
+    }
+    messages = []
+    received = asyncio.Event()
+    disconnect = asyncio.Event()
+
+    async def receive():
+        await disconnect.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        messages.append(message)
+        if message["type"] == "http.response.start" and message["status"] != 200:
+            received.set()
+        bodies = [m for m in messages if m["type"] == "http.response.body"]
+        if len(bodies) >= chunks or (bodies and not message.get("more_body")):
+            received.set()
+
+    task = asyncio.create_task(app(scope, receive, send))
+    try:
+        await asyncio.wait_for(received.wait(), timeout=10)
+    finally:
+        disconnect.set()
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+
+    status = messages[0]["status"]
+    body = b"".join(
+        message.get("body", b"")
+        for message in messages
+        if message["type"] == "http.response.body"
+    )
+    return status, body.decode()
+
+
+def _open(query: str = "", headers: dict = None, chunks: int = 1) -> tuple:
+    return asyncio.run(_open_stream(query, headers or {}, chunks))
+
+
+def test_stream_accepts_bearer_header(client, assistant_headers):
+    status, body = _open(headers=assistant_headers)
+    assert status == 200, body
+    assert body.startswith("retry: 3000")
+
+
+def test_stream_accepts_query_token(client, assistant_headers):
+    token = assistant_headers["Authorization"].partition(" ")[2]
+    status, body = _open(f"token={token}")
+    assert status == 200, body
+
+
+def test_stream_resyncs_ids_from_another_process(client, assistant_headers):
+    status, body = _open(
+        headers={**assistant_headers, "Last-Event-ID": "1000"}, chunks=2
+    )
+    assert status == 200, body
+    assert f"id: {event_broker.epoch}-" in body
+    assert "event: resync" in body
+
+
+def test_stream_rejects_invalid_token(client):
+    status, body = _open("token=invalido")
+    assert status == 401
@@ -0,0 +1,64 @@
+"""
+Idempotency-Key: los reintentos se contestan con la respuesta guardada,
+cabeceras incluidas, y una petición que nunca terminó no bloquea sus
+reintentos más allá de IDEMPOTENCY_LEASE_SECONDS.
+"""
+
+from datetime import timedelta
+
+from app.core import clock
+from app.models.idempotency import IdempotencyKey
+from app.models.patient import Note
+
+
+def _post_note(client, headers, clinic, key: str):
+    return client.post(
+        f"/patients/{clinic['patient_ids'][0]}/notes",
+        json={"content": f"Nota {key}"},
+        headers={**headers, "Idempotency-Key": key},
+    )
+
+
+def _record(db, key: str) -> IdempotencyKey:
+    return db.query(IdempotencyKey).filter(IdempotencyKey.key == key).one()
+
+
+def test_replay_restores_original_headers(client, admin_headers, clinic, db):
+    original = _post_note(client, admin_headers, clinic, "cabeceras")
+    assert original.status_code == 200, original.text
+
+    record = _record(db, "cabeceras")
+    record.headers = record.headers + [
+        ["etag", '"nota-1"'],
+        ["location", "/patients/notes/1"],
+    ]
+    db.commit()
+
+    replayed = _post_note(client, admin_headers, clinic, "cabeceras")
+    assert replayed.status_code == 200
+    assert replayed.json() == original.json()
+    assert replayed.headers["Idempotent-Replayed"] == "true"
+    assert replayed.headers["ETag"] == '"nota-1"'
+    assert replayed.headers["Location"] == "/patients/notes/1"
+
+
+def test_unfinished_request_is_retried_after_lease(client, admin_headers, clinic, db):
+    assert _post_note(client, admin_headers, clinic, "lease").status_code == 200
+    notes = db.query(Note).filter(Note.content == "Nota lease").count()
+
+    # Simula que el proceso murió antes de guardar la respuesta
+    record = _record(db, "lease")
+    record.status_code = None
+    record.lease_expires_at = clock.now() + timedelta(seconds=30)
+    db.commit()
+    assert _post_note(client, admin_headers, clinic, "lease").status_code == 409
+
+    record.lease_expires_at = clock.now() - timedelta(seconds=1)
+    db.commit()
+    retried = _post_note(client, admin_headers, clinic, "lease")
+    assert retried.status_code == 200, retried.text
+    assert "Idempotent-Replayed" not in retried.headers
+    assert db.query(Note).filter(Note.content == "Nota lease").count() == notes + 1
+
+    db.expire_all()
+    assert _record(db, "lease").status_code == 200
@@ -0,0 +1,148 @@
+"""
+Medicaciones: validación y reprogramación de dosis al cambiar la frecuencia
+o la duración (PUT /patients/medications/{id}) y límites de los protocolos.
+"""
+
+from datetime import timedelta
+
+from app.core import clock
+from app.models.patient import Dose, Medication
+
+
+def _create_patient_with_medication(client, headers, clinic) -> int:
+    response = client.post(
+        "/patients/",
+        json={
+            "name": "Paciente sin calendario",
+            "species": "gato",
+            "assistant_id": clinic["assistant_ids"][0],
+            "medications": [
+                {
+                    "name": "Meloxicam",
+                    "dosage": "1ml",
+                    "frequency": 12,
+                    "duration_days": 3,
+                }
+            ],
+        },
+        headers=headers,
+    )
+    assert response.status_code == 200, response.text
+    return response.json()["medications"][0]["id"]
+
+
+def test_update_frequency_without_schedule(client, admin_headers, clinic):
+    # Creada junto con el paciente: sin duración ni hora de inicio guardadas
+    medication_id = _create_patient_with_medication(client, admin_headers, clinic)
+
+    response = client.put(
+        f"/patients/medications/{medication_id}",
+        json={"frequency": 6},
+        headers=admin_headers,
+    )
+    assert response.status_code == 200, response.text
+    assert response.json()["frequency"] == 6
+
+
+def test_update_rejects_non_positive_values(client, admin_headers, clinic):
+    medication_id = clinic["medication_ids"][0]
+    for field in ("frequency", "duration_days"):
+        response = client.put(
+            f"/patients/medications/{medication_id}",
+            json={field: 0},
+            headers=admin_headers,
+        )
+        assert response.status_code == 400, response.text
+
+
+def test_update_frequency_reschedules_pending_doses(client, admin_headers, clinic, db):
+    medication_id = clinic["medication_ids"][-1]
+    before = db.query(Dose).filter(Dose.medication_id == medication_id).count()
+
+    response = client.put(
+        f"/patients/medications/{medication_id}",
+        json={"frequency": 2},
+        headers=admin_headers,
+    )
+    assert response.status_code == 200, response.text
+    assert db.query(Dose).filter(Dose.medication_id == medication_id).count() > before
+
+
+def _apply_protocol(client, headers, patient_ids, **medication):
+    return client.post(
+        "/patients/protocols/apply",
+        json={
+            "patient_ids": patient_ids,
+            "medications": [{"name": "Ivermectina", "dosage": "0.2ml", **medication}],
+        },
+        headers=headers,
+    )
+
+
+def test_protocol_rejects_non_positive_duration(client, admin_headers, clinic):
+    response = _apply_protocol(
+        client, admin_headers, clinic["patient_ids"][:1], frequency=24, duration_days=0
+    )
+    assert response.status_code == 400
+    assert response.json()["detail"] == (
+        "frequency and duration_days must be greater than zero"
+    )
+
+
+def test_protocol_caps_total_doses(client, admin_headers, clinic, db):
+    medications = db.query(Medication).count()
+    # 100 años cada hora para todos los pacientes
+    response = _apply_protocol(
+        client,
+        admin_headers,
+        clinic["patient_ids"],
+        frequency=1,
+        duration_days=36500,
+    )
+    assert response.status_code == 400
+    assert "maximum" in response.json()["detail"]
+    assert db.query(Medication).count() == medications
+
+
+def test_shorter_duration_without_pending_doses_completes(
+    client, admin_headers, clinic, db
+):
+    response = client.post(
+        f"/patients/{clinic['patient_ids'][1]}/medications",
+        json={
+            "name": "Prednisolona",
+            "dosage": "2mg",
+            "frequency": 24,
+            "duration_days": 5,
+            "start_time": (clock.now() - timedelta(hours=2)).isoformat(),
+        },
+        headers=admin_headers,
+    )
+    assert response.status_code == 200, response.text
+    medication_id = response.json()["id"]
+    first = (
+        db.query(Dose)
+        .filter(Dose.medication_id == medication_id)
+        .order_by(Dose.scheduled_time)
+        .first()
+    )
+    administered = client.post(
+        f"/patients/doses/{first.id}/administer", json={}, headers=admin_headers
+    )
+    assert administered.status_code == 200, administered.text
+
+    # Con un día de duración no queda ninguna dosis futura
+    response = client.put(
+        f"/patients/medications/{medication_id}",
+        json={"duration_days": 1},
+        headers=admin_headers,
+    )
+    assert response.status_code == 200, response.text
+    assert response.json()["status"] == "completed"
+    assert response.json()["completed"] is True
+    assert (
+        db.query(Dose)
+        .filter(Dose.medication_id == medication_id, Dose.status == "pending")
+        .count()
+        == 0
+    )
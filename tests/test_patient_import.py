@@ -0,0 +1,92 @@
+"""
+POST /patients/import: los pacientes importados aparecen en la lista aunque
+el cliente la tuviera en caché, y sus medicaciones entran en el catálogo.
+"""
+
+import orjson
+
+from app.api.routes import patients as patient_routes
+from app.crud import crud_patient
+from app.models.medication_catalog import MedicationCatalogEntry
+from app.services.patient_import import import_patients
+
+
+def test_import_invalidates_list_and_feeds_catalog(
+    client, admin_headers, clinic, db, monkeypatch
+):
+    # Sin el verificador de dosis, que también invalida pacientes
+    monkeypatch.setattr(patient_routes, "run_dose_notification_check", lambda: None)
+    listed = client.get("/patients/", headers=admin_headers)
+    assert listed.status_code == 200
+    etag = listed.headers["ETag"]
+
+    body = b"".join(
+        orjson.dumps(
+            {
+                "name": f"Importado {number}",
+                "species": "conejo",
+                "assistant_id": clinic["assistant_ids"][1],
+                "medications": [
+                    {
+                        "name": "Enrofloxacino importado",
+                        "dosage": "0.5ml",
+                        "frequency": 24,
+                        "duration_days": 5,
+                    }
+                ],
+            },
+            option=orjson.OPT_APPEND_NEWLINE,
+        )
+        for number in range(3)
+    )
+    imported = client.post(
+        "/patients/import?format=ndjson", content=body, headers=admin_headers
+    )
+    assert imported.status_code == 200, imported.text
+    assert imported.json()["created"] == 3
+
+    relisted = client.get(
+        "/patients/", headers={**admin_headers, "If-None-Match": etag}
+    )
+    assert relisted.status_code == 200
+    assert relisted.headers["ETag"] != etag
+    names = {patient["name"] for patient in relisted.json()}
+    assert {f"Importado {number}" for number in range(3)} <= names
+
+    suggestions = client.get(
+        "/medications/catalog/suggest?prefix=Enrofloxacino", headers=admin_headers
+    )
+    assert suggestions.status_code == 200
+    assert [item["name"] for item in suggestions.json()] == ["Enrofloxacino importado"]
+    assert (
+        db.query(MedicationCatalogEntry)
+        .filter(MedicationCatalogEntry.name == "Enrofloxacino importado")
+        .count()
+        == 1
+    )
+
+
+def test_import_from_another_process_changes_list_etag(
+    client, admin_headers, clinic, db, monkeypatch
+):
+    listed = client.get("/patients/", headers=admin_headers)
+    etag = listed.headers["ETag"]
+
+    # scripts/import_patients corre en otro proceso: la caché del servidor
+    # no se entera
+    monkeypatch.setattr(crud_patient.patient_cache, "invalidate", lambda *ids: None)
+    line = orjson.dumps(
+        {
+            "name": "Importado por script",
+            "species": "hurón",
+            "assistant_id": clinic["assistant_ids"][0],
+        }
+    )
+    summary = import_patients(db, [line.decode()], "ndjson", user_id=1)
+    assert summary["created"] == 1
+
+    relisted = client.get(
+        "/patients/", headers={**admin_headers, "If-None-Match": etag}
+    )
+    assert relisted.status_code == 200
+    assert "Importado por script" in {patient["name"] for patient in relisted.json()}
@@ -0,0 +1,19 @@
+"""
+Perfilado por petición con X-Profile: solo para administradores.
+"""
+
+
+def test_admin_request_is_profiled(client, admin_headers):
+    response = client.get("/patients/", headers={**admin_headers, "X-Profile": "1"})
+    assert response.status_code == 200, response.text
+    profile_id = response.headers["X-Profile-Id"]
+
+    profile = client.get(f"/debug/profiles/{profile_id}", headers=admin_headers)
+    assert profile.status_code == 200, profile.text
+    assert profile.json()["label"] == "GET /patients/"
+
+
+def test_profiling_requires_admin(client, assistant_headers):
+    response = client.get("/patients/?profile=1", headers=assistant_headers)
+    assert response.status_code == 403
+    assert "X-Profile-Id" not in response.headers
@@ -0,0 +1,165 @@
+"""
+Presupuestos de consultas SQL: cada ruta de QUERY_BUDGETS y cada tick del
+verificador de dosis deben mantenerse dentro de su presupuesto sin importar
+cuántos pacientes, medicaciones o dosis haya. Si una de estas pruebas falla,
+lo más probable es que un cambio haya reintroducido un patrón N+1.
+"""
+
+import pytest
+
+from app.middleware.query_budget_middleware import QUERY_BUDGETS, get_query_budget
+from app.models.patient import Dose
+from app.services.notifications import (
+    TICK_QUERY_BUDGET,
+    check_and_send_dose_notifications,
+    set_notification_transport,
+)
+
+
+def _pending_dose_ids(db, clinic, count: int) -> list:
+    return [
+        dose_id
+        for (dose_id,) in db.query(Dose.id)
+        .filter(
+            Dose.status == "pending",
+            Dose.medication_id.in_(clinic["medication_ids"]),
+        )
+        .order_by(Dose.id.desc())
+        .limit(count)
+    ]
+
+
+# (método, plantilla de la ruta) -> petición de ejemplo: f(clinic, db) ->
+# (url, cuerpo JSON o None)
+BUDGET_REQUESTS = {
+    ("GET", "/patients/"): lambda clinic, db: ("/patients/", None),
+    ("GET", "/patients/{patient_id}"): lambda clinic, db: (
+        f"/patients/{clinic['patient_ids'][0]}",
+        None,
+    ),
+    ("GET", "/patients/{patient_id}/pending-doses/"): lambda clinic, db: (
+        f"/patients/{clinic['patient_ids'][0]}/pending-doses/",
+        None,
+    ),
+    ("POST", "/patients/doses/{dose_id}/administer"): lambda clinic, db: (
+        f"/patients/doses/{_pending_dose_ids(db, clinic, 1)[0]}/administer",
+        {"notes": "ok"},
+    ),
+    ("GET", "/patients/summary"): lambda clinic, db: ("/patients/summary", None),
+    ("GET", "/patients/{patient_id}/medications"): lambda clinic, db: (
+        f"/patients/{clinic['patient_ids'][0]}/medications",
+        None,
+    ),
+    ("GET", "/patients/medications/{medication_id}/doses"): lambda clinic, db: (
+        f"/patients/medications/{clinic['medication_ids'][0]}/doses"
+        "?include_history=true",
+        None,
+    ),
+    ("GET", "/patients/{patient_id}/notes"): lambda clinic, db: (
+        f"/patients/{clinic['patient_ids'][0]}/notes",
+        None,
+    ),
+    ("GET", "/doses/worklist"): lambda clinic, db: ("/doses/worklist", None),
+    ("GET", "/search"): lambda clinic, db: ("/search?q=paciente", None),
+    ("GET", "/stats/overview"): lambda clinic, db: ("/stats/overview", None),
+    ("GET", "/stats/adherence"): lambda clinic, db: ("/stats/adherence", None),
+    ("GET", "/medications/catalog/suggest"): lambda clinic, db: (
+        "/medications/catalog/suggest?prefix=amox",
+        None,
+    ),
+    ("POST", "/doses/administer"): lambda clinic, db: (
+        "/doses/administer",
+        {
+            "items": [
+                {"dose_id": dose_id} for dose_id in _pending_dose_ids(db, clinic, 5)
+            ]
+        },
+    ),
+    ("POST", "/patients/notes/batch"): lambda clinic, db: (
+        "/patients/notes/batch",
+        {
+            "items": [
+                {"patient_id": patient_id, "content": "Ronda de la tarde"}
+                for patient_id in clinic["patient_ids"]
+            ]
+        },
+    ),
+    ("POST", "/patients/protocols/apply"): lambda clinic, db: (
+        "/patients/protocols/apply",
+        {
+            "patient_ids": clinic["patient_ids"],
+            "medications": [
+                {
+                    "name": "Meloxicam",
+                    "dosage": "1ml",
+                    "frequency": 24,
+                    "duration_days": 3,
+                },
+                {
+                    "name": "Omeprazol",
+                    "dosage": "10mg",
+                    "frequency": 12,
+                    "duration_days": 2,
+                },
+            ],
+        },
+    ),
+}
+
+
+def test_every_budget_has_a_request():
+    assert set(BUDGET_REQUESTS) == set(QUERY_BUDGETS)
+
+
+@pytest.mark.parametrize(
+    "route", sorted(BUDGET_REQUESTS), ids=lambda route: " ".join(route)
+)
+def test_route_within_query_budget(route, client, admin_headers, clinic, db):
+    method, path = route
+    url, body = BUDGET_REQUESTS[route](clinic, db)
+    db.close()
+
+    response = client.request(method, url, json=body, headers=admin_headers)
+
+    assert response.status_code == 200, response.text
+    count = int(response.headers["X-Query-Count"])
+    budget = get_query_budget(method, path)
+    assert (
+        count <= budget
+    ), f"{method} {path}: {count} consultas (presupuesto: {budget})"
+
+
+def test_assistant_patient_list_within_query_budget(client, assistant_headers):
+    response = client.get("/patients/", headers=assistant_headers)
+
+    assert response.status_code == 200
+    assert int(response.headers["X-Query-Count"]) <= get_query_budget(
+        "GET", "/patients/"
+    )
+
+
+def test_notification_tick_within_query_budget(clinic, db, max_queries):
+    # Las rutas de administración ya lanzaron verificaciones en segundo plano
+    db.query(Dose).filter(Dose.status == "pending").update(
+        {Dose.notification_sent: False}
+    )
+    db.commit()
+    sent = []
+    set_notification_transport(lambda number, variables: sent.append(number) or True)
+    try:
+        with max_queries(TICK_QUERY_BUDGET, "verificación de dosis"):
+            notified = check_and_send_dose_notifications(db)
+    finally:
+        set_notification_transport()
+
+    # Vencen varias dosis de varias medicaciones y pacientes: el presupuesto
+    # se cumple con todas a la vez, no con una sola
+    medications = {
+        medication_id
+        for (medication_id,) in db.query(Dose.medication_id).filter(
+            Dose.id.in_(notified)
+        )
+    }
+    assert len(notified) > 20
+    assert len(medications) > 1
+    assert sent